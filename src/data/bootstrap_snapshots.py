@@ -0,0 +1,347 @@
+import pandas as pd
+import numpy as np
+import requests
+import sys
+import os
+from datetime import datetime, timezone
+from fpl_decoder import decode_bootstrap_static, BOOTSTRAP_ELEMENT_SCHEMA
+
+# snapshot fields: column -> dtype, keyed by fpl_id
+SNAPSHOT_FIELDS = {
+    column: dtype
+    for column, dtype in BOOTSTRAP_ELEMENT_SCHEMA.values()
+    if column != "fpl_id"
+}
+# delta log field of players entering ("True") or leaving ("False") bootstrap-static
+PRESENT_FIELD = "_present"
+# delta log field codes
+DELTA_FIELDS = list(SNAPSHOT_FIELDS) + [PRESENT_FIELD]
+# snapshots between full checkpoints
+CHECKPOINT_EVERY = 50
+
+
+def snapshot_dir(season):
+    """Directory of the bootstrap-static snapshot store of a season.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        str: snapshot store directory
+    """
+    return "data/" + season + "/bootstrap_snapshots/"
+
+
+def read_snapshot_index(season):
+    """Read the snapshot index of a season.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        pandas dataframe: snapshot_id, timestamp, checkpoint of each snapshot, empty if no snapshots
+    """
+    path = snapshot_dir(season) + "snapshots.csv"
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["snapshot_id", "timestamp", "checkpoint"])
+    return pd.read_csv(path)
+
+
+def segment_path(season, checkpoint_id):
+    """Path of the delta log segment of a checkpoint, the changes of the snapshots after it.
+
+    Args:
+        season (str): start year of EPL season
+        checkpoint_id (int): snapshot id of the checkpoint
+
+    Returns:
+        str: segment path
+    """
+    return snapshot_dir(season) + "deltas_" + str(checkpoint_id) + ".npz"
+
+
+def read_segment(season, checkpoint_id):
+    """Read the columnar delta log segment of a checkpoint.
+
+    Args:
+        season (str): start year of EPL season
+        checkpoint_id (int): snapshot id of the checkpoint
+
+    Returns:
+        pandas dataframe: snapshot_id, fpl_id, field, value of each change, empty if no segment
+    """
+    path = segment_path(season, checkpoint_id)
+    if not os.path.exists(path):
+        return pd.DataFrame(
+            {
+                "snapshot_id": np.zeros(0, dtype="int64"),
+                "fpl_id": np.zeros(0, dtype="int64"),
+                "field": np.zeros(0, dtype="object"),
+                "value": np.zeros(0, dtype="object"),
+            }
+        )
+    with np.load(path) as segment:
+        return pd.DataFrame(
+            {
+                "snapshot_id": segment["snapshot_id"].astype("int64"),
+                "fpl_id": segment["fpl_id"].astype("int64"),
+                "field": np.array(DELTA_FIELDS, dtype="object")[segment["field"]],
+                "value": segment["value"].astype("object"),
+            }
+        )
+
+
+def write_segment(season, checkpoint_id, deltas):
+    """Write a columnar delta log segment, replacing the file only once it is fully written.
+
+    Args:
+        season (str): start year of EPL season
+        checkpoint_id (int): snapshot id of the checkpoint
+        deltas (pandas dataframe): snapshot_id, fpl_id, field, value of each change
+    """
+    path = segment_path(season, checkpoint_id)
+    tmp_path = path[: -len(".npz")] + "_tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        snapshot_id=deltas["snapshot_id"].to_numpy(dtype="int32"),
+        fpl_id=deltas["fpl_id"].to_numpy(dtype="int32"),
+        field=np.array(
+            [DELTA_FIELDS.index(field) for field in deltas["field"]], dtype="int8"
+        ),
+        value=deltas["value"].to_numpy(dtype="str"),
+    )
+    os.replace(tmp_path, path)
+
+
+def typed_snapshot(table):
+    """Cast snapshot columns to their schema dtypes, empty strings are missing values.
+
+    Args:
+        table (pandas dataframe): snapshot with object columns, indexed by fpl_id
+
+    Returns:
+        pandas dataframe: typed snapshot
+    """
+    table = table.reindex(columns=list(SNAPSHOT_FIELDS)).replace("", np.nan)
+    for column, dtype in SNAPSHOT_FIELDS.items():
+        if dtype == "object":
+            table[column] = table[column].fillna("").astype("object")
+        elif dtype == "bool":
+            table[column] = table[column].astype(str) == "True"
+        else:
+            table[column] = pd.to_numeric(table[column])
+            if dtype == "int64" and table[column].notna().all():
+                table[column] = table[column].astype("int64")
+    return table
+
+
+def snapshot_values(table):
+    """String values of a snapshot, the stored form of snapshot fields.
+
+    Args:
+        table (pandas dataframe): typed snapshot, indexed by fpl_id
+
+    Returns:
+        pandas dataframe: snapshot values as strings, "" for missing values
+    """
+    values = table[list(SNAPSHOT_FIELDS)].astype("object")
+    return values.where(values.notna(), "").astype(str)
+
+
+def latest_checkpoint(snapshots, snapshot_id):
+    """Snapshot id of the nearest full checkpoint at or before a snapshot.
+
+    Args:
+        snapshots (pandas dataframe): snapshot index
+        snapshot_id (int): snapshot id
+
+    Returns:
+        int: checkpoint snapshot id, -1 if there is none
+    """
+    checkpoints = snapshots.loc[
+        snapshots["checkpoint"].astype(bool)
+        & (snapshots["snapshot_id"] <= snapshot_id),
+        "snapshot_id",
+    ]
+    return int(checkpoints.max()) if len(checkpoints) > 0 else -1
+
+
+def reconstruct_snapshot(season, snapshot_id, snapshots=None, segment=None):
+    """Rebuild a snapshot from the nearest full checkpoint and the deltas of its segment.
+    Only the checkpoint and its segment are read, so rebuilds do not slow down as the season goes on.
+
+    Args:
+        season (str): start year of EPL season
+        snapshot_id (int): snapshot to rebuild
+        snapshots (pandas dataframe): snapshot index, read from the store if None
+        segment (pandas dataframe): delta log segment of the checkpoint, read from the store if None
+
+    Returns:
+        pandas dataframe: typed snapshot indexed by fpl_id, empty if the snapshot does not exist
+    """
+    if snapshots is None:
+        snapshots = read_snapshot_index(season)
+    checkpoint_id = latest_checkpoint(snapshots, snapshot_id)
+    if checkpoint_id < 0:
+        return typed_snapshot(pd.DataFrame(index=pd.Index([], name="fpl_id")))
+    if segment is None:
+        segment = read_segment(season, checkpoint_id)
+
+    # checkpoint, then latest delta of each player field since
+    table = pd.read_csv(
+        snapshot_dir(season) + "checkpoint_" + str(checkpoint_id) + ".csv",
+        dtype="object",
+        keep_default_na=False,
+        index_col="fpl_id",
+    )
+    table.index = table.index.astype("int64")
+    changes = segment[
+        (segment["snapshot_id"] <= snapshot_id)
+        & segment["snapshot_id"].isin(snapshots["snapshot_id"])
+    ]
+    if len(changes) > 0:
+        changes = changes.drop_duplicates(subset=["fpl_id", "field"], keep="last")
+        table = changes.pivot(
+            index="fpl_id", columns="field", values="value"
+        ).combine_first(table)
+
+    # players that left bootstrap-static
+    if PRESENT_FIELD in table.columns:
+        table = table[table[PRESENT_FIELD] != "False"]
+    return typed_snapshot(table)
+
+
+def snapshot_as_of(season, timestamp):
+    """Snapshot of bootstrap-static player data as of a time.
+
+    Args:
+        season (str): start year of EPL season
+        timestamp (str): ISO 8601 UTC time
+
+    Returns:
+        pandas dataframe: typed snapshot indexed by fpl_id, of the latest snapshot at or before the time
+    """
+    snapshots = read_snapshot_index(season)
+    earlier = snapshots[snapshots["timestamp"] <= timestamp]
+    if len(earlier) == 0:
+        return reconstruct_snapshot(season, -1, snapshots)
+    return reconstruct_snapshot(season, earlier["snapshot_id"].max(), snapshots)
+
+
+def field_history(season, field, fpl_ids=None):
+    """Changes of a field over all snapshots, e.g. price changes from now_cost.
+
+    Args:
+        season (str): start year of EPL season
+        field (str): snapshot field
+        fpl_ids (list): FPL player ids, default all
+
+    Returns:
+        pandas dataframe: fpl_id, timestamp and value of the field from each snapshot it changed in
+    """
+    snapshots = read_snapshot_index(season)
+    checkpoint_ids = snapshots.loc[snapshots["checkpoint"].astype(bool), "snapshot_id"]
+    # every segment, and an empty one for a store without snapshots
+    history = pd.concat(
+        [read_segment(season, checkpoint_id) for checkpoint_id in checkpoint_ids]
+        + [read_segment(season, -1)],
+        ignore_index=True,
+    )
+    history = history[
+        (history["field"] == field)
+        & history["snapshot_id"].isin(snapshots["snapshot_id"])
+    ]
+    if fpl_ids is not None:
+        history = history[history["fpl_id"].isin(fpl_ids)]
+    history = history.merge(
+        snapshots[["snapshot_id", "timestamp"]], how="left", on="snapshot_id"
+    )
+    history["value"] = typed_snapshot(
+        history[["value"]].rename(columns={"value": field})
+    )[field].to_numpy()
+    return history[["fpl_id", "timestamp", "value"]].reset_index(drop=True)
+
+
+def record_snapshot(season, players, timestamp=None):
+    """Add a bootstrap-static fetch to the snapshot store, as the fields changed since the previous snapshot.
+    Every CHECKPOINT_EVERY snapshots a full checkpoint is written and a new delta log segment started.
+
+    Args:
+        season (str): start year of EPL season
+        players (pandas dataframe): decoded bootstrap-static player table
+        timestamp (str): ISO 8601 UTC time of the fetch, default now
+    """
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    path = snapshot_dir(season)
+    os.makedirs(path, exist_ok=True)
+    snapshots = read_snapshot_index(season)
+    checkpoint_id = latest_checkpoint(snapshots, np.inf)
+    segment = read_segment(season, checkpoint_id)
+    # ids of deltas from an interrupted write are not reused
+    snapshot_id = (
+        max(snapshots["snapshot_id"].max(), segment["snapshot_id"].max(), -1) + 1
+        if len(snapshots) + len(segment) > 0
+        else 0
+    )
+
+    # changed fields of each player, every field of new players
+    current = snapshot_values(players.set_index("fpl_id"))
+    previous = snapshot_values(
+        reconstruct_snapshot(season, snapshot_id - 1, snapshots, segment)
+    )
+    changes = (
+        current.where(current != previous.reindex(index=current.index))
+        .stack()
+        .dropna()
+        .rename("value")
+        .reset_index()
+    )
+    changes.columns = ["fpl_id", "field", "value"]
+
+    # players entering or leaving bootstrap-static
+    entered = current.index.difference(previous.index)
+    left = previous.index.difference(current.index)
+    changes = pd.concat(
+        [
+            changes,
+            pd.DataFrame(
+                {
+                    "fpl_id": np.concatenate([entered, left]),
+                    "field": PRESENT_FIELD,
+                    "value": ["True"] * len(entered) + ["False"] * len(left),
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    changes.insert(0, "snapshot_id", snapshot_id)
+
+    # checkpoint the full snapshot periodically, starting a new segment with its changes, else append to the segment
+    checkpoint = checkpoint_id < 0 or snapshot_id - checkpoint_id >= CHECKPOINT_EVERY
+    if checkpoint:
+        current.to_csv(path + "checkpoint_" + str(snapshot_id) + ".csv")
+        write_segment(season, snapshot_id, changes)
+    else:
+        write_segment(
+            season, checkpoint_id, pd.concat([segment, changes], ignore_index=True)
+        )
+    pd.DataFrame(
+        {
+            "snapshot_id": [snapshot_id],
+            "timestamp": [timestamp],
+            "checkpoint": [checkpoint],
+        }
+    ).to_csv(
+        path + "snapshots.csv",
+        mode="a",
+        header=not os.path.exists(path + "snapshots.csv"),
+        index=False,
+    )
+
+
+if __name__ == "__main__":
+    # record a bootstrap-static fetch, can run several times per day
+    r = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/")
+    players, _ = decode_bootstrap_static(r.content)
+    record_snapshot(sys.argv[1], players)
@@ -0,0 +1,158 @@
+import pandas as pd
+import os
+import sys
+from fpl_decoder import LIVE_ELEMENT_SCHEMA
+
+# fact table key, one row per player fixture (fixture_id -1 for FPL minutes or points without an Understat appearance)
+FACT_KEYS = ["season", "gameweek", "player_id", "fpl_id", "fixture_id"]
+# Understat player (per fixture) stats
+UNDERSTAT_COLUMNS = [
+    "team_id",
+    "position",
+    "time",
+    "goals",
+    "own_goals",
+    "shots",
+    "xG",
+    "npxG",
+    "xA",
+    "xGI",
+    "npxGI",
+    "key_passes",
+    "assists",
+    "xGChain",
+    "xGBuildup",
+    "yellow_card",
+    "red_card",
+    "penalty_attempt",
+    "penalty_scored",
+    "team_xG",
+    "team_xG_on",
+]
+# FPL player (per gameweek) stats, suffixed with _fpl where Understat has the same column
+FPL_COLUMNS = [
+    column for column, dtype in LIVE_ELEMENT_SCHEMA.values() if column != "fpl_id"
+]
+
+
+def fact_rows(season, player_data, fpl_player_data, player_mapping):
+    """Join Understat and FPL player data into fact table rows.
+    FPL stats are per gameweek, so in double gameweeks they are attached to the player's first fixture only, and sums over rows stay correct.
+    FPL gameweeks without minutes, points or an Understat appearance are not stored.
+
+    Args:
+        season (str): start year of EPL season
+        player_data (pandas dataframe): Understat player (per fixture) data
+        fpl_player_data (pandas dataframe): FPL player (per gameweek) data, None if not recorded
+        player_mapping (pandas dataframe): player mapping with player_id and fpl_id
+
+    Returns:
+        pandas dataframe: FACT_KEYS, UNDERSTAT_COLUMNS and FPL_COLUMNS (if recorded) per row, sorted by key
+    """
+    mapping = player_mapping.dropna(subset=["player_id", "fpl_id"]).astype(
+        {"player_id": "int64", "fpl_id": "int64"}
+    )
+    understat = player_data[
+        ["gameweek", "player_id", "fixture_id"] + UNDERSTAT_COLUMNS
+    ].sort_values(["gameweek", "player_id", "fixture_id"])
+    understat["fpl_id"] = (
+        understat["player_id"]
+        .map(
+            mapping.drop_duplicates(subset="player_id").set_index("player_id")["fpl_id"]
+        )
+        .fillna(-1)
+        .astype("int64")
+    )
+
+    if fpl_player_data is None:
+        facts = understat
+    else:
+        # attach FPL gameweek stats to first fixture of the gameweek, or a row of their own
+        first = ~understat.duplicated(subset=["gameweek", "player_id"])
+        fpl = fpl_player_data[["fpl_id", "gameweek"] + FPL_COLUMNS]
+        fpl = fpl[
+            (fpl["minutes"] > 0)
+            | (fpl["total_points"] != 0)
+            | fpl.set_index(["fpl_id", "gameweek"]).index.isin(
+                understat.set_index(["fpl_id", "gameweek"]).index
+            )
+        ]
+        joined = understat[first].merge(
+            fpl,
+            how="outer",
+            on=["fpl_id", "gameweek"],
+            suffixes=("", "_fpl"),
+            indicator=True,
+        )
+        fpl_only = joined["_merge"] == "right_only"
+        joined.loc[fpl_only, "player_id"] = (
+            joined.loc[fpl_only, "fpl_id"]
+            .map(
+                mapping.drop_duplicates(subset="fpl_id").set_index("fpl_id")[
+                    "player_id"
+                ]
+            )
+            .fillna(-1)
+        )
+        joined.loc[fpl_only, "fixture_id"] = -1
+        facts = pd.concat(
+            [joined.drop(columns="_merge"), understat[~first]], ignore_index=True
+        )
+
+    facts["season"] = int(season)
+    facts = facts.astype(
+        {"gameweek": "int64", "player_id": "int64", "fixture_id": "int64"}
+    )
+    facts = facts.sort_values(FACT_KEYS, ignore_index=True)
+    return facts[FACT_KEYS + [c for c in facts.columns if c not in FACT_KEYS]]
+
+
+def update_fact_table(season, rebuild=False):
+    """Add new gameweeks to the player gameweek fact table of a season.
+    The latest stored gameweek is rebuilt too, as its data may have been incomplete.
+
+    Args:
+        season (str): start year of EPL season
+        rebuild (bool): rebuild all gameweeks
+    """
+    fact_path = "data/" + season + "/player_gameweek_facts.csv"
+    fpl_path = "data/" + season + "/fpl_player_data.csv"
+    player_data = pd.read_csv(
+        "data/" + season + "/player_data.csv", float_precision="round_trip"
+    )
+    player_mapping = pd.read_csv("data/" + season + "/player_mapping.csv")
+    fpl_player_data = (
+        pd.read_csv(
+            fpl_path,
+            usecols=["fpl_id", "gameweek"] + FPL_COLUMNS,
+            float_precision="round_trip",
+        )
+        if os.path.exists(fpl_path)
+        else None
+    )
+
+    # keep stored gameweeks before the latest
+    facts = None
+    start_gw = 1
+    if os.path.exists(fact_path) and not rebuild:
+        facts = pd.read_csv(fact_path, float_precision="round_trip")
+        start_gw = facts["gameweek"].max()
+        facts = facts[facts["gameweek"] < start_gw]
+    new_facts = fact_rows(
+        season,
+        player_data[player_data["gameweek"] >= start_gw],
+        (
+            None
+            if fpl_player_data is None
+            else fpl_player_data[fpl_player_data["gameweek"] >= start_gw]
+        ),
+        player_mapping,
+    )
+    if facts is not None:
+        new_facts = pd.concat([facts, new_facts], ignore_index=True)
+    new_facts.to_csv(fact_path, index=False)
+
+
+if __name__ == "__main__":
+    # rebuild the full season fact table
+    update_fact_table(sys.argv[1], rebuild=True)
@@ -0,0 +1,175 @@
+import pandas as pd
+import numpy as np
+import requests
+import sys
+import os
+from shot_data import write_shot_partitions
+from build_fact_table import update_fact_table
+
+
+def get_fpl_fixtures(season):
+    """Retrieve the fixture calendar (gameweek and kickoff time of each fixture) from Fantasy Premier League.
+    Falls back to the local copy of the last successful request if the api is unavailable.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        pandas dataframe: h_id, a_id, gameweek, kickoff_time per fixture, or None if no data available
+    """
+    local_path = "data/" + season + "/fpl_fixtures.csv"
+    try:
+        r = requests.get("https://fantasy.premierleague.com/api/fixtures/", timeout=30)
+        r.raise_for_status()
+        fpl_fixtures = pd.DataFrame(r.json())
+    except (requests.RequestException, ValueError):
+        fpl_fixtures = None
+
+    # api only serves the current season, check it is the season requested
+    if fpl_fixtures is not None and not fpl_fixtures.empty:
+        kickoff_year = pd.to_datetime(fpl_fixtures["kickoff_time"]).dt.year.min()
+        if kickoff_year != int(season):
+            fpl_fixtures = None
+
+    if fpl_fixtures is None or fpl_fixtures.empty:
+        if os.path.exists(local_path):
+            return pd.read_csv(local_path)
+        return None
+
+    # format, FPL team ids are 1-indexed
+    fpl_fixtures = fpl_fixtures.rename(
+        columns={"id": "fpl_fixture_id", "event": "gameweek"}
+    )
+    fpl_fixtures["h_id"] = fpl_fixtures["team_h"] - 1
+    fpl_fixtures["a_id"] = fpl_fixtures["team_a"] - 1
+    # unscheduled (postponed) fixtures are assigned gameweek 0
+    fpl_fixtures["gameweek"] = fpl_fixtures["gameweek"].fillna(0).astype("int64")
+    fpl_fixtures = fpl_fixtures[
+        ["fpl_fixture_id", "h_id", "a_id", "gameweek", "kickoff_time"]
+    ]
+
+    # save local copy
+    fpl_fixtures.to_csv(local_path, index=False)
+    return fpl_fixtures
+
+
+def assign_gameweeks(season_data, fpl_fixtures):
+    """Assign gameweeks to Understat fixtures from the FPL fixture calendar.
+    Each home/away team pairing occurs once per season, so fixtures are matched on (h_id, a_id).
+
+    Args:
+        season_data (pandas dataframe): EPL season fixtures dataframe
+        fpl_fixtures (pandas dataframe): FPL fixture calendar from get_fpl_fixtures
+
+    Returns:
+        pandas series: gameweek per fixture, aligned to season_data
+    """
+    # (h_id, a_id) -> gameweek lookup array
+    lookup = np.full((20, 20), -1, dtype="int64")
+    lookup[fpl_fixtures["h_id"], fpl_fixtures["a_id"]] = fpl_fixtures["gameweek"]
+    gameweeks = lookup[season_data["h_id"], season_data["a_id"]]
+
+    # keep existing gameweek for any fixture not found in the calendar
+    if "gameweek" in season_data.columns:
+        gameweeks = np.where(gameweeks < 0, season_data["gameweek"], gameweeks)
+    return pd.Series(gameweeks, index=season_data.index, name="gameweek")
+
+
+def fixture_gameweeks(season):
+    """Fixture id to gameweek lookup from the season fixture calendar.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        dict: fixture_id -> gameweek
+    """
+    season_data = pd.read_csv("data/" + season + "/season_data.csv")
+    return dict(zip(season_data["fixture_id"], season_data["gameweek"]))
+
+
+def move_stored_fixtures(season, gameweeks):
+    """Move the stored data of resulted fixtures to new gameweeks.
+    Fixture, player and shot data are updated and the fact table rebuilt.
+    Model states are removed, as they hold fixtures under their old gameweeks, and are rebuilt on the next update.
+
+    Args:
+        season (str): start year of EPL season
+        gameweeks (dict): fixture_id -> new gameweek
+
+    Returns:
+        bool: True if any stored fixture was moved
+    """
+    path = "data/" + season + "/"
+    moved = False
+    # round trip floats, so only the gameweeks change
+    for file, sort_by in [
+        ("fixture_data.csv", ["gameweek"]),
+        ("player_data.csv", ["gameweek", "team_id"]),
+    ]:
+        data = pd.read_csv(path + file, float_precision="round_trip")
+        rows = data["fixture_id"].isin(gameweeks.keys())
+        if rows.any():
+            data.loc[rows, "gameweek"] = data.loc[rows, "fixture_id"].map(gameweeks)
+            data = data.sort_values(by=sort_by, kind="stable")
+            data.to_csv(path + file, index=False)
+            moved = True
+    if not moved:
+        return False
+
+    # move shots between gameweek partitions
+    if os.path.isdir(path + "shots"):
+        moved_shots = []
+        for partition in sorted(os.listdir(path + "shots")):
+            shots = pd.read_csv(path + "shots/" + partition)
+            rows = shots["fixture_id"].isin(gameweeks.keys())
+            if rows.any():
+                moved_shots.append(shots[rows])
+                shots[~rows].to_csv(path + "shots/" + partition, index=False)
+        if len(moved_shots) > 0:
+            moved_shots = pd.concat(moved_shots)
+            moved_shots["gameweek"] = moved_shots["fixture_id"].map(gameweeks)
+            write_shot_partitions(moved_shots, season)
+
+    update_fact_table(season, rebuild=True)
+    for state in ["odm_decay_state.npz", "xminutes_state.npz"]:
+        if os.path.exists(path + state):
+            os.remove(path + state)
+    return True
+
+
+def update_fixture_calendar(season):
+    """Update season fixture gameweeks from the FPL fixture calendar, reporting any moved fixtures.
+    Stored data of moved fixtures that have already been played is moved too, ratings already stored for past gameweeks are not refit.
+
+    Args:
+        season (str): start year of EPL season
+    """
+    season_data = pd.read_csv("data/" + season + "/season_data.csv")
+    fpl_fixtures = get_fpl_fixtures(season)
+    if fpl_fixtures is None:
+        print("WARNING no FPL fixture calendar available, gameweeks unchanged")
+        return
+
+    # only fixtures with a changed gameweek are updated
+    gameweeks = assign_gameweeks(season_data, fpl_fixtures)
+    moved = season_data["gameweek"] != gameweeks
+    if moved.any():
+        print("Fixtures moved: ")
+        for row, new_gw in zip(season_data[moved].itertuples(), gameweeks[moved]):
+            print(
+                row.home + " v " + row.away + ": GW",
+                row.gameweek,
+                "-> GW",
+                new_gw,
+            )
+        season_data.loc[moved, "gameweek"] = gameweeks[moved]
+        season_data.to_csv("data/" + season + "/season_data.csv", index=False)
+        if move_stored_fixtures(
+            season, dict(zip(season_data[moved]["fixture_id"], gameweeks[moved]))
+        ):
+            print("Stored data of played fixtures moved, fact table rebuilt")
+
+
+if __name__ == "__main__":
+    update_fixture_calendar(sys.argv[1])
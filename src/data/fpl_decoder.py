@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# bootstrap-static "elements" schema: api field -> (column, dtype)
+BOOTSTRAP_ELEMENT_SCHEMA = {
+    "id": ("fpl_id", "int64"),
+    "first_name": ("first_name", "object"),
+    "second_name": ("second_name", "object"),
+    "web_name": ("web_name", "object"),
+    "element_type": ("element_type", "int64"),
+    "team": ("team", "int64"),
+    "now_cost": ("now_cost", "int64"),
+    "cost_change_event": ("cost_change_event", "int64"),
+    "cost_change_start": ("cost_change_start", "int64"),
+    "status": ("status", "object"),
+    "news": ("news", "object"),
+    "chance_of_playing_this_round": ("chance_of_playing_this_round", "float64"),
+    "chance_of_playing_next_round": ("chance_of_playing_next_round", "float64"),
+    "selected_by_percent": ("selected_by_percent", "float64"),
+    "transfers_in_event": ("transfers_in_event", "int64"),
+    "transfers_out_event": ("transfers_out_event", "int64"),
+    "total_points": ("total_points", "int64"),
+    "event_points": ("event_points", "int64"),
+    "form": ("form", "float64"),
+    "minutes": ("minutes", "int64"),
+    "starts": ("starts", "int64"),
+    "goals_scored": ("goals_scored", "int64"),
+    "assists": ("assists", "int64"),
+    "expected_goals": ("expected_goals", "float64"),
+    "expected_assists": ("expected_assists", "float64"),
+    "penalties_order": ("penalties_order", "float64"),
+}
+
+# event/live "elements" schema: api field -> (column, dtype), stats are flattened
+LIVE_ELEMENT_SCHEMA = {
+    "id": ("fpl_id", "int64"),
+    "stats.minutes": ("minutes", "int64"),
+    "stats.goals_scored": ("goals_scored", "int64"),
+    "stats.assists": ("assists", "int64"),
+    "stats.clean_sheets": ("clean_sheets", "int64"),
+    "stats.goals_conceded": ("goals_conceded", "int64"),
+    "stats.own_goals": ("own_goals", "int64"),
+    "stats.penalties_saved": ("penalties_saved", "int64"),
+    "stats.penalties_missed": ("penalties_missed", "int64"),
+    "stats.yellow_cards": ("yellow_cards", "int64"),
+    "stats.red_cards": ("red_cards", "int64"),
+    "stats.saves": ("saves", "int64"),
+    "stats.bonus": ("bonus", "int64"),
+    "stats.bps": ("bps", "int64"),
+    "stats.influence": ("influence", "float64"),
+    "stats.creativity": ("creativity", "float64"),
+    "stats.threat": ("threat", "float64"),
+    "stats.ict_index": ("ict_index", "float64"),
+    "stats.starts": ("starts", "int64"),
+    "stats.expected_goals": ("expected_goals", "float64"),
+    "stats.expected_assists": ("expected_assists", "float64"),
+    "stats.expected_goal_involvements": ("expected_goal_involvements", "float64"),
+    "stats.expected_goals_conceded": ("expected_goals_conceded", "float64"),
+    "stats.total_points": ("total_points", "int64"),
+    "stats.in_dreamteam": ("in_dreamteam", "bool"),
+}
+
+# fill values for missing (null) fields
+FILL_VALUES = {"int64": 0, "float64": np.nan, "bool": False, "object": ""}
+
+
+def load_json(content):
+    """Parse a JSON api response body, using orjson when it is installed.
+
+    Args:
+        content (bytes): raw response body
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode_elements(elements, schema, skip=()):
+    """Decode a list of api element records into typed columns with an explicit schema.
+    Columns are pre-allocated and filled in a single pass over the records. Fields not in the schema are routed to a side table instead of widening the main table.
+
+    Args:
+        elements (list): api element records (dicts), nested "stats" dicts are flattened
+        schema (dict): api field -> (column, dtype)
+        skip (iterable): api fields to drop entirely
+
+    Returns:
+        (pandas dataframe, pandas dataframe): schema table, side table of unknown fields (fpl_id, field, value)
+    """
+    n = len(elements)
+    columns = {
+        field: np.full(n, FILL_VALUES[dtype], dtype=dtype)
+        for field, (column, dtype) in schema.items()
+    }
+    extras = []
+
+    for i, element in enumerate(elements):
+        for field, value in element.items():
+            if field in skip:
+                continue
+            if isinstance(value, dict):
+                # flatten one level of nesting, e.g. "stats"
+                for sub_field, sub_value in value.items():
+                    sub_field = field + "." + sub_field
+                    if sub_field in columns:
+                        if sub_value is not None:
+                            columns[sub_field][i] = sub_value
+                    elif sub_field not in skip:
+                        extras.append((element["id"], sub_field, sub_value))
+            elif field in columns:
+                if value is not None:
+                    columns[field][i] = value
+            else:
+                extras.append((element["id"], field, value))
+
+    table = pd.DataFrame(
+        {schema[field][0]: values for field, values in columns.items()}
+    )
+    extras = pd.DataFrame(extras, columns=["fpl_id", "field", "value"])
+    return table, extras
+
+
+def decode_bootstrap_static(content):
+    """Decode the bootstrap-static api payload player elements.
+
+    Args:
+        content (bytes): raw response body of the bootstrap-static api request
+
+    Returns:
+        (pandas dataframe, pandas dataframe): player table, side table of unknown fields
+    """
+    r = load_json(content)
+    return decode_elements(r["elements"], BOOTSTRAP_ELEMENT_SCHEMA)
+
+
+def decode_event_live(content):
+    """Decode the event/live api payload player elements.
+
+    Args:
+        content (bytes): raw response body of the event/<gw>/live api request
+
+    Returns:
+        (pandas dataframe, pandas dataframe): player stats table, side table of unknown fields
+    """
+    r = load_json(content)
+    return decode_elements(r["elements"], LIVE_ELEMENT_SCHEMA, skip=("explain",))
+
+
+def split_extra_columns(df, schema, keys=("fpl_id", "gameweek")):
+    """Move columns of a stored table that are not in the schema into a long format side table.
+
+    Args:
+        df (pandas dataframe): stored table
+        schema (dict): api field -> (column, dtype)
+        keys (tuple): key columns kept in both tables
+
+    Returns:
+        (pandas dataframe, pandas dataframe): schema table, side table of non-null extra values
+    """
+    schema_columns = [column for column, dtype in schema.values()]
+    extra_columns = [c for c in df.columns if c not in schema_columns + list(keys)]
+    extras = df[list(keys) + extra_columns].melt(
+        id_vars=list(keys), var_name="field", value_name="value"
+    )
+    extras = extras.dropna(subset="value")
+    return df.drop(columns=extra_columns), extras
@@ -1,13 +1,18 @@
 import sys
 import pandas as pd
+from fixture_calendar import update_fixture_calendar
 from get_fixture_data import get_fixture_data
 from get_player_data import get_player_data
 from player_mapping_updater import get_fpl_player_maps
 from get_fpl_player_data import get_fpl_player_data
+from build_fact_table import update_fact_table
 # odm dir
 import sys
 sys.path.append("src/models")
-from odm import odm_func
+from rating_models import update_ratings
+from odm_bootstrap import odm_bootstrap_func
+from season_simulator import season_simulator_func
+from xminutes import xminutes_func
 
 
 # read in finished gameweek from user input
@@ -15,11 +20,16 @@ GW = int(sys.argv[1])
 SEASON = sys.argv[2]
 
 # run data and model scripts
+update_fixture_calendar(SEASON)
 get_fixture_data(GW, SEASON)
-odm_func(GW + 1, SEASON)
+update_ratings(GW + 1, SEASON)
+odm_bootstrap_func(GW + 1, SEASON)
+season_simulator_func(GW + 1, SEASON)
 get_player_data(SEASON)
-get_fpl_player_maps(SEASON)
+get_fpl_player_maps(GW, SEASON)
+xminutes_func(GW + 1, SEASON)
 get_fpl_player_data(GW, SEASON)
+update_fact_table(SEASON)
 
 # update app vars
 app_vars = pd.read_csv("data/app_vars.csv")
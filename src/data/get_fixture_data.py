@@ -1,17 +1,20 @@
 from understatapi import UnderstatClient
 import pandas as pd
 import sys
+from fixture_calendar import fixture_gameweeks
 
 
 def get_fixture_data(gw, season):
     """Retrieve fixture level data from Understat
 
     Args:
-        gw (int): FPL gameweek to assign to new fixtures
+        gw (int): FPL gameweek to assign to new fixtures missing from the fixture calendar
         season (str): start year of EPL season to retrieve
     """
     # read in team to id mapping
     team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    # fixture id to gameweek lookup
+    gameweeks = fixture_gameweeks(season)
 
     with UnderstatClient() as understat:
         # retrieve all fixtures in season
@@ -37,7 +40,9 @@ def get_fixture_data(gw, season):
             new_fixture_data = pd.DataFrame(new_fixture.get_match_info(), index=[0])
 
             # add gameweek
-            new_fixture_data["gameweek"] = gw
+            new_fixture_data["gameweek"] = gameweeks.get(
+                int(new_fixture_data["id"].iloc[0]), gw
+            )
 
             # add home team id
             new_fixture_data = new_fixture_data.merge(
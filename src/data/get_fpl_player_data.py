@@ -1,7 +1,8 @@
 import pandas as pd
-import numpy as np
 import requests
 import sys
+import os
+from fpl_decoder import decode_event_live, split_extra_columns, LIVE_ELEMENT_SCHEMA
 
 
 def get_fpl_player_data(gw, season):
@@ -14,46 +15,29 @@ def get_fpl_player_data(gw, season):
     # read in existing data
     fpl_player_data = pd.read_csv("data/" + season + "/fpl_player_data.csv")
 
-    # api request FPL for updated players
-    r = requests.get("https://fantasy.premierleague.com/api/event/"+ str(gw) +"/live/").json()
-    new_fpl_player_data = pd.json_normalize(r["elements"])
-
-    #format
-    new_fpl_player_data = new_fpl_player_data.rename(columns={
-        'id': 'fpl_id',
-        'stats.minutes': 'minutes',
-        'stats.goals_scored': 'goals_scored',
-        'stats.assists': 'assists',
-        'stats.clean_sheets': 'clean_sheets',
-        'stats.goals_conceded': 'goals_conceded',
-        'stats.own_goals': 'own_goals',
-        'stats.penalties_saved': 'penalties_saved',
-        'stats.penalties_missed': 'penalties_missed',
-        'stats.yellow_cards': 'yellow_cards',
-        'stats.red_cards': 'red_cards',
-        'stats.saves': 'saves',
-        'stats.bonus': 'bonus',
-        'stats.bps': 'bps',
-        'stats.influence': 'influence',
-        'stats.creativity': 'creativity',
-        'stats.threat': 'threat',
-        'stats.ict_index': 'ict_index',
-        'stats.starts': 'starts',
-        'stats.expected_goals': 'expected_goals',
-        'stats.expected_assists': 'expected_assists',
-        'stats.expected_goal_involvements': 'expected_goal_involvements',
-        'stats.expected_goals_conceded': 'expected_goals_conceded',
-        'stats.total_points': 'total_points',
-        'stats.in_dreamteam': 'in_dreamteam'
-    })
-    new_fpl_player_data = new_fpl_player_data.drop(columns={'explain'})
-    new_fpl_player_data['gameweek'] = gw
+    # api request FPL for updated players, decode into schema and side tables
+    r = requests.get("https://fantasy.premierleague.com/api/event/" + str(gw) + "/live/")
+    new_fpl_player_data, new_extra_data = decode_event_live(r.content)
+    new_fpl_player_data["gameweek"] = gw
+    new_extra_data["gameweek"] = gw
+
+    # move any columns outside the schema in the existing file to the side table
+    fpl_player_data, old_extra_data = split_extra_columns(
+        fpl_player_data, LIVE_ELEMENT_SCHEMA
+    )
+    extra_path = "data/" + season + "/fpl_player_data_extra.csv"
+    if os.path.exists(extra_path):
+        old_extra_data = pd.concat(
+            [pd.read_csv(extra_path), old_extra_data], ignore_index=True
+        )
+    extra_data = pd.concat([old_extra_data, new_extra_data], ignore_index=True)
 
     # add new data to existing file
     fpl_player_data = pd.concat([fpl_player_data, new_fpl_player_data], ignore_index=True)
 
     # write updates
     fpl_player_data.to_csv("data/" + season + "/fpl_player_data.csv", index=False)
+    extra_data[["fpl_id", "gameweek", "field", "value"]].to_csv(extra_path, index=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,353 @@
+import pandas as pd
+import numpy as np
+import requests
+import threading
+import time
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fpl_decoder import load_json
+
+FPL_API = "https://fantasy.premierleague.com/api/"
+# standings page size of the api
+STANDINGS_PAGE_SIZE = 50
+# squad size, picks are stored as (entry, 15) int16 fpl ids
+SQUAD_SIZE = 15
+# entries fetched between checkpoint writes
+CHECKPOINT_EVERY = 500
+
+
+def rate_limiter(rate):
+    """Rate limit shared by all fetching threads.
+
+    Args:
+        rate (float): maximum requests per second
+
+    Returns:
+        function: blocks until the next request is allowed
+    """
+    lock = threading.Lock()
+    next_time = [time.monotonic()]
+
+    def wait():
+        with lock:
+            now = time.monotonic()
+            start = max(now, next_time[0])
+            next_time[0] = start + 1 / rate
+        time.sleep(max(start - now, 0))
+
+    return wait
+
+
+def fetch_json(session, url, wait, retries=4, backoff=1.0):
+    """Request an api url under the rate limit, retrying failed and throttled requests with exponential backoff.
+
+    Args:
+        session (requests session): http session
+        url (str): api url
+        wait (function): rate limit, from rate_limiter
+        retries (int): retries after the first request
+        backoff (float): seconds before the first retry, doubled on each retry
+
+    Returns:
+        dict: parsed response, or None if the resource does not exist or all retries fail
+    """
+    for attempt in range(retries + 1):
+        wait()
+        try:
+            r = session.get(url, timeout=30)
+            if r.status_code == 404:
+                return None
+            if r.status_code != 429 and r.status_code < 500:
+                r.raise_for_status()
+                return load_json(r.content)
+        except (requests.RequestException, ValueError):
+            pass
+        if attempt < retries:
+            time.sleep(backoff * 2**attempt)
+    return None
+
+
+def league_entries(session, wait, league_id, max_entries, base_url=FPL_API, workers=8):
+    """Retrieve entry ids of a classic league, in rank order, fetching standings pages concurrently.
+
+    Args:
+        session (requests session): http session
+        wait (function): rate limit, from rate_limiter
+        league_id (int): FPL classic league id (314 for the overall league)
+        max_entries (int): maximum number of entries, from the top of the league
+        base_url (str): api base url
+        workers (int): concurrent requests
+
+    Returns:
+        numpy array: entry ids
+    """
+    pages = range(1, -(-max_entries // STANDINGS_PAGE_SIZE) + 1)
+    urls = [
+        base_url
+        + "leagues-classic/"
+        + str(league_id)
+        + "/standings/?page_standings="
+        + str(page)
+        for page in pages
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        standings = list(executor.map(lambda url: fetch_json(session, url, wait), urls))
+
+    entries = []
+    for page in standings:
+        if page is None or len(page["standings"]["results"]) == 0:
+            break
+        entries += [result["entry"] for result in page["standings"]["results"]]
+    return np.array(entries[:max_entries], dtype="int64")
+
+
+def decode_picks(content):
+    """Decode the picks of an entry into squad fpl ids and multipliers, in squad order.
+
+    Args:
+        content (dict): parsed entry/<id>/event/<gw>/picks api response
+
+    Returns:
+        (numpy array, numpy array, str): fpl ids (int16), multipliers (int8, 0 for bench), active chip
+    """
+    picks = np.zeros(SQUAD_SIZE, dtype="int16")
+    multipliers = np.zeros(SQUAD_SIZE, dtype="int8")
+    for i, pick in enumerate(content["picks"][:SQUAD_SIZE]):
+        picks[i] = pick["element"]
+        multipliers[i] = pick["multiplier"]
+    return picks, multipliers, content.get("active_chip") or ""
+
+
+def picks_path(season, league_id, gw):
+    """Path of the picks checkpoint of a league and gameweek.
+
+    Args:
+        season (str): start year of EPL season
+        league_id (int): FPL classic league id
+        gw (int): FPL gameweek
+
+    Returns:
+        str: checkpoint path
+    """
+    return (
+        "data/"
+        + season
+        + "/league_picks/league_"
+        + str(league_id)
+        + "_gw_"
+        + str(gw)
+        + ".npz"
+    )
+
+
+def load_picks(path):
+    """Read a picks checkpoint.
+
+    Args:
+        path (str): checkpoint path
+
+    Returns:
+        (numpy array, numpy array, numpy array, numpy array): entry ids, picks (entry, 15), multipliers (entry, 15), active chips
+    """
+    if not os.path.exists(path):
+        return (
+            np.zeros(0, dtype="int64"),
+            np.zeros((0, SQUAD_SIZE), dtype="int16"),
+            np.zeros((0, SQUAD_SIZE), dtype="int8"),
+            np.zeros(0, dtype="<U14"),
+        )
+    with np.load(path) as checkpoint:
+        return (
+            checkpoint["entry_id"],
+            checkpoint["picks"],
+            checkpoint["multipliers"],
+            checkpoint["active_chip"],
+        )
+
+
+def save_picks(path, entry_ids, picks, multipliers, active_chips):
+    """Write a picks checkpoint, replacing the file only once it is fully written.
+
+    Args:
+        path (str): checkpoint path
+        entry_ids (numpy array): entry ids
+        picks (numpy array): fpl ids of each entry, shape (entry, 15)
+        multipliers (numpy array): multipliers of each entry, shape (entry, 15)
+        active_chips (numpy array): active chip of each entry
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path[: -len(".npz")] + "_tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        entry_id=entry_ids,
+        picks=picks,
+        multipliers=multipliers,
+        active_chip=active_chips,
+    )
+    os.replace(tmp_path, path)
+
+
+def fetch_picks(session, wait, entry_ids, gw, path, base_url=FPL_API, workers=16):
+    """Retrieve the picks of entries concurrently, resuming from and checkpointing to a picks file.
+
+    Args:
+        session (requests session): http session
+        wait (function): rate limit, from rate_limiter
+        entry_ids (numpy array): entry ids
+        gw (int): FPL gameweek
+        path (str): picks checkpoint path
+        base_url (str): api base url
+        workers (int): concurrent requests
+
+    Returns:
+        (numpy array, numpy array, numpy array, numpy array): entry ids, picks (entry, 15), multipliers (entry, 15), active chips of fetched entries
+    """
+    done_ids, done_picks, done_multipliers, done_chips = load_picks(path)
+    todo = entry_ids[~np.isin(entry_ids, done_ids)]
+    new_ids, new_picks, new_multipliers, new_chips = [], [], [], []
+
+    def checkpoint():
+        return (
+            np.concatenate([done_ids, np.array(new_ids, dtype="int64")]),
+            np.concatenate(
+                [done_picks, np.array(new_picks, dtype="int16").reshape(-1, SQUAD_SIZE)]
+            ),
+            np.concatenate(
+                [
+                    done_multipliers,
+                    np.array(new_multipliers, dtype="int8").reshape(-1, SQUAD_SIZE),
+                ]
+            ),
+            np.concatenate([done_chips, np.array(new_chips, dtype="<U14")]),
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                fetch_json,
+                session,
+                base_url + "entry/" + str(entry_id) + "/event/" + str(gw) + "/picks/",
+                wait,
+            ): entry_id
+            for entry_id in todo
+        }
+        for i, future in enumerate(as_completed(futures)):
+            content = future.result()
+            # entries without picks (joined later, or failed) are fetched on the next run
+            if content is not None:
+                picks, multipliers, chip = decode_picks(content)
+                new_ids.append(futures[future])
+                new_picks.append(picks)
+                new_multipliers.append(multipliers)
+                new_chips.append(chip)
+            if (i + 1) % CHECKPOINT_EVERY == 0:
+                save_picks(path, *checkpoint())
+
+    fetched = checkpoint()
+    save_picks(path, *fetched)
+    return fetched
+
+
+def ownership(picks, multipliers, n_players):
+    """Ownership, captaincy and effective ownership of each player over a set of entries.
+
+    Args:
+        picks (numpy array): fpl ids of each entry, shape (entry, 15)
+        multipliers (numpy array): multipliers of each entry, shape (entry, 15), 0 for bench, 2 captain, 3 triple captain
+        n_players (int): largest fpl id
+
+    Returns:
+        pandas dataframe: fpl_id, ownership, starting, captaincy and eo (effective ownership) as % of entries
+    """
+    n_entries = max(len(picks), 1)
+    flat_picks = picks.ravel().astype("int64")
+    flat_multipliers = multipliers.ravel().astype("int64")
+    counts = {
+        "ownership": np.bincount(flat_picks, minlength=n_players + 1),
+        "starting": np.bincount(
+            flat_picks, weights=flat_multipliers > 0, minlength=n_players + 1
+        ),
+        "captaincy": np.bincount(
+            flat_picks, weights=flat_multipliers > 1, minlength=n_players + 1
+        ),
+        "eo": np.bincount(
+            flat_picks, weights=flat_multipliers, minlength=n_players + 1
+        ),
+    }
+    table = pd.DataFrame(
+        {column: count / n_entries * 100 for column, count in counts.items()}
+    )
+    table.insert(0, "fpl_id", np.arange(n_players + 1))
+    return table[(table["fpl_id"] > 0) & (table["ownership"] > 0)]
+
+
+def get_league_data(
+    gw,
+    season,
+    league_id,
+    max_entries=10000,
+    rate=20,
+    workers=16,
+    base_url=FPL_API,
+):
+    """Retrieve the picks of the top entries of a classic league from FPL, and update the league ownership data.
+
+    Args:
+        gw (int): FPL gameweek
+        season (str): start year of EPL season
+        league_id (int): FPL classic league id (314 for the overall league)
+        max_entries (int): maximum number of entries, from the top of the league
+        rate (float): maximum requests per second
+        workers (int): concurrent requests
+        base_url (str): api base url
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=workers, pool_maxsize=workers
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    wait = rate_limiter(rate)
+
+    # league entries, then picks of each entry
+    entry_ids = league_entries(session, wait, league_id, max_entries, base_url, workers)
+    fetched_ids, picks, multipliers, _ = fetch_picks(
+        session,
+        wait,
+        entry_ids,
+        gw,
+        picks_path(season, league_id, gw),
+        base_url,
+        workers,
+    )
+
+    # ownership of current league entries, replacing any earlier rows of the league and gameweek
+    league = np.isin(fetched_ids, entry_ids)
+    league_ownership = ownership(
+        picks[league], multipliers[league], max(picks.max(initial=0), 1)
+    )
+    league_ownership.insert(0, "gameweek", gw)
+    league_ownership.insert(0, "league_id", league_id)
+    league_ownership["entries"] = league.sum()
+    ownership_path = "data/" + season + "/league_ownership.csv"
+    if os.path.exists(ownership_path):
+        old_ownership = pd.read_csv(ownership_path)
+        old_ownership = old_ownership[
+            (old_ownership["league_id"] != league_id)
+            | (old_ownership["gameweek"] != gw)
+        ]
+        league_ownership = pd.concat(
+            [old_ownership, league_ownership], ignore_index=True
+        )
+    league_ownership.to_csv(ownership_path, index=False)
+
+
+if __name__ == "__main__":
+    # gameweek, season, league id and optional maximum number of entries
+    get_league_data(
+        int(sys.argv[1]),
+        sys.argv[2],
+        int(sys.argv[3]),
+        *[int(arg) for arg in sys.argv[4:5]],
+    )
@@ -2,6 +2,8 @@ from understatapi import UnderstatClient
 import pandas as pd
 import numpy as np
 import sys
+from shot_data import shots_frame, add_penalty_columns, write_shot_partitions
+from on_pitch_xg import on_pitch_team_xg
 
 
 def get_player_data(season):
@@ -14,6 +16,8 @@ def get_player_data(season):
     fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
     player_data = pd.read_csv("data/" + season + "/player_data.csv")
     team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    # fixture id to gameweek lookup
+    gameweeks = dict(zip(fixture_data["fixture_id"], fixture_data["gameweek"]))
 
     # get ids of resulted fixtures
     fixture_resulted_ids = fixture_data["fixture_id"].to_list()
@@ -25,6 +29,7 @@ def get_player_data(season):
     )
 
     # iterate through matches not yet recorded
+    new_shots = []
     for new_fixture in new_fixture_ids:
         with UnderstatClient() as understat:
             curr_match = understat.match(match=str(new_fixture))
@@ -38,31 +43,18 @@ def get_player_data(season):
         away_players = pd.json_normalize([{**v} for k, v in roster_data["a"].items()])
         new_player_data = pd.concat([home_players, away_players])
 
-        # setup penalties dataframe
-        home_shots = pd.DataFrame(shot_data["h"])
-        away_shots = pd.DataFrame(shot_data["a"])
-        shots = pd.concat([home_shots, away_shots])
-        penalties = shots[shots["situation"] == "Penalty"].reset_index()
-        penalty_xG = float(penalties["xG"].max())
-        if penalties.empty:
-            penalty_xG = 0.0
-        penalties["penalty_attempt"] = 1
-        penalties["penalty_scored"] = np.where(penalties["result"] == "Goal", 1, 0)
-        penalties = penalties[
-            ["player_id", "match_id", "penalty_attempt", "penalty_scored"]
-        ].rename(columns={"match_id": "fixture_id"})
-        penalties = penalties.astype("int64")
-        penalties = penalties.groupby(
-            by=["player_id", "fixture_id"], as_index=False
-        ).sum()
+        # setup shots dataframe
+        shots = shots_frame(
+            shot_data,
+            fixture_data[fixture_data["fixture_id"] == int(new_fixture)].iloc[0],
+        )
+        new_shots.append(shots)
 
         # add fixture id feature
         new_player_data["fixture_id"] = int(new_fixture)
 
         # add gameweek feature
-        new_player_data = new_player_data.merge(
-            fixture_data[["fixture_id", "gameweek"]], on="fixture_id"
-        )
+        new_player_data["gameweek"] = gameweeks[int(new_fixture)]
 
         # consolidate team id
         new_player_data.rename(columns={"team_id": "understat_team_id"}, inplace=True)
@@ -95,19 +87,10 @@ def get_player_data(season):
         new_player_data["xGI"] = new_player_data["xG"] + new_player_data["xA"]
 
         # add pen data, calculate non pen xg and xgi
-        new_player_data = new_player_data.merge(
-            penalties, how="left", on=["fixture_id", "player_id"]
-        )
-        new_player_data["penalty_attempt"] = (
-            new_player_data["penalty_attempt"].fillna(0).astype("int64")
-        )
-        new_player_data["penalty_scored"] = (
-            new_player_data["penalty_scored"].fillna(0).astype("int64")
-        )
-        new_player_data["npxG"] = (
-            new_player_data["xG"] - new_player_data["penalty_attempt"] * penalty_xG
-        )
-        new_player_data["npxGI"] = new_player_data["npxG"] + new_player_data["xA"]
+        new_player_data = add_penalty_columns(new_player_data, shots)
+
+        # add on pitch team xg
+        new_player_data["team_xG_on"] = on_pitch_team_xg(new_player_data, shots)
 
         # add new player data to database
         player_data = pd.concat([player_data, new_player_data], ignore_index=True)
@@ -117,6 +100,8 @@ def get_player_data(season):
 
     # write updates
     player_data.to_csv("data/" + season + "/player_data.csv", index=False)
+    if len(new_shots) > 0:
+        write_shot_partitions(pd.concat(new_shots), season)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from understatapi import UnderstatClient
 import pandas as pd
 import numpy as np
 import sys
+from fixture_calendar import get_fpl_fixtures, assign_gameweeks
 
 
 def get_season_data(season):
@@ -57,8 +58,14 @@ def get_season_data(season):
     fixtures.drop(columns={"team"}, inplace=True)
     fixtures.rename(columns={"team_id": "a_id"}, inplace=True)
 
-    # add gameweek number
-    fixtures["gameweek"] = np.repeat(np.arange(1, 39), 10)
+    # add gameweek number from FPL fixture calendar
+    fpl_fixtures = get_fpl_fixtures(season)
+    if fpl_fixtures is not None:
+        fixtures["gameweek"] = assign_gameweeks(fixtures, fpl_fixtures)
+    else:
+        print("WARNING no FPL fixture calendar available, gameweeks assigned by date")
+        fixtures = fixtures.sort_values("datetime")
+        fixtures["gameweek"] = np.repeat(np.arange(1, 39), 10)
 
     # save file
     fixtures.to_csv("data/" + season + "/season_data.csv", index=False)
@@ -0,0 +1,116 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# minute after the end of any match, players not substituted or sent off are on until then
+FULL_TIME = 999
+
+
+def on_pitch_minutes(player_data):
+    """Minutes each player came on and went off in each fixture, from minutes played and substitutions.
+    Starters come on at 0, substitutes when the player they replaced (roster_out) went off, or at 90 less their minutes if that player is not found.
+    Players substituted off (roster_in set) or sent off (red card) go off after their minutes, substitutes included.
+
+    Args:
+        player_data (pandas dataframe): Understat player (per fixture) data
+
+    Returns:
+        (numpy array, numpy array): (row,) minute on, (row,) minute off
+    """
+    time = player_data["time"].to_numpy(dtype="int64")
+    sub = (player_data["position"] == "Sub").to_numpy()
+    subbed_off = (player_data["roster_in"].astype("int64") != 0).to_numpy()
+    sent_off = (player_data["red_card"].astype("int64") > 0).to_numpy()
+    # row of the player each substitute replaced, -1 if none
+    replaced = pd.Index(player_data["id"]).get_indexer(player_data["roster_out"])
+    replaced = np.where(sub, replaced, -1)
+    on = np.where(sub, np.maximum(90 - time, 0), 0)
+    off = np.where(subbed_off | sent_off, on + time, FULL_TIME)
+    # substitutes replacing substitutes need the replaced entry first, repeat until settled
+    has_replaced = replaced >= 0
+    while True:
+        replaced_off = off[np.where(has_replaced, replaced, 0)]
+        new_on = np.where(has_replaced & (replaced_off < FULL_TIME), replaced_off, on)
+        if np.array_equal(new_on, on):
+            return on, off
+        on = new_on
+        off = np.where(subbed_off | sent_off, on + time, FULL_TIME)
+
+
+def on_pitch_team_xg(player_data, shots):
+    """Team xG while each player was on the pitch in each fixture, by interval overlap with shot minutes.
+    Fixtures without shot data fall back to team xG prorated by minutes played, so the column is only minute accurate for fixtures in the shot partitions (see shot_data.backfill_shot_data).
+
+    Args:
+        player_data (pandas dataframe): Understat player (per fixture) data
+        shots (pandas dataframe): shot level data with fixture_id, team_id, minute and xG
+
+    Returns:
+        numpy array: (row,) on pitch team xG
+    """
+    on, off = on_pitch_minutes(player_data)
+
+    # shots sorted by team fixture and minute, with cumulative xG
+    shot_key = shots["fixture_id"].to_numpy() * 100 + shots["team_id"].to_numpy()
+    shot_value = shot_key * (FULL_TIME + 1) + shots["minute"].to_numpy()
+    order = np.argsort(shot_value, kind="stable")
+    shot_value = shot_value[order]
+    xg_cumsum = np.concatenate([[0], np.cumsum(shots["xG"].to_numpy()[order])])
+
+    # shots in [on, off) of each player's team fixture
+    player_key = (
+        player_data["fixture_id"].to_numpy() * 100 + player_data["team_id"].to_numpy()
+    )
+    start = np.searchsorted(shot_value, player_key * (FULL_TIME + 1) + on)
+    end = np.searchsorted(shot_value, player_key * (FULL_TIME + 1) + off)
+    team_xg_on = xg_cumsum[end] - xg_cumsum[start]
+
+    has_shots = player_data["fixture_id"].isin(shots["fixture_id"]).to_numpy()
+    prorated = (
+        player_data["team_xG"].to_numpy()
+        * np.minimum(player_data["time"].to_numpy(dtype="int64"), 90)
+        / 90
+    )
+    return np.where(has_shots, team_xg_on, prorated)
+
+
+def load_season_shots(season):
+    """Read all stored shot level data of a season.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        pandas dataframe: fixture_id, team_id, minute, xG per shot
+    """
+    columns = ["fixture_id", "team_id", "minute", "xG"]
+    shot_dir = "data/" + season + "/shots"
+    if not os.path.isdir(shot_dir):
+        return pd.DataFrame({column: [] for column in columns})
+    return pd.concat(
+        [
+            pd.read_csv(shot_dir + "/" + partition, usecols=columns)
+            for partition in sorted(os.listdir(shot_dir))
+        ],
+        ignore_index=True,
+    )
+
+
+def update_on_pitch_xg(season):
+    """Recalculate on pitch team xG of all player data from stored shot data.
+    Run after shot_data.backfill_shot_data, fixtures without stored shots keep the prorated fallback.
+
+    Args:
+        season (str): start year of EPL season
+    """
+    # round trip floats, so only the on pitch team xG column changes
+    player_data = pd.read_csv(
+        "data/" + season + "/player_data.csv", float_precision="round_trip"
+    )
+    player_data["team_xG_on"] = on_pitch_team_xg(player_data, load_season_shots(season))
+    player_data.to_csv("data/" + season + "/player_data.csv", index=False)
+
+
+if __name__ == "__main__":
+    update_on_pitch_xg(sys.argv[1])
@@ -0,0 +1,286 @@
+import pandas as pd
+import numpy as np
+import unicodedata
+import sys
+import os
+
+# Understat position to FPL element type, substitute appearances carry no position
+POSITION_TYPES = {
+    "GK": 1,
+    "DC": 2,
+    "DR": 2,
+    "DL": 2,
+    "DMC": 3,
+    "DMR": 3,
+    "DML": 3,
+    "MC": 3,
+    "MR": 3,
+    "ML": 3,
+    "AMC": 3,
+    "AMR": 3,
+    "AML": 3,
+    "FW": 4,
+    "FWR": 4,
+    "FWL": 4,
+}
+
+# score weights for name similarity, minutes agreement and xG agreement
+SCORE_WEIGHTS = (0.6, 0.25, 0.15)
+# minimum score and margin over the next best candidate to link automatically
+AUTO_LINK_SCORE = 0.85
+AUTO_LINK_MARGIN = 0.1
+# minimum score and name similarity to queue a candidate for review
+REVIEW_SCORE = 0.4
+REVIEW_NAME_SCORE = 0.3
+
+
+def fold_names(names):
+    """Accent fold, lowercase and strip punctuation from player names.
+
+    Args:
+        names (iterable): player names
+
+    Returns:
+        list: folded names
+    """
+    folded = []
+    for name in names:
+        name = unicodedata.normalize("NFKD", str(name))
+        name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+        name = "".join(c if c.isalpha() else " " for c in name)
+        folded.append(" ".join(name.split()))
+    return folded
+
+
+def ngram_vectors(names, vocab, n=3):
+    """L2 normalized binary character ngram vectors of names, with each word padded by spaces.
+
+    Args:
+        names (list): folded player names
+        vocab (dict): ngram -> column index
+        n (int): ngram length
+
+    Returns:
+        numpy array: (name, ngram) vectors
+    """
+    vectors = np.zeros((len(names), len(vocab)))
+    for i, name in enumerate(names):
+        for word in name.split():
+            word = " " + word + " "
+            for j in range(len(word) - n + 1):
+                vectors[i, vocab[word[j : j + n]]] = 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def ngram_vocab(names, n=3):
+    """Character ngram vocabulary over folded player names.
+
+    Args:
+        names (list): folded player names
+        n (int): ngram length
+
+    Returns:
+        dict: ngram -> column index
+    """
+    vocab = {}
+    for name in names:
+        for word in name.split():
+            word = " " + word + " "
+            for j in range(len(word) - n + 1):
+                vocab.setdefault(word[j : j + n], len(vocab))
+    return vocab
+
+
+def understat_players(player_data):
+    """Aggregate Understat appearances to one row per player with team, position and season totals.
+
+    Args:
+        player_data (pandas dataframe): Understat player (per fixture) data
+
+    Returns:
+        pandas dataframe: player_id, player, team_id, element_type, minutes, xG
+    """
+    player_data = player_data.sort_values("gameweek")
+    player_data["element_type"] = player_data["position"].map(POSITION_TYPES)
+    players = player_data.groupby("player_id", as_index=False).agg(
+        player=("player", "last"),
+        team_id=("team_id", "last"),
+        minutes=("time", "sum"),
+        xG=("xG", "sum"),
+    )
+    # most common starting position, 0 if the player has only appeared as a substitute
+    positions = (
+        player_data.dropna(subset="element_type")
+        .groupby("player_id")["element_type"]
+        .agg(lambda x: x.mode().iloc[0])
+    )
+    players["element_type"] = (
+        players["player_id"].map(positions).fillna(0).astype("int64")
+    )
+    return players
+
+
+def resolve_player_mappings(fpl_players, us_players):
+    """Propose Understat to FPL player matches for unmapped players.
+    Candidates are blocked by team and position, then scored by accent folded character ngram similarity of names with minutes and xG agreement.
+
+    Args:
+        fpl_players (pandas dataframe): unmapped FPL players: fpl_id, fpl_name, web_name, team_id, element_type, minutes, expected_goals
+        us_players (pandas dataframe): unmapped Understat players, from understat_players
+
+    Returns:
+        (pandas dataframe, pandas dataframe): high confidence links, candidates queued for review
+    """
+    columns = [
+        "fpl_id",
+        "web_name",
+        "fpl_name",
+        "player_id",
+        "player",
+        "score",
+        "name_score",
+        "minutes_score",
+        "xg_score",
+    ]
+    # managers have no Understat data
+    fpl_players = fpl_players[fpl_players["element_type"] <= 4]
+    if fpl_players.empty or us_players.empty:
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=columns)
+
+    # shared ngram index over all names
+    us_names = fold_names(us_players["player"])
+    fpl_names = fold_names(fpl_players["fpl_name"])
+    web_names = fold_names(fpl_players["web_name"])
+    vocab = ngram_vocab(us_names + fpl_names + web_names)
+    us_vectors = ngram_vectors(us_names, vocab)
+    fpl_vectors = ngram_vectors(fpl_names, vocab)
+    web_vectors = ngram_vectors(web_names, vocab)
+
+    us_team = us_players["team_id"].to_numpy()
+    us_type = us_players["element_type"].to_numpy()
+    us_minutes = us_players["minutes"].to_numpy(dtype="float64")
+    us_xg = us_players["xG"].to_numpy(dtype="float64")
+    fpl_team = fpl_players["team_id"].to_numpy()
+    fpl_type = fpl_players["element_type"].to_numpy()
+    fpl_minutes = fpl_players["minutes"].to_numpy(dtype="float64")
+    fpl_xg = fpl_players["expected_goals"].to_numpy(dtype="float64")
+
+    candidates = []
+    for team_id in np.intersect1d(us_team, fpl_team):
+        u = np.flatnonzero(us_team == team_id)
+        f = np.flatnonzero(fpl_team == team_id)
+
+        # position block: goalkeepers only match goalkeepers, outfield players match same or adjacent position
+        u_type = us_type[u][:, None]
+        f_type = fpl_type[f][None, :]
+        block = np.where(
+            (u_type == 1) | (f_type == 1),
+            u_type == f_type,
+            np.abs(u_type - f_type) <= 1,
+        )
+        block |= u_type == 0
+
+        # name similarity against full and web names
+        name_score = np.maximum(
+            us_vectors[u] @ fpl_vectors[f].T, us_vectors[u] @ web_vectors[f].T
+        )
+        # minutes and xG agreement
+        u_minutes = us_minutes[u][:, None]
+        minutes_score = 1 - np.abs(u_minutes - fpl_minutes[f]) / np.maximum(
+            np.maximum(u_minutes, fpl_minutes[f]), 90
+        )
+        u_xg = us_xg[u][:, None]
+        xg_score = 1 - np.abs(u_xg - fpl_xg[f]) / np.maximum(
+            np.maximum(u_xg, fpl_xg[f]), 0.5
+        )
+        # missing stats are neutral
+        minutes_score = np.nan_to_num(minutes_score, nan=0.5)
+        xg_score = np.nan_to_num(xg_score, nan=0.5)
+        score = (
+            SCORE_WEIGHTS[0] * name_score
+            + SCORE_WEIGHTS[1] * minutes_score
+            + SCORE_WEIGHTS[2] * xg_score
+        )
+        score = np.where(block, score, 0.0)
+
+        # margin of each pair over the next best candidate for either player
+        u_second = np.sort(score, axis=1)[:, -2] if len(f) > 1 else np.zeros(len(u))
+        f_second = np.sort(score, axis=0)[-2, :] if len(u) > 1 else np.zeros(len(f))
+        mutual_best = (score == score.max(axis=1, keepdims=True)) & (
+            score == score.max(axis=0, keepdims=True)
+        )
+        margin = score - np.maximum(u_second[:, None], f_second[None, :])
+
+        rows, cols = np.nonzero(
+            (score >= REVIEW_SCORE) & (name_score >= REVIEW_NAME_SCORE)
+        )
+        for i, j in zip(rows, cols):
+            candidates.append(
+                (
+                    f[j],
+                    u[i],
+                    score[i, j],
+                    name_score[i, j],
+                    minutes_score[i, j],
+                    xg_score[i, j],
+                    mutual_best[i, j]
+                    and score[i, j] >= AUTO_LINK_SCORE
+                    and margin[i, j] >= AUTO_LINK_MARGIN,
+                )
+            )
+
+    candidates = pd.DataFrame(
+        candidates,
+        columns=[
+            "fpl_index",
+            "us_index",
+            "score",
+            "name_score",
+            "minutes_score",
+            "xg_score",
+            "auto_link",
+        ],
+    ).astype({"auto_link": bool})
+    fpl_info = fpl_players[["fpl_id", "web_name", "fpl_name"]].iloc[
+        candidates["fpl_index"]
+    ]
+    us_info = us_players[["player_id", "player"]].iloc[candidates["us_index"]]
+    candidates = pd.concat(
+        [
+            fpl_info.reset_index(drop=True),
+            us_info.reset_index(drop=True),
+            candidates.drop(columns=["fpl_index", "us_index"]),
+        ],
+        axis=1,
+    ).sort_values("score", ascending=False)
+
+    links = candidates[candidates["auto_link"]][columns]
+    # players with an automatic link are not queued for review
+    review = candidates[
+        ~candidates["auto_link"]
+        & ~candidates["fpl_id"].isin(links["fpl_id"])
+        & ~candidates["player_id"].isin(links["player_id"])
+    ][columns]
+    return links, review
+
+
+if __name__ == "__main__":
+    # propose matches for the unmapped players of a season without api requests
+    season = sys.argv[1]
+    player_mapping = pd.read_csv("data/" + season + "/player_mapping.csv")
+    player_data = pd.read_csv("data/" + season + "/player_data.csv")
+    us_players = understat_players(player_data)
+    us_players = us_players[~us_players["player_id"].isin(player_mapping["player_id"])]
+    # season totals from FPL gameweek data, if recorded
+    fpl_players = player_mapping[player_mapping["player_id"].isna()]
+    if os.path.exists("data/" + season + "/fpl_player_data.csv"):
+        fpl_player_data = pd.read_csv("data/" + season + "/fpl_player_data.csv")
+        fpl_totals = fpl_player_data.groupby("fpl_id", as_index=False)[
+            ["minutes", "expected_goals"]
+        ].sum()
+        fpl_players = fpl_players.merge(fpl_totals, how="left", on="fpl_id")
+    else:
+        fpl_players = fpl_players.assign(minutes=np.nan, expected_goals=np.nan)
+    links, review = resolve_player_mappings(fpl_players, us_players)
+    print(pd.concat([links, review]).to_string(index=False))
@@ -1,21 +1,44 @@
 import pandas as pd
-import numpy as np
 import requests
 import sys
+import os
+from fpl_decoder import decode_bootstrap_static
+from player_mapping_resolver import understat_players, resolve_player_mappings
+from bootstrap_snapshots import record_snapshot
 
+# position labels by FPL element type
+POSITIONS = {1: "(G)", 2: "(D)", 3: "(M)", 4: "(F)"}
 
-def get_fpl_player_maps(season):
+
+def get_fpl_player_maps(gw, season):
     """Retrieve player informational data from fantasy premier league and update player mapping file, via API request to Fantasy Premier League.
+    Bootstrap fields outside the schema are kept in the FPL player data side table, as "bootstrap." fields of the gameweek.
 
     Args:
+        gw (int): FPL gameweek to assign to side table data
         season (str): start year of EPL season
     """
     # read in existing data
     player_mapping = pd.read_csv("data/" + season + "/player_mapping.csv")
 
     # api request FPL for updated players
-    r = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/").json()
-    fpl_player_data = pd.json_normalize(r["elements"])
+    r = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/")
+    fpl_player_data, extra_data = decode_bootstrap_static(r.content)
+    # keep price, status and transfer history in the snapshot store
+    record_snapshot(season, fpl_player_data)
+
+    # keep fields outside the schema in the side table, replacing any of a rerun gameweek
+    extra_data["field"] = "bootstrap." + extra_data["field"]
+    extra_data["gameweek"] = gw
+    extra_path = "data/" + season + "/fpl_player_data_extra.csv"
+    if os.path.exists(extra_path):
+        old_extra_data = pd.read_csv(extra_path)
+        old_extra_data = old_extra_data[
+            (old_extra_data["gameweek"] != gw)
+            | ~old_extra_data["field"].str.startswith("bootstrap.")
+        ]
+        extra_data = pd.concat([old_extra_data, extra_data], ignore_index=True)
+    extra_data[["fpl_id", "gameweek", "field", "value"]].to_csv(extra_path, index=False)
 
     # filter out unavailable
     fpl_player_data = fpl_player_data[fpl_player_data["status"] != "u"]
@@ -25,17 +48,8 @@ def get_fpl_player_maps(season):
         fpl_player_data["first_name"] + " " + fpl_player_data["second_name"]
     )
     fpl_player_data["now_cost"] = fpl_player_data["now_cost"] / 10
-    fpl_player_data["pos"] = np.select(
-        condlist=[
-            fpl_player_data["element_type"] == 1,
-            fpl_player_data["element_type"] == 2,
-            fpl_player_data["element_type"] == 3,
-            fpl_player_data["element_type"] == 4,
-        ],
-        choicelist=["(G)", "(D)", "(M)", "(F)"],
-    )
+    fpl_player_data["pos"] = fpl_player_data["element_type"].map(POSITIONS).fillna("0")
     fpl_player_data["team_id"] = fpl_player_data["team"] - 1
-    fpl_player_data = fpl_player_data.rename(columns={"id": "fpl_id"})
     fpl_player_data = fpl_player_data[
         [
             "fpl_id",
@@ -45,8 +59,11 @@ def get_fpl_player_maps(season):
             "now_cost",
             "pos",
             "status",
+            "chance_of_playing_next_round",
             "team_id",
             "total_points",
+            "minutes",
+            "expected_goals",
         ]
     ]
 
@@ -68,26 +85,56 @@ def get_fpl_player_maps(season):
             "now_cost",
             "penalties_order",
             "status",
+            "chance_of_playing_next_round",
             "team_id",
             "total_points",
+            "minutes",
+            "expected_goals",
         ]
     ]
 
+    # propose mappings for unmapped players from Understat player data
+    player_data = pd.read_csv("data/" + season + "/player_data.csv")
+    us_players = understat_players(player_data)
+    us_players = us_players[~us_players["player_id"].isin(player_mapping["player_id"])]
+    links, review = resolve_player_mappings(
+        fpl_player_data[fpl_player_data["player_id"].isna()], us_players
+    )
+    # write high confidence links, queue the rest for review
+    link_ids = dict(zip(links["fpl_id"], links["player_id"]))
+    link_names = dict(zip(links["fpl_id"], links["player"]))
+    linked = fpl_player_data["player_id"].isna() & fpl_player_data["fpl_id"].isin(
+        links["fpl_id"]
+    )
+    fpl_player_data.loc[linked, "player_id"] = fpl_player_data.loc[
+        linked, "fpl_id"
+    ].map(link_ids)
+    fpl_player_data.loc[linked, "player"] = fpl_player_data.loc[
+        linked, "fpl_id"
+    ].map(link_names)
+    review.to_csv("data/" + season + "/player_mapping_review.csv", index=False)
+    if len(links) > 0:
+        print("Mappings added for: ")
+        for player in links["web_name"]:
+            print(player)
+
     # players without mapping warning
     no_mapping = fpl_player_data[
         (fpl_player_data["player_id"].isna()) & (fpl_player_data["total_points"] > 0)
     ]["web_name"].to_list()
     if len(no_mapping) > 0:
-        print("WARNING no mapping exists for: ")
+        print("WARNING no mapping exists for (see player_mapping_review.csv): ")
         for player in no_mapping:
             print(player)
 
-    # remove total points
-    fpl_player_data = fpl_player_data.drop(columns="total_points")
+    # remove total points and season stats
+    fpl_player_data = fpl_player_data.drop(
+        columns=["total_points", "minutes", "expected_goals"]
+    )
 
     # write updates
     fpl_player_data.to_csv("data/" + season + "/player_mapping.csv", index=False)
 
 
 if __name__ == "__main__":
-    get_fpl_player_maps(sys.argv[1])
+    get_fpl_player_maps(int(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,195 @@
+from understatapi import UnderstatClient
+import pandas as pd
+import numpy as np
+import os
+import sys
+from on_pitch_xg import on_pitch_team_xg
+from build_fact_table import update_fact_table
+
+# shot level columns kept from Understat shot payloads
+SHOT_COLUMNS = [
+    "shot_id",
+    "fixture_id",
+    "gameweek",
+    "minute",
+    "player_id",
+    "team_id",
+    "h_a",
+    "xG",
+    "situation",
+    "shotType",
+    "result",
+    "X",
+    "Y",
+    "lastAction",
+    "player_assisted",
+]
+SHOT_DTYPES = {
+    "shot_id": "int64",
+    "fixture_id": "int64",
+    "gameweek": "int64",
+    "minute": "int64",
+    "player_id": "int64",
+    "team_id": "int64",
+    "xG": float,
+    "X": float,
+    "Y": float,
+}
+
+
+def shot_partition_path(season, gw):
+    """Path of the shot data partition of a gameweek.
+
+    Args:
+        season (str): start year of EPL season
+        gw (int): FPL gameweek
+
+    Returns:
+        str: partition csv path
+    """
+    return "data/" + season + "/shots/gw_" + str(gw) + ".csv"
+
+
+def shots_frame(shot_data, fixture):
+    """Shot level dataframe of a fixture from an Understat shot payload.
+
+    Args:
+        shot_data (dict): Understat match shot data, h and a lists of shots
+        fixture (pandas series): EPL fixture level data row of the match, with fixture_id, gameweek, h_id and a_id
+
+    Returns:
+        pandas dataframe: SHOT_COLUMNS per shot
+    """
+    shots = pd.DataFrame(shot_data["h"] + shot_data["a"])
+    if shots.empty:
+        return pd.DataFrame(columns=SHOT_COLUMNS).astype(SHOT_DTYPES)
+    shots = shots.rename(columns={"id": "shot_id"})
+    shots["fixture_id"] = int(fixture["fixture_id"])
+    shots["gameweek"] = int(fixture["gameweek"])
+    shots["team_id"] = np.where(shots["h_a"] == "h", fixture["h_id"], fixture["a_id"])
+
+    return shots[SHOT_COLUMNS].astype(SHOT_DTYPES)
+
+
+def penalty_data(shots):
+    """Penalty attempts, goals and xG per player per fixture.
+
+    Args:
+        shots (pandas dataframe): shot level data
+
+    Returns:
+        pandas dataframe: player_id, fixture_id, penalty_attempt, penalty_scored, penalty_xG
+    """
+    penalties = shots[shots["situation"] == "Penalty"]
+    return penalties.groupby(["player_id", "fixture_id"], as_index=False).agg(
+        penalty_attempt=("shot_id", "count"),
+        penalty_scored=("result", lambda x: (x == "Goal").sum()),
+        penalty_xG=("xG", "sum"),
+    )
+
+
+def add_penalty_columns(player_data, shots):
+    """Add penalty attempts and goals, and non penalty xG and xGI, to player data from shot data.
+
+    Args:
+        player_data (pandas dataframe): Understat player (per fixture) data, without penalty columns
+        shots (pandas dataframe): shot level data of the fixtures
+
+    Returns:
+        pandas dataframe: player data with penalty_attempt, penalty_scored, npxG and npxGI
+    """
+    player_data = player_data.merge(
+        penalty_data(shots), how="left", on=["fixture_id", "player_id"]
+    )
+    player_data["penalty_attempt"] = (
+        player_data["penalty_attempt"].fillna(0).astype("int64")
+    )
+    player_data["penalty_scored"] = (
+        player_data["penalty_scored"].fillna(0).astype("int64")
+    )
+    player_data["npxG"] = player_data["xG"] - player_data["penalty_xG"].fillna(0)
+    player_data = player_data.drop(columns="penalty_xG")
+    player_data["npxGI"] = player_data["npxG"] + player_data["xA"]
+    return player_data
+
+
+def update_player_shot_columns(shots, season):
+    """Recalculate the shot derived columns of stored player data for the fixtures of new shots.
+
+    Args:
+        shots (pandas dataframe): shot level data
+        season (str): start year of EPL season
+    """
+    # round trip floats, so only the fixtures of the shots change
+    player_data = pd.read_csv(
+        "data/" + season + "/player_data.csv", float_precision="round_trip"
+    )
+    rows = player_data["fixture_id"].isin(shots["fixture_id"]).to_numpy()
+    penalty_columns = ["penalty_attempt", "penalty_scored", "npxG", "npxGI"]
+    fixture_rows = add_penalty_columns(
+        player_data[rows].drop(columns=penalty_columns), shots
+    )
+    for column in penalty_columns:
+        player_data.loc[rows, column] = fixture_rows[column].to_numpy()
+    player_data.loc[rows, "team_xG_on"] = on_pitch_team_xg(player_data[rows], shots)
+    player_data.to_csv("data/" + season + "/player_data.csv", index=False)
+
+
+def write_shot_partitions(shots, season):
+    """Add shots to the season's gameweek partitions, replacing shots already stored.
+
+    Args:
+        shots (pandas dataframe): shot level data
+        season (str): start year of EPL season
+    """
+    os.makedirs("data/" + season + "/shots", exist_ok=True)
+    for gw, gw_shots in shots.groupby("gameweek"):
+        path = shot_partition_path(season, gw)
+        if os.path.exists(path):
+            stored = pd.read_csv(path)
+            gw_shots = pd.concat(
+                [stored[~stored["shot_id"].isin(gw_shots["shot_id"])], gw_shots]
+            )
+        gw_shots.sort_values(["fixture_id", "minute", "shot_id"]).to_csv(
+            path, index=False
+        )
+
+
+def backfill_shot_data(season):
+    """Retrieve shot level data from Understat of resulted fixtures not yet in the shot partitions.
+    Penalty, non penalty and on pitch xG of the player data are recalculated from the new shots, and the fact table rebuilt.
+
+    Args:
+        season (str): start year of EPL season to retrieve
+    """
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    # fixtures already stored
+    recorded_ids = []
+    for gw in fixture_data["gameweek"].unique():
+        if os.path.exists(shot_partition_path(season, gw)):
+            recorded_ids += (
+                pd.read_csv(shot_partition_path(season, gw), usecols=["fixture_id"])[
+                    "fixture_id"
+                ]
+                .unique()
+                .tolist()
+            )
+
+    new_shots = []
+    for _, fixture in fixture_data[
+        ~fixture_data["fixture_id"].isin(recorded_ids)
+    ].iterrows():
+        with UnderstatClient() as understat:
+            shot_data = understat.match(
+                match=str(fixture["fixture_id"])
+            ).get_shot_data()
+        new_shots.append(shots_frame(shot_data, fixture))
+    if len(new_shots) > 0:
+        new_shots = pd.concat(new_shots)
+        write_shot_partitions(new_shots, season)
+        update_player_shot_columns(new_shots, season)
+        update_fact_table(season, rebuild=True)
+
+
+if __name__ == "__main__":
+    backfill_shot_data(sys.argv[1])
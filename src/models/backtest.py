@@ -0,0 +1,413 @@
+import pandas as pd
+import numpy as np
+import itertools
+import functools
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+from rating_core import fixture_weights
+from rating_models import RATING_MODELS
+from season_simulator import fixture_rates, rate_scale
+
+# player positions, FPL element type -> position
+POSITION_NAMES = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+# backtest result columns, one row per (model, params, gameweek, group)
+BACKTEST_COLUMNS = [
+    "model",
+    "params",
+    "gameweek",
+    "group",
+    "n",
+    "mae",
+    "spearman",
+    "bias",
+    "slope",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def load_backtest_data(season):
+    """Read the data needed to replay a season, once per process.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        dict: fixtures, fixture_data, player_fixtures, fpl_player_data dataframes (fpl_player_data None if not recorded)
+    """
+    # FPL outcomes per player gameweek, from the player gameweek fact table
+    facts = pd.read_csv("data/" + season + "/player_gameweek_facts.csv")
+
+    # team and element type of each player fixture, element type from starting positions only
+    player_fixtures = facts[facts["fixture_id"] >= 0][
+        ["fpl_id", "gameweek", "team_id", "position"]
+    ].dropna(subset=["fpl_id", "team_id"])
+    player_fixtures["element_type"] = np.select(
+        [
+            player_fixtures["position"] == "GK",
+            player_fixtures["position"].str.startswith("D")
+            & ~player_fixtures["position"].str.startswith("DM"),
+            player_fixtures["position"].str.startswith("FW"),
+            player_fixtures["position"] != "Sub",
+        ],
+        [1, 2, 4, 3],
+        default=0,
+    )
+    return {
+        "fixtures": pd.read_csv("data/" + season + "/season_data.csv"),
+        "fixture_data": pd.read_csv("data/" + season + "/fixture_data.csv"),
+        "player_fixtures": player_fixtures.drop(columns="position"),
+        "fpl_player_data": (
+            facts.dropna(subset="total_points")[
+                ["fpl_id", "gameweek", "minutes", "total_points"]
+            ]
+            if "total_points" in facts.columns
+            else None
+        ),
+    }
+
+
+def params_key(params):
+    """Canonical string of a parameter set, used as the backtest cache key.
+
+    Args:
+        params (dict): parameter name -> value
+
+    Returns:
+        str: "name=value" pairs sorted by name, separated by ";"
+    """
+    return ";".join(name + "=" + str(params[name]) for name in sorted(params))
+
+
+def score_predictions(predicted, realized, groups):
+    """Accuracy of predictions per group: mean absolute error, Spearman rank correlation, and calibration.
+    Calibration is the mean bias (predicted - realized) and the least squares slope of realized on predicted (1 if calibrated).
+
+    Args:
+        predicted (pandas series): predicted values
+        realized (pandas series): realized values, aligned to predicted
+        groups (pandas series): group of each prediction, aligned to predicted
+
+    Returns:
+        list: (group, n, mae, spearman, bias, slope) per group, and "all"
+    """
+    scores = []
+    frame = pd.DataFrame(
+        {"predicted": predicted, "realized": realized, "group": groups}
+    )
+    for group, group_frame in [("all", frame)] + list(frame.groupby("group")):
+        x = group_frame["predicted"]
+        y = group_frame["realized"]
+        spearman = x.rank().corr(y.rank()) if len(x) > 2 else np.nan
+        slope = (
+            ((x - x.mean()) * (y - y.mean())).sum() / ((x - x.mean()) ** 2).sum()
+            if x.var() > 0
+            else np.nan
+        )
+        scores.append(
+            (
+                group,
+                len(x),
+                (x - y).abs().mean(),
+                spearman,
+                (x - y).mean(),
+                slope,
+            )
+        )
+    return scores
+
+
+def team_fixture_rates(data, gw, model, window, half_life, home_advantage):
+    """Predicted goal rates of every team fixture in a gameweek, using only fixtures played before it.
+
+    Args:
+        data (dict): season data, from load_backtest_data
+        gw (int): FPL gameweek to predict
+        model (str): registered rating model
+        window (int): rating window in gameweeks, None for the full season
+        half_life (float): rating time decay half-life in gameweeks, None for no decay
+        home_advantage (float): percentage by which home fixtures are stronger than away fixtures, between [0-1]
+
+    Returns:
+        pandas dataframe: team_id, fixture_id, xg_for, xg_against per team fixture, None if no fixtures have been played
+    """
+    fixture_data = data["fixture_data"]
+    played = fixture_data[fixture_data["gameweek"] < gw]
+    if played.empty:
+        return None
+    weights = fixture_weights(fixture_data, [gw], window=window, half_life=half_life)
+    o, d = RATING_MODELS[model]["fit"](fixture_data, weights)
+    scale = rate_scale(played, o[0], d[0], (played["h_xg"] + played["a_xg"]).mean() / 2)
+    fixtures = data["fixtures"]
+    fixtures = fixtures[fixtures["gameweek"] == gw]
+    h_rate, a_rate = fixture_rates(fixtures, o[0], d[0], scale, home_advantage)
+    return pd.DataFrame(
+        {
+            "team_id": np.concatenate([fixtures["h_id"], fixtures["a_id"]]),
+            "fixture_id": np.concatenate([fixtures["fixture_id"]] * 2),
+            "xg_for": np.concatenate([h_rate, a_rate]),
+            "xg_against": np.concatenate([a_rate, h_rate]),
+        }
+    )
+
+
+def backtest_fixture_xg(
+    data, gw, model="odm", window=None, half_life=None, home_advantage=0.33
+):
+    """Score predicted team xG of each fixture in a gameweek against realized xG.
+
+    Args:
+        data (dict): season data, from load_backtest_data
+        gw (int): FPL gameweek to predict
+        model (str): registered rating model
+        window (int): rating window in gameweeks, None for the full season
+        half_life (float): rating time decay half-life in gameweeks, None for no decay
+        home_advantage (float): percentage by which home fixtures are stronger than away fixtures, between [0-1]
+
+    Returns:
+        list: (group, n, mae, spearman, bias, slope) per group, grouped by home / away
+    """
+    rates = team_fixture_rates(data, gw, model, window, half_life, home_advantage)
+    fixture_data = data["fixture_data"]
+    fixture_data = fixture_data[fixture_data["gameweek"] == gw]
+    if rates is None or fixture_data.empty:
+        return []
+    realized = pd.DataFrame(
+        {
+            "team_id": np.concatenate([fixture_data["h_id"], fixture_data["a_id"]]),
+            "fixture_id": np.concatenate([fixture_data["fixture_id"]] * 2),
+            "xg": np.concatenate([fixture_data["h_xg"], fixture_data["a_xg"]]),
+            "side": ["home"] * len(fixture_data) + ["away"] * len(fixture_data),
+        }
+    ).merge(rates, how="inner", on=["team_id", "fixture_id"])
+    return score_predictions(realized["xg_for"], realized["xg"], realized["side"])
+
+
+def backtest_player_form(
+    data,
+    gw,
+    model="odm",
+    window=6,
+    half_life=None,
+    home_advantage=0.33,
+    fixture_weight=1.0,
+):
+    """Score a fixture adjusted form projection of FPL points in a gameweek against realized points.
+    The projection is a player's mean points per appearance over the previous window gameweeks, scaled per fixture by (team xG / league xG) for attackers or (league xG / opponent xG) for defenders and goalkeepers, to the power fixture_weight.
+    Only players with minutes in the gameweek are scored, so minutes prediction is not included.
+    A player's team is that of their fixture in the gameweek and their position is their latest starting position before it, so mid-season transfers and position changes do not leak into earlier gameweeks.
+
+    Args:
+        data (dict): season data, from load_backtest_data
+        gw (int): FPL gameweek to predict
+        model (str): registered rating model
+        window (int): form window in gameweeks
+        half_life (float): rating time decay half-life in gameweeks, None for no decay
+        home_advantage (float): percentage by which home fixtures are stronger than away fixtures, between [0-1]
+        fixture_weight (float): strength of the fixture adjustment, 0 for pure form
+
+    Returns:
+        list: (group, n, mae, spearman, bias, slope) per group, grouped by position
+    """
+    fpl_player_data = data["fpl_player_data"]
+    if fpl_player_data is None:
+        return []
+    rates = team_fixture_rates(data, gw, model, None, half_life, home_advantage)
+    if rates is None:
+        return []
+
+    # form: mean points per appearance over the window
+    past = fpl_player_data[
+        fpl_player_data["gameweek"].between(gw - window, gw - 1)
+        & (fpl_player_data["minutes"] > 0)
+    ]
+    form = past.groupby("fpl_id")["total_points"].mean().rename("form")
+
+    # fixture multiplier per team, summed over double gameweek fixtures
+    league_xg = rates["xg_for"].mean()
+    rates["attack"] = (rates["xg_for"] / league_xg) ** fixture_weight
+    rates["defence"] = (league_xg / rates["xg_against"]) ** fixture_weight
+    team_factor = rates.groupby("team_id")[["attack", "defence"]].sum()
+
+    # team in the gameweek, latest starting position before it
+    player_fixtures = data["player_fixtures"]
+    teams = player_fixtures[player_fixtures["gameweek"] == gw].drop_duplicates(
+        subset="fpl_id"
+    )[["fpl_id", "team_id"]]
+    positions = player_fixtures[
+        (player_fixtures["gameweek"] < gw) & (player_fixtures["element_type"] > 0)
+    ].drop_duplicates(subset="fpl_id", keep="last")[["fpl_id", "element_type"]]
+
+    realized = fpl_player_data[
+        (fpl_player_data["gameweek"] == gw) & (fpl_player_data["minutes"] > 0)
+    ]
+    players = (
+        realized[["fpl_id", "total_points"]]
+        .merge(form, how="inner", left_on="fpl_id", right_index=True)
+        .merge(teams, how="inner", on="fpl_id")
+        .merge(positions, how="inner", on="fpl_id")
+        .merge(team_factor, how="inner", left_on="team_id", right_index=True)
+    )
+    players = players[players["element_type"].isin(POSITION_NAMES)]
+    factor = np.where(
+        players["element_type"] >= 3, players["attack"], players["defence"]
+    )
+    return score_predictions(
+        players["form"] * factor,
+        players["total_points"],
+        players["element_type"].map(POSITION_NAMES),
+    )
+
+
+# backtest model registry: model -> backtest function, default parameter grid
+BACKTEST_MODELS = {
+    "fixture_xg": {
+        "func": backtest_fixture_xg,
+        "grid": {
+            "model": ["odm", "poisson"],
+            "window": [None, 6],
+            "half_life": [None],
+            "home_advantage": [0.0, 0.2, 0.33, 0.5],
+        },
+    },
+    "player_form": {
+        "func": backtest_player_form,
+        "grid": {
+            "model": ["odm"],
+            "window": [3, 6, 10],
+            "half_life": [None],
+            "home_advantage": [0.33],
+            "fixture_weight": [0.0, 0.5, 1.0],
+        },
+    },
+}
+
+
+def backtest_cell(season, backtest_model, params, gw):
+    """Backtest one (model, params, gameweek) cell.
+
+    Args:
+        season (str): start year of EPL season
+        backtest_model (str): registered backtest model
+        params (dict): backtest function keyword arguments
+        gw (int): FPL gameweek to predict
+
+    Returns:
+        list: backtest result rows, see BACKTEST_COLUMNS
+    """
+    scores = BACKTEST_MODELS[backtest_model]["func"](
+        load_backtest_data(season), gw, **params
+    )
+    return [(backtest_model, params_key(params), gw) + score for score in scores]
+
+
+def run_backtest(season, backtest_model, grid=None, gws=None, n_jobs=1):
+    """Backtest every parameter set of a grid over a season, across a process pool.
+    Results are cached per (model, params, gameweek) in backtest_cache.csv, only uncached cells are computed.
+
+    Args:
+        season (str): start year of EPL season
+        backtest_model (str): registered backtest model
+        grid (dict): parameter name -> list of values, default the model's grid
+        gws (list): gameweeks to predict, default all played gameweeks
+        n_jobs (int): number of processes
+
+    Returns:
+        pandas dataframe: backtest results of the grid, see BACKTEST_COLUMNS
+    """
+    grid = grid or BACKTEST_MODELS[backtest_model]["grid"]
+    if gws is None:
+        gws = sorted(load_backtest_data(season)["fixture_data"]["gameweek"].unique())
+    param_sets = [
+        dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())
+    ]
+
+    # cached cells, cells with no predictions are cached as an empty "none" group row
+    cache_path = "data/" + season + "/backtest_cache.csv"
+    if os.path.exists(cache_path):
+        cache = pd.read_csv(cache_path)
+    else:
+        cache = pd.DataFrame(columns=BACKTEST_COLUMNS)
+    cached = set(
+        zip(
+            cache["model"],
+            cache["params"],
+            cache["gameweek"].astype("int64"),
+        )
+    )
+    cells = [
+        (season, backtest_model, params, int(gw))
+        for params in param_sets
+        for gw in gws
+        if (backtest_model, params_key(params), int(gw)) not in cached
+    ]
+
+    # compute uncached cells
+    if cells:
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                results = list(
+                    executor.map(
+                        backtest_cell,
+                        *zip(*cells),
+                        chunksize=max(len(cells) // (4 * n_jobs), 1)
+                    )
+                )
+        else:
+            results = [backtest_cell(*cell) for cell in cells]
+        rows = [
+            row or [(cell[1], params_key(cell[2]), cell[3], "none", 0) + (np.nan,) * 4]
+            for cell, row in zip(cells, results)
+        ]
+        new_results = pd.DataFrame(
+            [r for row in rows for r in row], columns=BACKTEST_COLUMNS
+        )
+        cache = pd.concat([cache, new_results], ignore_index=True)
+        cache.to_csv(cache_path, index=False)
+
+    keys = {params_key(params) for params in param_sets}
+    return cache[
+        (cache["model"] == backtest_model)
+        & cache["params"].isin(keys)
+        & cache["gameweek"].isin(gws)
+        & (cache["group"] != "none")
+    ]
+
+
+def summarize_backtest(results):
+    """Summarize backtest results over gameweeks per parameter set and group.
+    MAE, bias and slope are weighted by the number of predictions, Spearman correlation is the mean over gameweeks.
+
+    Args:
+        results (pandas dataframe): backtest results, from run_backtest
+
+    Returns:
+        pandas dataframe: params, group, n, mae, spearman, bias, slope sorted by group and mae
+    """
+    results = results.assign(
+        mae_n=results["mae"] * results["n"],
+        bias_n=results["bias"] * results["n"],
+        slope_n=results["slope"] * results["n"],
+    )
+    summary = results.groupby(["params", "group"], as_index=False).agg(
+        n=("n", "sum"),
+        mae_n=("mae_n", "sum"),
+        spearman=("spearman", "mean"),
+        bias_n=("bias_n", "sum"),
+        slope_n=("slope_n", "sum"),
+    )
+    summary["mae"] = summary["mae_n"] / summary["n"]
+    summary["bias"] = summary["bias_n"] / summary["n"]
+    summary["slope"] = summary["slope_n"] / summary["n"]
+    return summary[
+        ["params", "group", "n", "mae", "spearman", "bias", "slope"]
+    ].sort_values(["group", "mae"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    # sweep a backtest model's default grid over a season
+    season = sys.argv[1]
+    backtest_model = sys.argv[2]
+    n_jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    summary = summarize_backtest(run_backtest(season, backtest_model, n_jobs=n_jobs))
+    print(summary[summary["group"] == "all"].to_string(index=False))
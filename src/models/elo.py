@@ -0,0 +1,65 @@
+import numpy as np
+from rating_core import N_TEAMS, append_ratings
+
+# xG-Elo carries its own recency through sequential updates, full season only
+ELO_VARIANTS = {"season": {}}
+
+
+def elo_ratings(fixture_data, weights, k=0.2, home_advantage=1.15, base_xg=1.4):
+    """xG-Elo model ratings for a batch of gameweeks.
+    Each team has an attack and a defence rating on a log10 scale, with expected xG = base_xg * 10^(attack_team + defence_opponent).
+    After each gameweek both ratings move by k times the log10 error between observed and expected xG.
+    Gameweeks are processed once in order, with ratings snapshot for each rated gameweek.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        weights (numpy array): (gameweek, fixture) cumulative weights, from fixture_weights with no window
+        k (float): update step size
+        home_advantage (float): home xG multiplier
+        base_xg (float): league average team xG per match
+
+    Returns:
+        (numpy array, numpy array): (gameweek, team) offensive ratings (xG x100 vs an average defence), (gameweek, team) defensive ratings (opponent xG multiplier)
+    """
+    fixture_gw = fixture_data["gameweek"].to_numpy()
+    h_id = fixture_data["h_id"].to_numpy()
+    a_id = fixture_data["a_id"].to_numpy()
+    h_xg = np.maximum(fixture_data["h_xg"].to_numpy(), 0.05)
+    a_xg = np.maximum(fixture_data["a_xg"].to_numpy(), 0.05)
+    home = np.log10(home_advantage)
+
+    attack = np.zeros(N_TEAMS)
+    defence = np.zeros(N_TEAMS)
+    processed = np.zeros(len(fixture_data), dtype=bool)
+    o = np.zeros((len(weights), N_TEAMS))
+    d = np.zeros((len(weights), N_TEAMS))
+
+    # rate gameweeks in order of the number of fixtures played before them
+    for g in np.argsort(weights.sum(axis=1), kind="stable"):
+        new = (weights[g] > 0) & ~processed
+        for gw in np.unique(fixture_gw[new]):
+            f = new & (fixture_gw == gw)
+            # log10 errors of observed vs expected xG
+            h_error = np.log10(h_xg[f] / base_xg) - (
+                attack[h_id[f]] + defence[a_id[f]] + home
+            )
+            a_error = np.log10(a_xg[f] / base_xg) - (attack[a_id[f]] + defence[h_id[f]])
+            np.add.at(attack, h_id[f], k * h_error)
+            np.add.at(defence, a_id[f], k * h_error)
+            np.add.at(attack, a_id[f], k * a_error)
+            np.add.at(defence, h_id[f], k * a_error)
+        processed |= new
+        o[g] = 100 * base_xg * 10**attack
+        d[g] = 10**defence
+    return o, d
+
+
+def elo_func(gw, season):
+    """Calculate offensive and defensive ratings of teams via the xG-Elo model.
+    Ratings for a given gameweek are the teams determined strengths before that gameweek has been played.
+
+    Args:
+        gw (int): FPL gameweek to assign to ratings
+        season (str): start year of EPL season to retrieve
+    """
+    append_ratings(elo_ratings, ELO_VARIANTS, "elo_rating.csv", gw, season)
@@ -1,5 +1,55 @@
-import pandas as pd
 import numpy as np
+from rating_core import score_tensor, append_ratings
+
+# window variants: full season and past 6 "form" model
+ODM_VARIANTS = {"season": {}, "psix": {"window": 6}}
+
+
+def odm_solve(A, d=None, tol=1e-12, max_iter=10000):
+    """Batched ODM solve: iteratively update offensive and defensive ratings until converged.
+    Each score matrix stops iterating once converged, so slow (sparse) matrices do not hold up the rest of the batch.
+
+    Args:
+        A (numpy array): (batch, team, team) score matrices, A[b, i, j] = score team j got vs team i
+        d (numpy array): (batch, team) initial defensive ratings, default ones
+        tol (float): maximum relative change in defensive ratings at convergence
+        max_iter (int): maximum number of iterations
+
+    Returns:
+        (numpy array, numpy array): (batch, team) offensive ratings, (batch, team) defensive ratings
+    """
+    # small perturbation to aid convergence
+    A = A + 0.0001
+    if d is None:
+        d = np.ones(A.shape[:2])
+    d = np.array(d, dtype="float64")
+    o = np.empty_like(d)
+    # indices of unconverged score matrices
+    active = np.arange(len(A))
+    for k in range(max_iter):
+        A_active = A[active]
+        o_active = np.einsum("bij,bi->bj", A_active, 1 / d[active])
+        d_new = np.einsum("bij,bj->bi", A_active, 1 / o_active)
+        converged = np.max(np.abs(d_new / d[active] - 1), axis=1) < tol
+        o[active] = o_active
+        d[active] = d_new
+        active = active[~converged]
+        if len(active) == 0:
+            break
+    return o, d
+
+
+def odm_ratings(fixture_data, weights):
+    """ODM model ratings for a batch of gameweeks.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        weights (numpy array): (gameweek, fixture) weights
+
+    Returns:
+        (numpy array, numpy array): (gameweek, team) offensive ratings, (gameweek, team) defensive ratings
+    """
+    return odm_solve(score_tensor(fixture_data, weights))
 
 
 def odm_func(gw, season):
@@ -10,53 +60,4 @@ def odm_func(gw, season):
         gw (int): FPL gameweek to assign to ratings
         season (str): start year of EPL season to retrieve
     """
-    # read in team to id mapping
-    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
-
-    # read in fixture data
-    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
-    # setup season long and past 6 "form" model
-    full_season = fixture_data[fixture_data["gameweek"] < gw]
-    full_season.name = "full_season"
-    past_six = fixture_data[
-        (fixture_data["gameweek"] < gw) & (fixture_data["gameweek"] >= gw - 6)
-    ]
-    past_six.name = "past_six"
-    models = [full_season, past_six]
-
-    for model in models:
-        # Create 'A' score matrix with small perturbation to aid convergence
-        A = np.zeros((20, 20)) + 0.0001
-        # Score team j got vs team i: A[i,j] = j team xG
-        temp_arr = np.zeros((20, 20))
-        temp_arr[model["h_id"], model["a_id"]] += model["a_xg"] * 100
-        temp_arr[model["a_id"], model["h_id"]] += model["h_xg"] * 100
-        A += temp_arr
-
-        # ODM MODEL: iteratively update offensive and defensive ratings
-        d = np.ones((20, 1))
-        for k in range(10000):
-            o = np.dot(A.T, (1 / d))
-            d = np.dot(A, (1 / o))
-
-        # Construct Rating Dataframe
-        if model.name == "full_season":
-            team_ids = team_mapping["team_id"].to_list()
-            team_names = team_mapping["team_name"].to_list()
-            rating_df = pd.DataFrame(
-                data={
-                    "team_id": team_ids,
-                    "team": team_names,
-                    "gameweek": gw,
-                    "o_rating_season": o.flatten(),
-                    "d_rating_season": d.flatten(),
-                }
-            )
-        elif model.name == "past_six":
-            rating_df["o_rating_psix"] = o.flatten()
-            rating_df["d_rating_psix"] = d.flatten()
-
-    # Append to existing rating database, write updates
-    past_rating = pd.read_csv("data/" + season + "/odm_rating.csv")
-    rating_df = pd.concat([past_rating, rating_df])
-    rating_df.to_csv("data/" + season + "/odm_rating.csv", index=False)
+    append_ratings(odm_ratings, ODM_VARIANTS, "odm_rating.csv", gw, season)
@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from rating_core import (
+    N_TEAMS,
+    fixture_weights,
+    score_incidence,
+    ratings_frame,
+    write_ratings,
+)
+from odm import odm_solve, ODM_VARIANTS
+
+# number of bootstrap replicates and percentiles of the rating bands
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_PERCENTILES = (5, 95)
+# replicates per process pool task
+BOOTSTRAP_CHUNK = 250
+# ratings before this gameweek are based on past season, see odm_rating.csv
+BOOTSTRAP_MIN_GAMEWEEK = 7
+
+
+def bootstrap_xg(fixture_data, n_samples, rng):
+    """Parametric bootstrap replicates of fixture xG, with the fixture schedule held fixed.
+    Shot xG values are approximately exponentially distributed, so each team's match xG is redrawn from a Gamma distribution with the observed xG as mean and the number of shots as shape.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        n_samples (int): number of bootstrap replicates
+        rng (numpy Generator): random number generator
+
+    Returns:
+        (numpy array, numpy array): (sample, fixture) home xG, (sample, fixture) away xG
+    """
+    replicates = []
+    for side in ["h", "a"]:
+        shots = np.maximum(fixture_data[side + "_shot"].to_numpy(), 1)
+        xg = fixture_data[side + "_xg"].to_numpy()
+        replicates.append(rng.gamma(shots, xg / shots, size=(n_samples, len(xg))))
+    return replicates[0], replicates[1]
+
+
+def bootstrap_solve(A, d, executor=None):
+    """ODM solve of a batch of bootstrap score matrices, optionally split across a process pool.
+
+    Args:
+        A (numpy array): (batch, team, team) score matrices
+        d (numpy array): (batch, team) initial defensive ratings
+        executor (ProcessPoolExecutor): process pool, None to solve in this process
+
+    Returns:
+        (numpy array, numpy array): (batch, team) offensive ratings, (batch, team) defensive ratings
+    """
+    if executor is None:
+        return odm_solve(A, d=d)
+    n_chunks = -(-len(A) // BOOTSTRAP_CHUNK)
+    results = list(
+        executor.map(
+            odm_solve, np.array_split(A, n_chunks), np.array_split(d, n_chunks)
+        )
+    )
+    return (
+        np.concatenate([o for o, d in results]),
+        np.concatenate([d for o, d in results]),
+    )
+
+
+def odm_bootstrap(
+    fixture_data, gws, n_samples=BOOTSTRAP_SAMPLES, seed=0, executor=None
+):
+    """Bootstrap percentile bands of ODM ratings for each variant over a batch of gameweeks.
+    Replicates perturb fixture xG, and are warm started from, and scaled to, the point ratings.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        gws (list): gameweeks to rate
+        n_samples (int): number of bootstrap replicates
+        seed (int): random seed
+        executor (ProcessPoolExecutor): process pool for the replicate solves, None to solve in this process
+
+    Returns:
+        dict: <variant>_lo / <variant>_hi -> ((gameweek, team) offensive ratings, (gameweek, team) defensive ratings)
+    """
+    rng = np.random.default_rng(seed)
+    h_xg, a_xg = bootstrap_xg(fixture_data, n_samples, rng)
+    # score matrix positions of away and home xG, see score_incidence
+    h_id = fixture_data["h_id"].to_numpy()
+    a_id = fixture_data["a_id"].to_numpy()
+    h_index = np.zeros((len(fixture_data), N_TEAMS * N_TEAMS))
+    h_index[np.arange(len(fixture_data)), a_id * N_TEAMS + h_id] = 100
+    a_index = np.zeros((len(fixture_data), N_TEAMS * N_TEAMS))
+    a_index[np.arange(len(fixture_data)), h_id * N_TEAMS + a_id] = 100
+    incidence = score_incidence(fixture_data)
+    bands = {}
+    for variant, kwargs in ODM_VARIANTS.items():
+        weights = fixture_weights(fixture_data, gws, **kwargs)
+        o_point, d_point = odm_solve(
+            (weights @ incidence).reshape(-1, N_TEAMS, N_TEAMS)
+        )
+        o_bands = np.zeros((2, len(gws), N_TEAMS))
+        d_bands = np.zeros((2, len(gws), N_TEAMS))
+        for g in range(len(gws)):
+            # stack replicate score matrices, solve as one batch
+            A = ((h_xg * weights[g]) @ h_index + (a_xg * weights[g]) @ a_index).reshape(
+                -1, N_TEAMS, N_TEAMS
+            )
+            o, d = bootstrap_solve(
+                A, np.repeat(d_point[g][None, :], n_samples, axis=0), executor
+            )
+            # fix rating scale of each replicate to the point ratings
+            scale = np.exp(
+                np.mean(np.log(d), axis=1, keepdims=True) - np.mean(np.log(d_point[g]))
+            )
+            o_bands[:, g] = np.percentile(o * scale, BOOTSTRAP_PERCENTILES, axis=0)
+            d_bands[:, g] = np.percentile(d / scale, BOOTSTRAP_PERCENTILES, axis=0)
+        bands[variant + "_lo"] = (o_bands[0], d_bands[0])
+        bands[variant + "_hi"] = (o_bands[1], d_bands[1])
+    return bands
+
+
+def bootstrap_frame(season, gws, n_jobs=1):
+    """Bootstrap percentile bands of ODM ratings of teams for each gameweek.
+
+    Args:
+        season (str): start year of EPL season to retrieve
+        gws (list): gameweeks to rate
+        n_jobs (int): number of processes for the replicate solves
+
+    Returns:
+        pandas dataframe: team_id, team, gameweek, o_rating_<variant>_lo/hi, d_rating_<variant>_lo/hi
+    """
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    executor = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else None
+    # gameweek seeded, bands do not depend on batch
+    rating_df = pd.concat(
+        [
+            ratings_frame(
+                team_mapping,
+                [gw],
+                odm_bootstrap(fixture_data, [gw], seed=gw, executor=executor),
+            )
+            for gw in gws
+        ]
+    )
+    if executor is not None:
+        executor.shutdown()
+    return rating_df
+
+
+def odm_bootstrap_func(gw, season, n_jobs=1):
+    """Calculate bootstrap percentile bands of ODM ratings of teams for a gameweek.
+
+    Args:
+        gw (int): FPL gameweek to assign to ratings
+        season (str): start year of EPL season to retrieve
+        n_jobs (int): number of processes for the replicate solves
+    """
+    if gw < BOOTSTRAP_MIN_GAMEWEEK:
+        return
+    write_ratings(bootstrap_frame(season, [gw], n_jobs), "odm_bootstrap.csv", season)
+
+
+if __name__ == "__main__":
+    # backfill full season bootstrap bands
+    season = sys.argv[1]
+    n_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    app_vars = pd.read_csv("data/app_vars.csv")
+    latest_gw = app_vars[app_vars["season"].str[:4] == season]["latest_gameweek"].item()
+    rating_df = bootstrap_frame(
+        season, range(BOOTSTRAP_MIN_GAMEWEEK, latest_gw + 2), n_jobs
+    )
+    rating_df.to_csv("data/" + season + "/odm_bootstrap.csv", index=False)
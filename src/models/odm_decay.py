@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+import os
+from rating_core import (
+    N_TEAMS,
+    decay_factor,
+    score_incidence,
+    score_tensor,
+    ratings_frame,
+    write_ratings,
+)
+from odm import odm_solve
+
+# default half-life of fixture weights, in gameweeks
+DECAY_HALF_LIFE = 4
+DECAY_VARIANTS = {"decay": {"half_life": DECAY_HALF_LIFE}}
+
+
+def normalize_ratings(o, d):
+    """Fix the ODM rating scale so the geometric mean defensive rating is 1.
+    ODM ratings are only determined up to a scale (o / c, d * c), this fixes the scale stored ratings are reported in.
+
+    Args:
+        o (numpy array): (batch, team) offensive ratings
+        d (numpy array): (batch, team) defensive ratings
+
+    Returns:
+        (numpy array, numpy array): normalized offensive and defensive ratings
+    """
+    scale = np.exp(np.mean(np.log(d), axis=1, keepdims=True))
+    return o * scale, d / scale
+
+
+def odm_decay_ratings(fixture_data, weights):
+    """Time decayed ODM model ratings for a batch of gameweeks.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        weights (numpy array): (gameweek, fixture) time decayed weights
+
+    Returns:
+        (numpy array, numpy array): (gameweek, team) offensive ratings, (gameweek, team) defensive ratings
+    """
+    return normalize_ratings(*odm_solve(score_tensor(fixture_data, weights)))
+
+
+def odm_decay_func(gw, season, half_life=DECAY_HALF_LIFE):
+    """Calculate time decayed offensive and defensive ratings of teams via the ODM model, updating incrementally.
+    The decayed score matrix is persisted between runs: each update multiplies it by the decay factor and adds only fixtures not yet included.
+    The ODM solve is cold started, as warm starts stop early on sparse (early season) score matrices, so ratings match a batch fit whatever the run history.
+
+    Args:
+        gw (int): FPL gameweek to assign to ratings
+        season (str): start year of EPL season to retrieve
+        half_life (float): half-life of fixture weights, in gameweeks
+    """
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    state_path = "data/" + season + "/odm_decay_state.npz"
+
+    # load decayed score matrix state, rebuild if missing, stale or for another half-life
+    A = np.zeros((N_TEAMS, N_TEAMS))
+    state_gw = gw
+    fixture_ids = np.array([], dtype="int64")
+    if os.path.exists(state_path):
+        state = np.load(state_path)
+        if state["half_life"] == half_life and state["gameweek"] <= gw:
+            A = state["A"]
+            state_gw = int(state["gameweek"])
+            fixture_ids = state["fixture_ids"]
+
+    # decay to new gameweek, add new fixtures with their decayed weight
+    decay = decay_factor(half_life)
+    A = A * decay ** (gw - state_gw)
+    new_fixtures = fixture_data[
+        ~fixture_data["fixture_id"].isin(fixture_ids) & (fixture_data["gameweek"] < gw)
+    ]
+    new_weights = decay ** (gw - 1 - new_fixtures["gameweek"].to_numpy())
+    A += (new_weights @ score_incidence(new_fixtures)).reshape(N_TEAMS, N_TEAMS)
+    fixture_ids = np.concatenate([fixture_ids, new_fixtures["fixture_id"].to_numpy()])
+
+    o, d = normalize_ratings(*odm_solve(A[None]))
+
+    # save state, append ratings
+    np.savez(
+        state_path,
+        A=A,
+        gameweek=gw,
+        half_life=half_life,
+        fixture_ids=fixture_ids,
+    )
+    rating_df = ratings_frame(team_mapping, [gw], {"decay": (o, d)})
+    write_ratings(rating_df, "odm_decay_rating.csv", season)
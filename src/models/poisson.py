@@ -0,0 +1,71 @@
+import numpy as np
+from rating_core import N_TEAMS, append_ratings
+
+# window variants: full season and past 6 "form" model
+POISSON_VARIANTS = {"season": {}, "psix": {"window": 6}}
+
+
+def poisson_ratings(fixture_data, weights, ridge=1.0, tol=1e-8, max_iter=50):
+    """Poisson attack-defence (Dixon-Coles style) model ratings for a batch of gameweeks.
+    Team xG is modelled as xG ~ Poisson(exp(mu + home + attack_team + defence_opponent)), fitted by batched Newton-Raphson (IRLS) with a ridge penalty on team parameters.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        weights (numpy array): (gameweek, fixture) weights
+        ridge (float): ridge penalty on team attack and defence parameters
+        tol (float): maximum parameter step at convergence
+        max_iter (int): maximum number of iterations
+
+    Returns:
+        (numpy array, numpy array): (gameweek, team) offensive ratings (xG x100 vs an average defence), (gameweek, team) defensive ratings (opponent xG multiplier)
+    """
+    n_fixtures = len(fixture_data)
+    h_id = fixture_data["h_id"].to_numpy()
+    a_id = fixture_data["a_id"].to_numpy()
+
+    # observations: home team xG then away team xG
+    y = np.concatenate([fixture_data["h_xg"], fixture_data["a_xg"]])
+    w = np.concatenate([weights, weights], axis=1)
+
+    # design matrix: intercept, home, attack of scoring team, defence of conceding team
+    n_params = 2 + 2 * N_TEAMS
+    X = np.zeros((2 * n_fixtures, n_params))
+    rows = np.arange(2 * n_fixtures)
+    X[:, 0] = 1
+    X[:n_fixtures, 1] = 1
+    X[rows, 2 + np.concatenate([h_id, a_id])] = 1
+    X[rows, 2 + N_TEAMS + np.concatenate([a_id, h_id])] = 1
+    # per observation outer products, to batch the hessian as one matrix product
+    XX = np.einsum("ni,nj->nij", X, X).reshape(2 * n_fixtures, -1)
+
+    # prior: league average xG, small home advantage, average teams
+    beta0 = np.zeros(n_params)
+    beta0[0] = np.log(np.mean(y)) if len(y) > 0 else 0.0
+    beta0[1] = np.log(1.15)
+    penalty = np.full(n_params, ridge)
+    penalty[:2] = 1e-3
+    beta = np.tile(beta0, (len(weights), 1))
+
+    for k in range(max_iter):
+        mu = np.exp(beta @ X.T)
+        grad = (w * (y - mu)) @ X - penalty * (beta - beta0)
+        hessian = ((w * mu) @ XX).reshape(-1, n_params, n_params) + np.diag(penalty)
+        step = np.linalg.solve(hessian, grad[..., None])[..., 0]
+        beta += step
+        if np.max(np.abs(step)) < tol:
+            break
+
+    o = 100 * np.exp(beta[:, [0]] + beta[:, 2 : 2 + N_TEAMS])
+    d = np.exp(beta[:, 2 + N_TEAMS :])
+    return o, d
+
+
+def poisson_func(gw, season):
+    """Calculate offensive and defensive ratings of teams via the Poisson attack-defence model.
+    Ratings for a given gameweek are the teams determined strengths before that gameweek has been played.
+
+    Args:
+        gw (int): FPL gameweek to assign to ratings
+        season (str): start year of EPL season to retrieve
+    """
+    append_ratings(poisson_ratings, POISSON_VARIANTS, "poisson_rating.csv", gw, season)
@@ -0,0 +1,148 @@
+import pandas as pd
+import numpy as np
+import os
+
+N_TEAMS = 20
+
+
+def fixture_weights(fixture_data, gws, window=None, half_life=None):
+    """Weight of each fixture in the ratings for each gameweek.
+    Ratings for a given gameweek only use fixtures played before that gameweek.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        gws (list): gameweeks to rate
+        window (int): number of previous gameweeks to include, None for the full season
+        half_life (float): exponential time decay half-life in gameweeks, None for no decay
+
+    Returns:
+        numpy array: (gameweek, fixture) weights
+    """
+    fixture_gw = fixture_data["gameweek"].to_numpy()[None, :]
+    gws = np.asarray(gws)[:, None]
+    weights = (fixture_gw < gws).astype("float64")
+    if window is not None:
+        weights *= fixture_gw >= gws - window
+    if half_life is not None:
+        # fixtures in the previous gameweek have weight 1
+        weights *= decay_factor(half_life) ** np.maximum(gws - 1 - fixture_gw, 0)
+    return weights
+
+
+def decay_factor(half_life):
+    """Per gameweek exponential time decay factor.
+
+    Args:
+        half_life (float): half-life in gameweeks
+
+    Returns:
+        float: decay factor
+    """
+    return 0.5 ** (1 / half_life)
+
+
+def score_incidence(fixture_data):
+    """Flat score matrix contribution of each fixture, xG team j got vs team i (x100) at column i * 20 + j.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+
+    Returns:
+        numpy array: (fixture, team * team) score incidence
+    """
+    h_id = fixture_data["h_id"].to_numpy()
+    a_id = fixture_data["a_id"].to_numpy()
+    incidence = np.zeros((len(fixture_data), N_TEAMS * N_TEAMS))
+    fixtures = np.arange(len(fixture_data))
+    incidence[fixtures, h_id * N_TEAMS + a_id] += fixture_data["a_xg"].to_numpy() * 100
+    incidence[fixtures, a_id * N_TEAMS + h_id] += fixture_data["h_xg"].to_numpy() * 100
+    return incidence
+
+
+def score_tensor(fixture_data, weights):
+    """Weighted xG score matrices for a batch of gameweeks.
+    A[g, i, j] is the xG team j got vs team i (x100), summed over fixtures with their gameweek g weight.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data
+        weights (numpy array): (gameweek, fixture) weights, from fixture_weights
+
+    Returns:
+        numpy array: (gameweek, team, team) score matrices
+    """
+    incidence = score_incidence(fixture_data)
+    return (weights @ incidence).reshape(-1, N_TEAMS, N_TEAMS)
+
+
+def ratings_frame(team_mapping, gws, ratings):
+    """Construct a rating dataframe from batched ratings.
+
+    Args:
+        team_mapping (pandas dataframe): EPL team mapping dataframe
+        gws (list): rated gameweeks
+        ratings (dict): variant -> ((gameweek, team) offensive ratings, (gameweek, team) defensive ratings)
+
+    Returns:
+        pandas dataframe: team_id, team, gameweek, o_rating_<variant>, d_rating_<variant>
+    """
+    rating_df = pd.DataFrame(
+        data={
+            "team_id": np.tile(team_mapping["team_id"].to_numpy(), len(gws)),
+            "team": np.tile(team_mapping["team_name"].to_numpy(), len(gws)),
+            "gameweek": np.repeat(gws, N_TEAMS),
+        }
+    )
+    for variant, (o, d) in ratings.items():
+        rating_df["o_rating_" + variant] = o.flatten()
+        rating_df["d_rating_" + variant] = d.flatten()
+    return rating_df
+
+
+def fit_variants(fit, variants, fixture_data, gws):
+    """Fit a rating model for every window variant over a batch of gameweeks.
+
+    Args:
+        fit (function): model fit function, (fixture_data, weights) -> (o, d)
+        variants (dict): variant -> fixture_weights keyword arguments (window, half_life)
+        fixture_data (pandas dataframe): EPL fixture level data
+        gws (list): gameweeks to rate
+
+    Returns:
+        dict: variant -> ((gameweek, team) offensive ratings, (gameweek, team) defensive ratings)
+    """
+    return {
+        variant: fit(fixture_data, fixture_weights(fixture_data, gws, **kwargs))
+        for variant, kwargs in variants.items()
+    }
+
+
+def append_ratings(fit, variants, file_name, gw, season):
+    """Rate teams for a gameweek and append to the model's existing rating database.
+
+    Args:
+        fit (function): model fit function, (fixture_data, weights) -> (o, d)
+        variants (dict): variant -> fixture_weights keyword arguments (window, half_life)
+        file_name (str): rating database file name
+        gw (int): FPL gameweek to assign to ratings
+        season (str): start year of EPL season to retrieve
+    """
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    rating_df = ratings_frame(
+        team_mapping, [gw], fit_variants(fit, variants, fixture_data, [gw])
+    )
+    write_ratings(rating_df, file_name, season)
+
+
+def write_ratings(rating_df, file_name, season):
+    """Append ratings to a model's existing rating database.
+
+    Args:
+        rating_df (pandas dataframe): new ratings, from ratings_frame
+        file_name (str): rating database file name
+        season (str): start year of EPL season
+    """
+    if os.path.exists("data/" + season + "/" + file_name):
+        past_rating = pd.read_csv("data/" + season + "/" + file_name)
+        rating_df = pd.concat([past_rating, rating_df])
+    rating_df.to_csv("data/" + season + "/" + file_name, index=False)
@@ -0,0 +1,76 @@
+import pandas as pd
+import sys
+import os
+from rating_core import fit_variants, ratings_frame
+from odm import odm_func, odm_ratings, ODM_VARIANTS
+from poisson import poisson_func, poisson_ratings, POISSON_VARIANTS
+from elo import elo_func, elo_ratings, ELO_VARIANTS
+from odm_decay import odm_decay_func, odm_decay_ratings, DECAY_VARIANTS
+
+# team rating model registry: model -> gameweek update function, batched fit function, weighting variants
+# ratings of each model are stored in data/<season>/<model>_rating.csv
+RATING_MODELS = {
+    "odm": {"func": odm_func, "fit": odm_ratings, "variants": ODM_VARIANTS},
+    "poisson": {
+        "func": poisson_func,
+        "fit": poisson_ratings,
+        "variants": POISSON_VARIANTS,
+    },
+    "elo": {"func": elo_func, "fit": elo_ratings, "variants": ELO_VARIANTS},
+    "odm_decay": {
+        "func": odm_decay_func,
+        "fit": odm_decay_ratings,
+        "variants": DECAY_VARIANTS,
+    },
+}
+
+
+def update_ratings(gw, season, models=None):
+    """Calculate team ratings for a gameweek with every registered rating model.
+
+    Args:
+        gw (int): FPL gameweek to assign to ratings
+        season (str): start year of EPL season to retrieve
+        models (list): rating models to update, default all registered models
+    """
+    for model in models or RATING_MODELS:
+        RATING_MODELS[model]["func"](gw, season)
+
+
+def fit_season(season, model, gws=range(1, 40)):
+    """Fit a rating model for every gameweek of a season in one batch.
+
+    Args:
+        season (str): start year of EPL season to retrieve
+        model (str): registered rating model
+        gws (list): gameweeks to rate
+
+    Returns:
+        pandas dataframe: ratings of each team for each gameweek
+    """
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    gws = list(gws)
+    ratings = fit_variants(
+        RATING_MODELS[model]["fit"],
+        RATING_MODELS[model]["variants"],
+        fixture_data,
+        gws,
+    )
+    return ratings_frame(team_mapping, gws, ratings)
+
+
+if __name__ == "__main__":
+    # backfill full season rating history, default models without a rating file
+    # a named model is refit from gameweek 1, replacing any stored rows (e.g. gameweeks seeded with previous season ratings)
+    season = sys.argv[1]
+    models = sys.argv[2:] or [
+        model
+        for model in RATING_MODELS
+        if not os.path.exists("data/" + season + "/" + model + "_rating.csv")
+    ]
+    app_vars = pd.read_csv("data/app_vars.csv")
+    latest_gw = app_vars[app_vars["season"].str[:4] == season]["latest_gameweek"].item()
+    for model in models:
+        rating_df = fit_season(season, model, range(1, latest_gw + 2))
+        rating_df.to_csv("data/" + season + "/" + model + "_rating.csv", index=False)
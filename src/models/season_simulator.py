@@ -0,0 +1,285 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+from rating_core import N_TEAMS
+
+# number of simulated season completions, simulated per chunk of seasons to bound memory
+SIM_SEASONS = 100000
+SIM_CHUNK = 10000
+# goals per team per match are truncated at this value
+MAX_GOALS = 15
+# default home advantage, as in the Fixture Ticker
+HOME_ADVANTAGE = 0.33
+# league mean xG per team per match, for calibration before any fixture is played
+LEAGUE_XG = 1.5
+# rating model and variant used for simulation
+SIM_MODEL = "odm"
+SIM_VARIANT = "season"
+
+
+def fixture_rates(fixtures, o_rating, d_rating, scale, home_advantage=HOME_ADVANTAGE):
+    """Poisson goal rates of each fixture from team ratings.
+    Rates are proportional to team offensive rating times opponent defensive rating, with the Fixture Ticker home and away factors.
+
+    Args:
+        fixtures (pandas dataframe): fixtures with h_id and a_id
+        o_rating (numpy array): (team,) offensive ratings
+        d_rating (numpy array): (team,) defensive ratings
+        scale (float): goals per unit of offensive rating times defensive rating
+        home_advantage (float): percentage by which home fixtures are stronger than away fixtures, between [0-1]
+
+    Returns:
+        (numpy array, numpy array): (fixture,) home goal rates, (fixture,) away goal rates
+    """
+    h_id = fixtures["h_id"].to_numpy()
+    a_id = fixtures["a_id"].to_numpy()
+    h_rate = scale * o_rating[h_id] * d_rating[a_id] * (1 + home_advantage / 2)
+    a_rate = scale * o_rating[a_id] * d_rating[h_id] * (1 - home_advantage / 2)
+    return h_rate, a_rate
+
+
+def rate_scale(fixtures, o_rating, d_rating, mean_xg, home_advantage=HOME_ADVANTAGE):
+    """Scale ratings to goal rates so that fixtures average the given xG per team per match.
+
+    Args:
+        fixtures (pandas dataframe): fixtures with h_id and a_id
+        o_rating (numpy array): (team,) offensive ratings
+        d_rating (numpy array): (team,) defensive ratings
+        mean_xg (float): mean xG per team per match
+        home_advantage (float): percentage by which home fixtures are stronger than away fixtures, between [0-1]
+
+    Returns:
+        float: goals per unit of offensive rating times defensive rating
+    """
+    h_rate, a_rate = fixture_rates(fixtures, o_rating, d_rating, 1.0, home_advantage)
+    return mean_xg / np.mean(np.concatenate([h_rate, a_rate]))
+
+
+def fixture_probabilities(fixtures, h_rate, a_rate):
+    """Clean sheet and scoring probabilities of each team in each fixture.
+
+    Args:
+        fixtures (pandas dataframe): EPL season fixtures dataframe
+        h_rate (numpy array): (fixture,) home goal rates
+        a_rate (numpy array): (fixture,) away goal rates
+
+    Returns:
+        pandas dataframe: team_id, gameweek, fixture_id, opponent_id, is_home, xg_for, xg_against, p_cs, p_score_2 per team fixture
+    """
+    probabilities = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "team_id": fixtures[team_col].to_numpy(),
+                    "gameweek": fixtures["gameweek"].to_numpy(),
+                    "fixture_id": fixtures["fixture_id"].to_numpy(),
+                    "opponent_id": fixtures[opponent_col].to_numpy(),
+                    "is_home": is_home,
+                    "xg_for": rate_for,
+                    "xg_against": rate_against,
+                }
+            )
+            for team_col, opponent_col, is_home, rate_for, rate_against in [
+                ("h_id", "a_id", True, h_rate, a_rate),
+                ("a_id", "h_id", False, a_rate, h_rate),
+            ]
+        ],
+        ignore_index=True,
+    )
+    # Poisson P(0 goals conceded) and P(2+ goals scored)
+    probabilities["p_cs"] = np.exp(-probabilities["xg_against"])
+    probabilities["p_score_2"] = 1 - np.exp(-probabilities["xg_for"]) * (
+        1 + probabilities["xg_for"]
+    )
+    return probabilities.sort_values(["team_id", "gameweek"], ignore_index=True)
+
+
+def poisson_sample(rate, size, rng):
+    """Sample Poisson goals by inverse transform, quicker than numpy's Poisson sampler for many small rates.
+
+    Args:
+        rate (numpy array): (fixture,) goal rates
+        size (int): number of samples per fixture
+        rng (numpy Generator): random number generator
+
+    Returns:
+        numpy array: (sample, fixture) goals
+    """
+    # (fixture, goals) Poisson cumulative distribution
+    goals = np.arange(MAX_GOALS)
+    log_pmf = (
+        goals * np.log(np.maximum(rate[:, None], 1e-12))
+        - rate[:, None]
+        - np.cumsum(np.log(np.maximum(goals, 1)))
+    )
+    cdf = np.cumsum(np.exp(log_pmf), axis=1).astype("float32")
+    u = rng.random((size, len(rate)), dtype="float32")
+    sample = np.zeros((size, len(rate)), dtype="int8")
+    for k in range(MAX_GOALS):
+        sample += u > cdf[:, k]
+    return sample
+
+
+def simulate_seasons(
+    fixture_data,
+    remaining,
+    h_rate,
+    a_rate,
+    n_seasons=SIM_SEASONS,
+    chunk=SIM_CHUNK,
+    seed=0,
+):
+    """Simulate completions of the season from played results and remaining fixture goal rates.
+    Teams are ranked by points, then goal difference, then goals scored.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data of played fixtures
+        remaining (pandas dataframe): remaining fixtures with h_id and a_id
+        h_rate (numpy array): (fixture,) remaining fixture home goal rates
+        a_rate (numpy array): (fixture,) remaining fixture away goal rates
+        n_seasons (int): number of simulated seasons
+        chunk (int): number of seasons simulated at once
+        seed (int): random seed
+
+    Returns:
+        (numpy array, numpy array): (team,) mean points, (team, position) position counts
+    """
+    rng = np.random.default_rng(seed)
+
+    # points, goal difference and goals scored so far
+    h_goals = fixture_data["h_goals"].to_numpy()
+    a_goals = fixture_data["a_goals"].to_numpy()
+    table = np.zeros((3, N_TEAMS))
+    for team_col, goals_for, goals_against in [
+        ("h_id", h_goals, a_goals),
+        ("a_id", a_goals, h_goals),
+    ]:
+        team_id = fixture_data[team_col].to_numpy()
+        points = 3 * (goals_for > goals_against) + (goals_for == goals_against)
+        np.add.at(table[0], team_id, points)
+        np.add.at(table[1], team_id, goals_for - goals_against)
+        np.add.at(table[2], team_id, goals_for)
+
+    # (fixture, team) home and away team indicators
+    home = np.zeros((len(remaining), N_TEAMS))
+    home[np.arange(len(remaining)), remaining["h_id"].to_numpy()] = 1
+    away = np.zeros((len(remaining), N_TEAMS))
+    away[np.arange(len(remaining)), remaining["a_id"].to_numpy()] = 1
+
+    points_sum = np.zeros(N_TEAMS)
+    position_counts = np.zeros(N_TEAMS * N_TEAMS, dtype="int64")
+    for start in range(0, n_seasons, chunk):
+        size = min(chunk, n_seasons - start)
+        # (season, fixture) simulated goals
+        h_sim = poisson_sample(h_rate, size, rng)
+        a_sim = poisson_sample(a_rate, size, rng)
+        h_points = 3.0 * (h_sim > a_sim) + (h_sim == a_sim)
+        a_points = 3.0 * (a_sim > h_sim) + (h_sim == a_sim)
+        h_sim = h_sim.astype("float64")
+        a_sim = a_sim.astype("float64")
+        # (season, team) final table
+        points = table[0] + h_points @ home + a_points @ away
+        goal_diff = table[1] + (h_sim - a_sim) @ home + (a_sim - h_sim) @ away
+        goals = table[2] + h_sim @ home + a_sim @ away
+        # rank on combined sort key, position 0 is first
+        sort_key = points * 1e6 + (goal_diff + 500) * 1e3 + goals
+        order = np.argsort(-sort_key, axis=1)
+        positions = np.empty_like(order)
+        np.put_along_axis(
+            positions, order, np.broadcast_to(np.arange(N_TEAMS), order.shape), axis=1
+        )
+        points_sum += points.sum(axis=0)
+        position_counts += np.bincount(
+            (np.arange(N_TEAMS) * N_TEAMS + positions).ravel(),
+            minlength=N_TEAMS * N_TEAMS,
+        )
+    return points_sum / n_seasons, position_counts.reshape(N_TEAMS, N_TEAMS)
+
+
+def season_simulator_func(gw, season, n_seasons=SIM_SEASONS):
+    """Project the final league table and fixture probabilities from team ratings for a gameweek.
+    Appends the league table projection to season_projection.csv, and the fixture probabilities to fixture_probabilities.csv, both keyed by rating gameweek.
+
+    Args:
+        gw (int): FPL gameweek of ratings, fixtures played before this gameweek are results and the rest are simulated
+        season (str): start year of EPL season to retrieve
+        n_seasons (int): number of simulated seasons
+    """
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    fixtures = pd.read_csv("data/" + season + "/season_data.csv")
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    fixture_data = fixture_data[fixture_data["gameweek"] < gw]
+    rating = pd.read_csv("data/" + season + "/" + SIM_MODEL + "_rating.csv")
+    rating = rating[rating["gameweek"] == gw].sort_values("team_id")
+    o_rating = rating["o_rating_" + SIM_VARIANT].to_numpy()
+    d_rating = rating["d_rating_" + SIM_VARIANT].to_numpy()
+
+    # goal rates of all fixtures, calibrated on played fixtures
+    if fixture_data.empty:
+        scale = rate_scale(fixtures, o_rating, d_rating, LEAGUE_XG)
+    else:
+        scale = rate_scale(
+            fixture_data,
+            o_rating,
+            d_rating,
+            (fixture_data["h_xg"] + fixture_data["a_xg"]).mean() / 2,
+        )
+    h_rate, a_rate = fixture_rates(fixtures, o_rating, d_rating, scale)
+    probabilities = fixture_probabilities(fixtures, h_rate, a_rate)
+    probabilities.insert(0, "rating_gameweek", gw)
+
+    # replace any existing fixture probabilities of the rating gameweek
+    probabilities_path = "data/" + season + "/fixture_probabilities.csv"
+    if os.path.exists(probabilities_path):
+        past_probabilities = pd.read_csv(probabilities_path)
+        # a file without rating gameweeks is replaced
+        if "rating_gameweek" in past_probabilities.columns:
+            probabilities = pd.concat(
+                [
+                    past_probabilities[past_probabilities["rating_gameweek"] != gw],
+                    probabilities,
+                ]
+            )
+    probabilities.to_csv(probabilities_path, index=False)
+
+    # simulate fixtures not yet played
+    played = fixtures["fixture_id"].isin(fixture_data["fixture_id"]).to_numpy()
+    points, position_counts = simulate_seasons(
+        fixture_data,
+        fixtures[~played],
+        h_rate[~played],
+        a_rate[~played],
+        n_seasons=n_seasons,
+        seed=gw,
+    )
+    position_p = position_counts / n_seasons
+    projection = pd.DataFrame(
+        {
+            "team_id": team_mapping["team_id"],
+            "team": team_mapping["team_name"],
+            "gameweek": gw,
+            "points": points,
+            "position": position_p @ np.arange(1, N_TEAMS + 1),
+            "p_title": position_p[:, 0],
+            "p_top_4": position_p[:, :4].sum(axis=1),
+            "p_relegation": position_p[:, -3:].sum(axis=1),
+        }
+    )
+
+    # replace any existing projection for the gameweek
+    projection_path = "data/" + season + "/season_projection.csv"
+    if os.path.exists(projection_path):
+        past_projection = pd.read_csv(projection_path)
+        projection = pd.concat(
+            [past_projection[past_projection["gameweek"] != gw], projection]
+        )
+    projection.to_csv(projection_path, index=False)
+
+
+if __name__ == "__main__":
+    # backfill season projection and fixture probability history for every rated gameweek
+    season = sys.argv[1]
+    rating = pd.read_csv("data/" + season + "/" + SIM_MODEL + "_rating.csv")
+    for gw in sorted(rating["gameweek"].unique()):
+        season_simulator_func(int(gw), season)
@@ -0,0 +1,235 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# half-life of appearance history weights, in team gameweeks
+XMIN_HALF_LIFE = 4
+# prior minutes per start and per substitute appearance, with the weight of one appearance
+PRIOR_START_MINUTES = 80
+PRIOR_SUB_MINUTES = 15
+# availability by FPL status when no chance of playing is given
+STATUS_AVAILABILITY = {"a": 1.0, "d": 0.5, "i": 0.0, "s": 0.0, "u": 0.0, "n": 0.0}
+# exponentially weighted appearance history sums, per player
+STATE_SUMS = ["fixtures", "starts", "subs", "start_minutes", "sub_minutes"]
+
+
+def appearance_arrays(player_data, player_ids, gws):
+    """Dense (player, gameweek) appearance arrays from Understat player data.
+
+    Args:
+        player_data (pandas dataframe): Understat player (per fixture) data
+        player_ids (numpy array): (player,) Understat player ids
+        gws (list): gameweeks
+
+    Returns:
+        dict: starts, subs, start_minutes, sub_minutes and team_id (-1 if no appearance) (player, gameweek) arrays
+    """
+    player_index = pd.Index(player_ids)
+    rows = player_index.get_indexer(player_data["player_id"])
+    cols = pd.Index(gws).get_indexer(player_data["gameweek"])
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[keep], cols[keep]
+    player_data = player_data[keep]
+
+    start = (player_data["position"] != "Sub").to_numpy()
+    minutes = player_data["time"].to_numpy(dtype="float64")
+    arrays = {}
+    for name, values in [
+        ("starts", start.astype("float64")),
+        ("subs", (~start).astype("float64")),
+        ("start_minutes", np.where(start, minutes, 0.0)),
+        ("sub_minutes", np.where(start, 0.0, minutes)),
+    ]:
+        arrays[name] = np.zeros((len(player_ids), len(gws)))
+        np.add.at(arrays[name], (rows, cols), values)
+    arrays["team_id"] = np.full((len(player_ids), len(gws)), -1, dtype="int64")
+    arrays["team_id"][rows, cols] = player_data["team_id"].to_numpy()
+    return arrays
+
+
+def team_fixture_counts(fixture_data, gws, n_teams=20):
+    """Number of played fixtures per team per gameweek.
+
+    Args:
+        fixture_data (pandas dataframe): EPL fixture level data of played fixtures
+        gws (list): gameweeks
+        n_teams (int): number of teams
+
+    Returns:
+        numpy array: (team, gameweek) fixture counts
+    """
+    cols = pd.Index(gws).get_indexer(fixture_data["gameweek"])
+    keep = cols >= 0
+    counts = np.zeros((n_teams, len(gws)))
+    for team_col in ["h_id", "a_id"]:
+        np.add.at(counts, (fixture_data[team_col].to_numpy()[keep], cols[keep]), 1)
+    return counts
+
+
+def update_state(state, player_data, fixture_data, gws):
+    """Update exponentially weighted appearance history with new gameweeks.
+    A player's history starts at their first appearance, after which every gameweek their team plays is observed (no appearance counts as 0 minutes).
+    Weights decay per observed team gameweek, vectorized over players.
+
+    Args:
+        state (dict): player_id, team_id, gameweek and STATE_SUMS (player,) arrays, from load_state
+        player_data (pandas dataframe): Understat player (per fixture) data
+        fixture_data (pandas dataframe): EPL fixture level data
+        gws (list): new gameweeks, in order
+
+    Returns:
+        dict: updated state
+    """
+    # add players appearing for the first time
+    new_players = np.setdiff1d(
+        player_data[player_data["gameweek"].isin(gws)]["player_id"].unique(),
+        state["player_id"],
+    )
+    state = {
+        "player_id": np.concatenate([state["player_id"], new_players]),
+        "team_id": np.concatenate(
+            [state["team_id"], np.full(len(new_players), -1, dtype="int64")]
+        ),
+        "gameweek": state["gameweek"],
+        **{
+            name: np.concatenate([state[name], np.zeros(len(new_players))])
+            for name in STATE_SUMS
+        },
+    }
+
+    arrays = appearance_arrays(player_data, state["player_id"], gws)
+    team_fixtures = team_fixture_counts(fixture_data, gws)
+    decay = 0.5 ** (1 / XMIN_HALF_LIFE)
+    for g, gw in enumerate(gws):
+        # current team of each player, unchanged without an appearance
+        appeared = arrays["team_id"][:, g] >= 0
+        state["team_id"] = np.where(appeared, arrays["team_id"][:, g], state["team_id"])
+        fixtures = np.where(
+            state["team_id"] >= 0, team_fixtures[state["team_id"], g], 0
+        )
+        observed = fixtures > 0
+        for name in STATE_SUMS:
+            value = fixtures if name == "fixtures" else arrays[name][:, g]
+            state[name] = np.where(observed, decay * state[name] + value, state[name])
+        state["gameweek"] = gw
+    return state
+
+
+def empty_state():
+    """Empty xMinutes model state, with no gameweeks processed.
+
+    Returns:
+        dict: player_id, team_id, gameweek (last processed) and STATE_SUMS (player,) arrays
+    """
+    return {
+        "player_id": np.array([], dtype="int64"),
+        "team_id": np.array([], dtype="int64"),
+        "gameweek": 0,
+        **{name: np.zeros(0) for name in STATE_SUMS},
+    }
+
+
+def load_state(season):
+    """Read the xMinutes model state of a season, or an empty state.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        dict: player_id, team_id, gameweek (last processed) and STATE_SUMS (player,) arrays
+    """
+    state_path = "data/" + season + "/xminutes_state.npz"
+    if os.path.exists(state_path):
+        return dict(np.load(state_path))
+    return empty_state()
+
+
+def availability(player_mapping):
+    """Probability each player is available, from FPL chance of playing, or status if not given (available if neither is recorded).
+
+    Args:
+        player_mapping (pandas dataframe): player mapping with (optionally) status and chance_of_playing_next_round
+
+    Returns:
+        pandas series: availability per player, aligned to player_mapping
+    """
+    available = pd.Series(1.0, index=player_mapping.index)
+    if "status" in player_mapping.columns:
+        available = player_mapping["status"].map(STATUS_AVAILABILITY).fillna(1.0)
+    if "chance_of_playing_next_round" in player_mapping.columns:
+        chance = player_mapping["chance_of_playing_next_round"] / 100
+        available = chance.fillna(available)
+    return available
+
+
+def xminutes_table(state, player_mapping, gw):
+    """Expected minutes per fixture of each player.
+
+    Args:
+        state (dict): xMinutes model state, from update_state
+        player_mapping (pandas dataframe): player mapping with player_id and (optionally) status and chance_of_playing_next_round
+        gw (int): FPL gameweek to assign to expected minutes
+
+    Returns:
+        pandas dataframe: player_id, gameweek, p_start, p_sub, start_minutes, sub_minutes, availability, xminutes
+    """
+    fixtures = np.maximum(state["fixtures"], 1e-9)
+    table = pd.DataFrame(
+        {
+            "player_id": state["player_id"].astype("int64"),
+            "gameweek": gw,
+            "p_start": state["starts"] / fixtures,
+            "p_sub": state["subs"] / fixtures,
+            "start_minutes": (state["start_minutes"] + PRIOR_START_MINUTES)
+            / (state["starts"] + 1),
+            "sub_minutes": (state["sub_minutes"] + PRIOR_SUB_MINUTES)
+            / (state["subs"] + 1),
+        }
+    )
+    mapped = player_mapping.dropna(subset="player_id")
+    available = pd.Series(
+        availability(mapped).to_numpy(), index=mapped["player_id"].astype("int64")
+    )
+    table["availability"] = (
+        table["player_id"].map(available[~available.index.duplicated()]).fillna(1.0)
+    )
+    table["xminutes"] = table["availability"] * (
+        table["p_start"] * table["start_minutes"]
+        + table["p_sub"] * table["sub_minutes"]
+    )
+    return table
+
+
+def xminutes_func(gw, season):
+    """Update the xMinutes model with gameweeks played before gw, and write expected minutes for gw.
+
+    Args:
+        gw (int): FPL gameweek to assign to expected minutes
+        season (str): start year of EPL season to retrieve
+    """
+    player_data = pd.read_csv("data/" + season + "/player_data.csv")
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    player_mapping = pd.read_csv("data/" + season + "/player_mapping.csv")
+
+    # only gameweeks not yet in the state are processed, rebuild if state is ahead
+    state = load_state(season)
+    if state["gameweek"] >= gw:
+        state = empty_state()
+    state = update_state(
+        state, player_data, fixture_data, list(range(int(state["gameweek"]) + 1, gw))
+    )
+    np.savez("data/" + season + "/xminutes_state.npz", **state)
+    xminutes_table(state, player_mapping, gw).to_csv(
+        "data/" + season + "/xminutes.csv", index=False
+    )
+
+
+if __name__ == "__main__":
+    # rebuild expected minutes for the gameweek after the latest gameweek
+    season = sys.argv[1]
+    app_vars = pd.read_csv("data/app_vars.csv")
+    latest_gw = app_vars[app_vars["season"].str[:4] == season]["latest_gameweek"].item()
+    if os.path.exists("data/" + season + "/xminutes_state.npz"):
+        os.remove("data/" + season + "/xminutes_state.npz")
+    xminutes_func(latest_gw + 1, season)
@@ -0,0 +1,259 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from functions.fixture_calendar import fixture_calendar_index, fixture_counts
+
+# squad and starting XI players per element_type (1 GK, 2 DEF, 3 MID, 4 FWD)
+SQUAD_COUNTS = {1: 2, 2: 5, 3: 5, 4: 3}
+XI_MIN = {1: 1, 2: 3, 3: 2, 4: 1}
+XI_MAX = {1: 1, 2: 5, 3: 5, 4: 3}
+CLUB_LIMIT = 3
+CHIPS = {
+    "bench_boost": "Bench Boost",
+    "triple_captain": "Triple Captain",
+    "free_hit": "Free Hit",
+}
+
+
+@st.cache_data
+def chip_players(season):
+    """Read points projections of players with their FPL position, price and team.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        pandas dataframe: web_name_pos, element_type, now_cost, team_id and GW projected points columns, indexed by player_id
+    """
+    projections = pd.read_csv("data/" + season + "/points_projections.csv")
+    player_mapping = pd.read_csv("data/" + season + "/player_mapping.csv")
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    player_mapping = player_mapping.dropna(subset=["player_id", "fpl_id"]).astype(
+        {"player_id": "int64"}
+    )
+    player_mapping["web_name_pos"] = (
+        player_mapping["web_name"] + " " + player_mapping["pos"]
+    )
+
+    # older projections carry price, position and team name, with bare gameweek columns
+    projections = projections.rename(
+        columns={c: "GW " + c for c in projections.columns if c.isdigit()}
+    )
+    if "team_name" in projections.columns:
+        projections["team_id"] = projections["team_name"].map(
+            team_mapping.set_index("team_name")["team_id"]
+        )
+    mapping_columns = [
+        c
+        for c in ["web_name_pos", "element_type", "now_cost", "team_id"]
+        if c not in projections.columns
+    ]
+    players = projections.merge(
+        player_mapping[["player_id"] + mapping_columns].drop_duplicates(
+            subset="player_id"
+        ),
+        how="inner",
+        on="player_id",
+    ).dropna(subset=["element_type", "now_cost", "team_id"])
+    players = players.drop_duplicates(subset="player_id").astype(
+        {"element_type": "int64", "team_id": "int64"}
+    )
+    gw_columns = [c for c in players.columns if c.startswith("GW ")]
+    return players.set_index("player_id")[
+        ["web_name_pos", "element_type", "now_cost", "team_id"] + gw_columns
+    ]
+
+
+def projection_gameweeks(players):
+    """Gameweeks with points projections.
+
+    Args:
+        players (pandas dataframe): player projections, from chip_players
+
+    Returns:
+        list: gameweeks
+    """
+    return [int(c[3:]) for c in players.columns if c.startswith("GW ")]
+
+
+def greedy_selection(
+    points, element_types, team_ids, costs, budget, size, min_counts, max_counts
+):
+    """Select players in order of projected points, within position, club and budget limits.
+
+    Args:
+        points (numpy array): projected points of each player
+        element_types (numpy array): FPL position of each player
+        team_ids (numpy array): team of each player
+        costs (numpy array): price of each player
+        budget (float): total price limit
+        size (int): number of players to select
+        min_counts (dict): minimum players per element_type
+        max_counts (dict): maximum players per element_type
+
+    Returns:
+        list: row positions of selected players
+    """
+    min_cost = costs.min()
+    counts = {t: 0 for t in min_counts}
+    clubs = {}
+    selected = []
+    spent = 0.0
+    for player in np.argsort(-points, kind="stable"):
+        et = element_types[player]
+        team = team_ids[player]
+        if counts[et] >= max_counts[et] or clubs.get(team, 0) >= CLUB_LIMIT:
+            continue
+        # keep slots for unfilled position minimums, and budget for the remaining slots
+        need = sum(max(min_counts[t] - counts[t] - (t == et), 0) for t in min_counts)
+        if len(selected) + 1 + need > size:
+            continue
+        if spent + costs[player] + min_cost * (size - len(selected) - 1) > budget:
+            continue
+        selected.append(player)
+        counts[et] += 1
+        clubs[team] = clubs.get(team, 0) + 1
+        spent += costs[player]
+        if len(selected) == size:
+            break
+    return selected
+
+
+def squad_gameweek_points(points, element_types):
+    """Best XI, bench and captain projected points of a squad in every gameweek.
+
+    Args:
+        points (numpy array): projected points of each squad player and gameweek, shape (player, gameweek)
+        element_types (numpy array): FPL position of each squad player
+
+    Returns:
+        (numpy array, numpy array, numpy array): best XI points including captain, bench points, captain points per gameweek
+    """
+    xi = np.zeros(points.shape[1])
+    flex = []
+    for et in XI_MIN:
+        position = -np.sort(-points[element_types == et], axis=0)
+        xi += position[: XI_MIN[et]].sum(axis=0)
+        flex.append(position[XI_MIN[et] : XI_MAX[et]])
+    flex = -np.sort(-np.concatenate(flex), axis=0)
+    xi += flex[: 11 - sum(XI_MIN.values())].sum(axis=0)
+    captain = points.max(axis=0)
+    return xi + captain, points.sum(axis=0) - xi, captain
+
+
+@st.cache_data
+def free_hit_points(season, gw_start, gw_end, budget):
+    """Projected points of the greedy best XI (and captain) of each gameweek, as a Free Hit squad.
+    Budget for the cheapest bench is kept aside.
+
+    Args:
+        season (str): start year of EPL season
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        budget (float): squad value plus money in the bank
+
+    Returns:
+        numpy array: Free Hit points per gameweek
+    """
+    players = chip_players(season)
+    element_types = players["element_type"].to_numpy()
+    team_ids = players["team_id"].to_numpy()
+    costs = players["now_cost"].to_numpy(dtype="float64")
+    bench_cost = (
+        costs[element_types == 1].min() + np.sort(costs[element_types > 1])[:3].sum()
+    )
+    points = players[["GW " + str(gw) for gw in range(gw_start, gw_end + 1)]].to_numpy()
+    free_hit = np.zeros(points.shape[1])
+    for gw in range(points.shape[1]):
+        xi = greedy_selection(
+            points[:, gw],
+            element_types,
+            team_ids,
+            costs,
+            budget - bench_cost,
+            11,
+            XI_MIN,
+            XI_MAX,
+        )
+        free_hit[gw] = points[xi, gw].sum() + points[xi, gw].max()
+    return free_hit
+
+
+@st.cache_data
+def chip_gains(season, squad, gw_start, gw_end, bank=0.0):
+    """Projected points gain of each chip in every gameweek, for a squad.
+    Cached per squad, a sorted tuple of player ids.
+
+    Args:
+        season (str): start year of EPL season
+        squad (tuple): Understat player ids of the 15 squad players
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        bank (float): money in the bank
+
+    Returns:
+        pandas dataframe: gameweek, xi_points, bench_boost, triple_captain, free_hit gains, doubles and blanks (squad players with a double or blank gameweek)
+    """
+    players = chip_players(season)
+    squad_players = players.loc[list(squad)]
+    gw_columns = ["GW " + str(gw) for gw in range(gw_start, gw_end + 1)]
+    xi, bench, captain = squad_gameweek_points(
+        squad_players[gw_columns].to_numpy(),
+        squad_players["element_type"].to_numpy(),
+    )
+    budget = squad_players["now_cost"].sum() + bank
+
+    # double and blank gameweeks of squad players
+    team_gw, _ = fixture_calendar_index(
+        pd.read_csv("data/" + season + "/season_data.csv")
+    )
+    squad_counts = fixture_counts(team_gw, gw_start, gw_end)[
+        squad_players["team_id"].to_numpy()
+    ]
+    return pd.DataFrame(
+        {
+            "gameweek": range(gw_start, gw_end + 1),
+            "xi_points": xi,
+            "bench_boost": bench,
+            "triple_captain": captain,
+            "free_hit": free_hit_points(season, gw_start, gw_end, budget) - xi,
+            "doubles": (squad_counts > 1).sum(axis=0),
+            "blanks": (squad_counts == 0).sum(axis=0),
+        }
+    )
+
+
+def chip_schedules(gains, chips, n=10):
+    """Rank schedules of chips, one chip per gameweek, by total projected points gain.
+    Every combination of chip gameweeks is scored at once by broadcasting the chip gains.
+
+    Args:
+        gains (pandas dataframe): chip gains per gameweek, from chip_gains
+        chips (list): chips to schedule, see CHIPS
+        n (int): number of schedules
+
+    Returns:
+        pandas dataframe: gameweek and gain of each chip and total gain per schedule, ranked by total gain
+    """
+    n_gameweeks = len(gains)
+    k = len(chips)
+    total = np.zeros((n_gameweeks,) * k)
+    for i, chip in enumerate(chips):
+        shape = [1] * k
+        shape[i] = n_gameweeks
+        total = total + gains[chip].to_numpy().reshape(shape)
+
+    # one chip per gameweek
+    weeks = np.indices(total.shape)
+    for i in range(k):
+        for j in range(i + 1, k):
+            total[weeks[i] == weeks[j]] = -np.inf
+    order = np.argsort(-total, axis=None)[:n]
+    order = order[np.isfinite(total.ravel()[order])]
+    schedule = np.unravel_index(order, total.shape)
+
+    schedules = pd.DataFrame({"total": total.ravel()[order]})
+    for i, chip in enumerate(chips):
+        schedules[chip + "_gw"] = gains["gameweek"].to_numpy()[schedule[i]]
+        schedules[chip] = gains[chip].to_numpy()[schedule[i]]
+    return schedules
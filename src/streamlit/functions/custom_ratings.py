@@ -0,0 +1,116 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from functions.fact_table import load_fact_table
+
+# data source label of ratings recomputed over a custom gameweek window
+CUSTOM_SOURCE = "Custom Window"
+N_TEAMS = 20
+
+
+@st.cache_data
+def team_fixture_arrays(season):
+    """Score matrix cells and xG of each team fixture of a season, the inputs of a live ODM solve.
+    Each fixture gives two team fixtures: xG of the away team vs the home team, and of the home team vs the away team.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        dict: cell (flat score matrix index, team i * 20 + team j for xG team j got vs team i), gameweek, xg and pen_xg (penalty xG) of each team fixture, red_card (fixture with a red card)
+    """
+    fixture_data = pd.read_csv("data/" + season + "/fixture_data.csv")
+    facts, _ = load_fact_table(season)
+
+    # penalty xG and red cards of each team in each fixture
+    facts = facts[facts["player_id"] >= 0]
+    team_facts = (
+        facts.assign(pen_xg=facts["xG"] - facts["npxG"])
+        .groupby(["fixture_id", "team_id"])[["pen_xg", "red_card"]]
+        .sum()
+    )
+    h_keys = pd.MultiIndex.from_arrays(
+        [fixture_data["fixture_id"], fixture_data["h_id"]]
+    )
+    a_keys = pd.MultiIndex.from_arrays(
+        [fixture_data["fixture_id"], fixture_data["a_id"]]
+    )
+    h_facts = team_facts.reindex(h_keys).fillna(0)
+    a_facts = team_facts.reindex(a_keys).fillna(0)
+
+    h_id = fixture_data["h_id"].to_numpy()
+    a_id = fixture_data["a_id"].to_numpy()
+    red_card = (h_facts["red_card"].to_numpy() + a_facts["red_card"].to_numpy()) > 0
+    return {
+        "cell": np.concatenate([h_id * N_TEAMS + a_id, a_id * N_TEAMS + h_id]),
+        "gameweek": np.tile(fixture_data["gameweek"].to_numpy(), 2),
+        "xg": np.concatenate([fixture_data["a_xg"], fixture_data["h_xg"]]),
+        "pen_xg": np.concatenate([a_facts["pen_xg"], h_facts["pen_xg"]]),
+        "red_card": np.tile(red_card, 2),
+    }
+
+
+def odm_solve(A, tol=1e-12, max_iter=2000):
+    """ODM solve of a single score matrix: iteratively update offensive and defensive ratings until converged.
+    Sparse score matrices (short windows) converge slowly or not at all, so iterations are capped for interactive use.
+
+    Args:
+        A (numpy array): (team, team) score matrix, A[i, j] = score team j got vs team i
+        tol (float): maximum relative change in defensive ratings at convergence
+        max_iter (int): maximum number of iterations
+
+    Returns:
+        (numpy array, numpy array, bool): offensive ratings, defensive ratings, whether the solve converged
+    """
+    # small perturbation to aid convergence
+    A = A + 0.0001
+    d = np.ones(len(A))
+    for _ in range(max_iter):
+        o = A.T @ (1 / d)
+        d_new = A @ (1 / o)
+        converged = np.max(np.abs(d_new / d - 1)) < tol
+        d = d_new
+        if converged:
+            break
+    return o, d, converged
+
+
+@st.cache_data
+def custom_ratings(
+    season, gw_start, gw_end, penalty_weight=1.0, exclude_red_cards=False
+):
+    """ODM ratings over a custom gameweek window and xG weighting, solved live and memoized per window.
+
+    Args:
+        season (str): start year of EPL season
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        penalty_weight (float): weight of penalty xG, 0 for non-penalty xG only. Between [0-1]
+        exclude_red_cards (bool): exclude fixtures with a red card
+
+    Returns:
+        (pandas dataframe, bool): ratings of each team with the columns of the rating database (o_rating_custom, d_rating_custom), whether the solve converged
+    """
+    fixtures = team_fixture_arrays(season)
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+
+    # weighted xG score matrix of the window
+    weights = (fixtures["gameweek"] >= gw_start) & (fixtures["gameweek"] <= gw_end)
+    if exclude_red_cards:
+        weights &= ~fixtures["red_card"]
+    scores = np.maximum(fixtures["xg"] - (1 - penalty_weight) * fixtures["pen_xg"], 0)
+    A = np.bincount(
+        fixtures["cell"], weights=scores * weights * 100, minlength=N_TEAMS * N_TEAMS
+    ).reshape(N_TEAMS, N_TEAMS)
+    o, d, converged = odm_solve(A)
+
+    ratings = pd.DataFrame(
+        {
+            "team_id": team_mapping["team_id"],
+            "team": team_mapping["team_name"],
+            "gameweek": gw_end + 1,
+            "o_rating_custom": o,
+            "d_rating_custom": d,
+        }
+    )
+    return ratings, converged
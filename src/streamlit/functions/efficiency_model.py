@@ -0,0 +1,127 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from statistics import NormalDist
+
+# credible interval mass of posterior efficiency
+EFFICIENCY_INTERVAL = 0.9
+# lower bound on the variance of conversion rates between players, observed spread is mostly noise so this sets prior strength
+MIN_PRIOR_VARIANCE = 0.04
+
+
+def gamma_prior(outcomes, expected, groups, n_groups):
+    """Method of moments Gamma prior of conversion rate (outcomes per expected outcome) for each group of players.
+    Outcomes are Poisson with mean conversion rate times expected outcomes, so the spread of observed rates is sampling noise (rate / expected) plus prior variance.
+
+    Args:
+        outcomes (numpy array): (player,) outcomes, e.g. non-penalty goals
+        expected (numpy array): (player,) expected outcomes, e.g. npxG
+        groups (numpy array): (player,) group index of each player
+        n_groups (int): number of groups
+
+    Returns:
+        (numpy array, numpy array): (group,) prior shape, (group,) prior rate
+    """
+    players = np.bincount(groups, weights=expected > 0, minlength=n_groups)
+    expected_sum = np.bincount(groups, weights=expected, minlength=n_groups)
+    mean = np.bincount(groups, weights=outcomes, minlength=n_groups) / np.maximum(
+        expected_sum, 1e-9
+    )
+    # expected weighted squared deviation of player rates, less Poisson noise
+    rate = outcomes / np.maximum(expected, 1e-9)
+    deviation = np.where(expected > 0, expected * (rate - mean[groups]) ** 2, 0)
+    variance = (
+        np.bincount(groups, weights=deviation, minlength=n_groups) - players * mean
+    ) / np.maximum(expected_sum, 1e-9)
+    variance = np.maximum(variance, MIN_PRIOR_VARIANCE)
+    mean = np.maximum(mean, 1e-3)
+    return mean**2 / variance, mean / variance
+
+
+def gamma_quantile(shape, rate, q):
+    """Approximate Gamma distribution quantiles via the Wilson-Hilferty transformation.
+
+    Args:
+        shape (numpy array): Gamma shapes
+        rate (numpy array): Gamma rates
+        q (float): quantile, between (0-1)
+
+    Returns:
+        numpy array: quantiles
+    """
+    z = NormalDist().inv_cdf(q)
+    return (
+        shape
+        / rate
+        * np.maximum(1 - 1 / (9 * shape) + z * np.sqrt(1 / (9 * shape)), 0) ** 3
+    )
+
+
+def posterior_efficiency(outcomes, expected, groups, n_groups):
+    """Empirical Bayes efficiency of each player, as outcomes above expected outcomes.
+    Each player's conversion rate has a Gamma posterior, shrinking players with little expected output toward their group rate.
+
+    Args:
+        outcomes (numpy array): (player,) outcomes, e.g. non-penalty goals
+        expected (numpy array): (player,) expected outcomes, e.g. npxG
+        groups (numpy array): (player,) group index of each player
+        n_groups (int): number of groups
+
+    Returns:
+        (numpy array, numpy array, numpy array): (player,) posterior mean efficiency, lower and upper credible bounds
+    """
+    prior_shape, prior_rate = gamma_prior(outcomes, expected, groups, n_groups)
+    shape = prior_shape[groups] + outcomes
+    rate = prior_rate[groups] + expected
+    tail = (1 - EFFICIENCY_INTERVAL) / 2
+    return (
+        (shape / rate - 1) * expected,
+        (gamma_quantile(shape, rate, tail) - 1) * expected,
+        (gamma_quantile(shape, rate, 1 - tail) - 1) * expected,
+    )
+
+
+@st.cache_data
+def efficiency_estimates(season, gw_start, gw_end):
+    """Shrinkage estimates of goal and assist efficiency of every player over a gameweek range, with FPL position priors.
+    Cached per season and gameweek range.
+
+    Args:
+        season (str): start year of EPL season
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+
+    Returns:
+        pandas dataframe: player_id, npxG_eff, npxG_eff_lo, npxG_eff_hi, xA_eff, xA_eff_lo, xA_eff_hi, in outcomes over the gameweek range
+    """
+    player_data = pd.read_csv("data/" + season + "/player_data.csv")
+    player_mapping = pd.read_csv("data/" + season + "/player_mapping.csv")
+    player_data = player_data[player_data["gameweek"].between(gw_start, gw_end)]
+    player_data["npgoals"] = player_data["goals"] - player_data["penalty_scored"]
+    totals = player_data.groupby(["player_id"], as_index=False)[
+        ["npxG", "npgoals", "xA", "assists"]
+    ].sum()
+
+    # FPL position groups, 0 for players without an FPL position
+    positions = player_mapping.dropna(subset="player_id").drop_duplicates(
+        subset="player_id"
+    )
+    groups = (
+        totals["player_id"]
+        .map(positions.set_index("player_id")["element_type"])
+        .fillna(0)
+        .to_numpy(dtype="int64")
+    )
+
+    estimates = pd.DataFrame({"player_id": totals["player_id"]})
+    for expected, outcomes in [("npxG", "npgoals"), ("xA", "assists")]:
+        mean, lo, hi = posterior_efficiency(
+            totals[outcomes].to_numpy(dtype="float64"),
+            totals[expected].to_numpy(dtype="float64"),
+            groups,
+            5,
+        )
+        estimates[expected + "_eff"] = mean
+        estimates[expected + "_eff_lo"] = lo
+        estimates[expected + "_eff_hi"] = hi
+    return estimates
@@ -0,0 +1,57 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+
+@st.cache_data
+def load_fact_table(season):
+    """Read the player gameweek fact table of Understat and FPL stats, with its sorted key index.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        (pandas dataframe, dict): fact table sorted by gameweek then player, index of player_order (row positions sorted by player_id) and player_id (sorted ids)
+    """
+    facts = pd.read_csv("data/" + season + "/player_gameweek_facts.csv")
+    order = np.argsort(facts["player_id"].to_numpy(), kind="stable")
+    return facts, {
+        "player_order": order,
+        "player_id": facts["player_id"].to_numpy()[order],
+    }
+
+
+def gameweek_rows(facts, gw_start, gw_end):
+    """Fact table rows of a gameweek range, as a slice of the gameweek sorted table.
+
+    Args:
+        facts (pandas dataframe): fact table, from load_fact_table
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+
+    Returns:
+        pandas dataframe: rows of the gameweek range
+    """
+    gameweeks = facts["gameweek"].to_numpy()
+    start = np.searchsorted(gameweeks, gw_start, side="left")
+    end = np.searchsorted(gameweeks, gw_end, side="right")
+    return facts.iloc[start:end]
+
+
+def player_rows(facts, index, player_ids):
+    """Fact table rows of players, without a scan of the table.
+
+    Args:
+        facts (pandas dataframe): fact table, from load_fact_table
+        index (dict): fact table index, from load_fact_table
+        player_ids (list): Understat player ids
+
+    Returns:
+        pandas dataframe: rows of the players, in gameweek order
+    """
+    start = np.searchsorted(index["player_id"], player_ids, side="left")
+    end = np.searchsorted(index["player_id"], player_ids, side="right")
+    rows = np.sort(
+        np.concatenate([index["player_order"][s:e] for s, e in zip(start, end)] + [[]])
+    ).astype("int64")
+    return facts.iloc[rows]
@@ -0,0 +1,43 @@
+import streamlit as st
+import numpy as np
+
+
+@st.cache_data
+def fixture_calendar_index(fixtures):
+    """Build fixture calendar lookups from the season fixtures dataframe.
+    Double gameweeks hold several fixtures for a team, blank gameweeks hold none.
+
+    Args:
+        fixtures (pandas dataframe): EPL season fixtures dataframe
+
+    Returns:
+        (dict, dict): (team_id, gameweek) -> list of (fixture_id, opponent_id, is_home), fixture_id -> gameweek
+    """
+    team_gw = {}
+    fixture_gw = {}
+    for fixture_id, h_id, a_id, gw in zip(
+        fixtures["fixture_id"], fixtures["h_id"], fixtures["a_id"], fixtures["gameweek"]
+    ):
+        team_gw.setdefault((h_id, gw), []).append((fixture_id, a_id, True))
+        team_gw.setdefault((a_id, gw), []).append((fixture_id, h_id, False))
+        fixture_gw[fixture_id] = gw
+    return team_gw, fixture_gw
+
+
+def fixture_counts(team_gw, gw_start, gw_end, n_teams=20):
+    """Number of fixtures per team per gameweek, 0 for blank and >1 for double gameweeks.
+
+    Args:
+        team_gw (dict): (team_id, gameweek) -> fixture list, from fixture_calendar_index
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        n_teams (int): number of teams
+
+    Returns:
+        numpy array: (team, gameweek) fixture counts
+    """
+    counts = np.zeros((n_teams, gw_end - gw_start + 1), dtype="int64")
+    for (team_id, gw), team_fixtures in team_gw.items():
+        if gw_start <= gw <= gw_end:
+            counts[team_id, gw - gw_start] = len(team_fixtures)
+    return counts
@@ -0,0 +1,137 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from functions.generate_fixture_df import generate_fixtures_df
+from functions.team_ratings import ratings_as_of
+
+# fixture window lengths, in gameweeks
+SWING_WINDOWS = range(1, 9)
+
+
+def window_fixture_ratios(values, inverse=False, windows=SWING_WINDOWS):
+    """Fixture ratios of every team, start gameweek and window length, from cumulative sums of fixture values.
+
+    Args:
+        values (numpy array): fixture values of each team and gameweek, shape (team, gameweek), gameweek 1 at index 0
+        inverse (bool): ratio of the mean to the window sum, for fixture values where lower is easier
+        windows (range): window lengths, in gameweeks
+
+    Returns:
+        numpy array: window fixture value sums as a percentage of the mean of all teams, shape (team, start gameweek, window), NaN where the window passes the final gameweek
+    """
+    n_teams, n_gameweeks = values.shape
+    cumulative = np.concatenate(
+        [np.zeros((n_teams, 1)), np.cumsum(values, axis=1)], axis=1
+    )
+    starts = np.arange(1, n_gameweeks + 1)[:, None]
+    ends = starts + np.array(windows)[None, :] - 1
+    valid = ends <= n_gameweeks
+    sums = cumulative[:, np.minimum(ends, n_gameweeks)] - cumulative[:, starts - 1]
+    sums[:, ~valid] = np.nan
+    if inverse:
+        return sums.mean(axis=0, keepdims=True) / sums * 100
+    return sums / sums.mean(axis=0, keepdims=True) * 100
+
+
+@st.cache_data
+def fixture_windows(season, model_option, home_advantage, gameweek, overrides=()):
+    """Offence and defence fixture ratios of every team, start gameweek and window length of a season.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label, see RATING_SOURCES
+        home_advantage (float): Percentage by which home fixtures are stronger than away fixtures. Between [0-1]
+        gameweek (int): FPL gameweek of the team ratings used
+        overrides (tuple): team strength overrides, from override_key
+
+    Returns:
+        dict: team (team names), fixtures (opponents per team and gameweek), o_fr / d_fr (fixture ratios, shape (team, start gameweek, window))
+    """
+    fixtures = pd.read_csv("data/" + season + "/season_data.csv")
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    odm_data = ratings_as_of(season, model_option, gameweek)
+    o_fx, o_fx_v, _, _, _, d_fx_v, _, _ = generate_fixtures_df(
+        fixtures,
+        team_mapping,
+        odm_data,
+        1,
+        fixtures["gameweek"].max(),
+        model_option,
+        home_advantage,
+        overrides,
+    )
+    teams = o_fx.index.sort_values()
+    o_fx = o_fx.loc[teams].drop(columns="FR")
+    o_values = o_fx_v.loc[teams].drop(columns="FR").to_numpy(dtype="float64")
+    d_values = d_fx_v.loc[teams].drop(columns="FR").to_numpy(dtype="float64")
+    return {
+        "team": teams.to_list(),
+        "fixtures": o_fx.to_numpy(),
+        "o_fr": window_fixture_ratios(o_values),
+        "d_fr": window_fixture_ratios(d_values, inverse=True),
+    }
+
+
+def fixture_swings(windows, side, window, gw_from, gw_to=None):
+    """Largest fixture swing of each team, from a window of fixtures to the next window of the same length.
+    A positive swing is a run of fixtures that turns easier.
+
+    Args:
+        windows (dict): fixture windows, from fixture_windows
+        side (str): "o" for offence or "d" for defence
+        window (int): window length, in gameweeks
+        gw_from (int): First gameweek of the window before the swing
+        gw_to (int): Last start gameweek of the window after the swing, default all
+
+    Returns:
+        pandas dataframe: team, gw, fr_before, fr_after, rank_before, rank_after, swing and fixtures after the swing per team, sorted by swing
+    """
+    fr = windows[side + "_fr"][:, :, window - 1]
+    last_start = fr.shape[1] - window + 1
+    gw_to = last_start if gw_to is None else min(gw_to, last_start)
+
+    # window before and after each swing gameweek
+    swing_gws = np.arange(gw_from + window, gw_to + 1)
+    if len(swing_gws) == 0:
+        return pd.DataFrame(
+            columns=[
+                "team",
+                "gw",
+                "fr_before",
+                "fr_after",
+                "rank_before",
+                "rank_after",
+                "swing",
+                "fixtures",
+            ]
+        )
+    before = fr[:, swing_gws - window - 1]
+    after = fr[:, swing_gws - 1]
+    swing = after - before
+    rank_before = (-before).argsort(axis=0).argsort(axis=0) + 1
+    rank_after = (-after).argsort(axis=0).argsort(axis=0) + 1
+
+    # largest swing of each team
+    best = np.argmax(swing, axis=1)
+    teams = np.arange(fr.shape[0])
+    gws = swing_gws[best]
+    return pd.DataFrame(
+        {
+            "team": windows["team"],
+            "gw": gws,
+            "fr_before": before[teams, best],
+            "fr_after": after[teams, best],
+            "rank_before": rank_before[teams, best],
+            "rank_after": rank_after[teams, best],
+            "swing": swing[teams, best],
+            "fixtures": [
+                ", ".join(
+                    gw_fixtures if gw_fixtures else "-"
+                    for gw_fixtures in windows["fixtures"][
+                        team, gw - 1 : gw - 1 + window
+                    ]
+                )
+                for team, gw in zip(teams, gws)
+            ],
+        }
+    ).sort_values("swing", ascending=False, ignore_index=True)
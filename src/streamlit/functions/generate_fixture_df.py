@@ -1,5 +1,73 @@
+import streamlit as st
 import pandas as pd
 import numpy as np
+from functions.fixture_calendar import fixture_calendar_index
+from functions.team_ratings import RATING_SOURCES
+from functions.strength_overrides import override_scales
+
+
+@st.cache_data
+def fixture_operator(fixtures, team_mapping, gw_start, gw_end, home_advantage=0.33):
+    """Fixture values of every team and gameweek as linear maps of the team rating vectors, built once per gameweek range.
+    Ratings of an opponent are scaled by the home / away factor of the fixture, and summed over double gameweeks.
+
+    Args:
+        fixtures (pandas dataframe): EPL season fixtures dataframe
+        team_mapping (pandas dataframe): EPL team mapping dataframe
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        home_advantage (float): Percentage by which home fixtures are stronger than away fixtures. Between [0-1]
+
+    Returns:
+        dict: fixtures (fixture text per team and gameweek, "v" prefix for home and "@" prefix for away fixtures), o_operator / d_operator (shape (team, gameweek, team), map defensive / offensive rating vectors in team_mapping order to offence / defence fixture values), blank (team, gameweek) mask of blank gameweeks, home_factor, away_factor
+    """
+    team_gw, _ = fixture_calendar_index(fixtures)
+    team_position = {team_id: i for i, team_id in enumerate(team_mapping["team_id"])}
+    team_shorts = dict(zip(team_mapping["team_id"], team_mapping["team_short"]))
+    teams = team_mapping.sort_values("team_name")
+    gameweeks = range(gw_start, gw_end + 1)
+
+    # home and away scaling factors
+    home_factor = 1.0 + home_advantage / 2
+    away_factor = 1.0 - home_advantage / 2
+
+    # weight of each opponent rating in each team gameweek
+    o_operator = np.zeros((len(teams), len(gameweeks), len(team_mapping)))
+    d_operator = np.zeros((len(teams), len(gameweeks), len(team_mapping)))
+    fixture_text = []
+    for i, team_id in enumerate(teams["team_id"]):
+        team_text = []
+        for j, gw in enumerate(gameweeks):
+            team_fixtures = team_gw.get((team_id, gw), [])
+            o_divisor = len(team_fixtures) - 1 if len(team_fixtures) > 1 else 1
+            d_divisor = len(team_fixtures) + 1 if len(team_fixtures) > 1 else 1
+            for _, opponent_id, is_home in team_fixtures:
+                factor = home_factor if is_home else away_factor
+                o_operator[i, j, team_position[opponent_id]] += factor / o_divisor
+                d_operator[i, j, team_position[opponent_id]] += 1 / factor / d_divisor
+            # home fixtures listed before away fixtures
+            team_text.append(
+                ", ".join(
+                    ("v" if is_home else "@") + team_shorts[opponent_id]
+                    for _, opponent_id, is_home in sorted(
+                        team_fixtures, key=lambda fixture: not fixture[2]
+                    )
+                )
+            )
+        fixture_text.append(team_text)
+
+    return {
+        "fixtures": pd.DataFrame(
+            fixture_text,
+            index=pd.Index(teams["team_name"], name="team"),
+            columns=["GW " + str(gw) for gw in gameweeks],
+        ),
+        "o_operator": o_operator,
+        "d_operator": d_operator,
+        "blank": ~o_operator.any(axis=2),
+        "home_factor": home_factor,
+        "away_factor": away_factor,
+    }
 
 
 def generate_fixtures_df(
@@ -8,101 +76,57 @@ def generate_fixtures_df(
     odm_rating,
     gw_start,
     gw_end,
-    model_option = "Full Season",
+    model_option="Full Season",
     home_advantage=0.33,
+    overrides=None,
 ):
     """Generate fixtures dataframes
 
     Args:
         fixtures (pandas dataframe): EPL season fixtures dataframe
         team_mapping (pandas dataframe): EPL team mapping dataframe
-        odm_rating (pandas dataframe): ODM ratings of EPL teams
+        odm_rating (pandas dataframe): ratings of EPL teams from the model_option rating data source
         gw_start (int): First gameweek to include
         gw_end (int): Last gameweek to include
-        model_option (str): "Past 6 Gameweeks" or "Full Season" ODM ratings model
+        model_option (str): rating data source label, see RATING_SOURCES. Default "Full Season" ODM ratings
         home_advantage (float): Percentage by which home fixtures are stronger than away fixtures. Between [0-1], default=0.24.
+        overrides (dict): team_id -> (offensive, defensive) rating scale, see strength_overrides. Default None
     """
 
-    # filter by gameweeks
-    fixtures = fixtures[
-        (fixtures["gameweek"] >= gw_start) & (fixtures["gameweek"] <= gw_end)
-    ]
-
-    # home fixtures
-    home_fixtures = fixtures.rename(columns={"home": "team", "away": "opponent"})
-    home_fixtures = home_fixtures.merge(
-        team_mapping[["team_id", "team_short"]], left_on="a_id", right_on="team_id"
+    # cached fixture value operators of the gameweek range
+    operator = fixture_operator(
+        fixtures, team_mapping, gw_start, gw_end, home_advantage
     )
-    home_fixtures["team_short"] = "v" + home_fixtures["team_short"]
+    fixtures = operator["fixtures"]
 
-    # away fixtures
-    away_fixtures = fixtures.rename(columns={"away": "team", "home": "opponent"})
-    away_fixtures = away_fixtures.merge(
-        team_mapping[["team_id", "team_short"]], left_on="h_id", right_on="team_id"
-    )
-    away_fixtures["team_short"] = "@" + away_fixtures["team_short"]
+    # rating vectors in team mapping order, scaled by any strength overrides
+    variant = RATING_SOURCES[model_option][1]
+    odm_rating = odm_rating.set_index("team_id").reindex(team_mapping["team_id"])
+    o_scale, d_scale = override_scales(team_mapping["team_id"], overrides)
+    o_rating = odm_rating["o_rating_" + variant].to_numpy() * o_scale
+    d_rating = odm_rating["d_rating_" + variant].to_numpy() * d_scale
 
-    # concat home and away fixtures
-    fixtures = pd.concat([home_fixtures, away_fixtures])
-    fixtures = fixtures.pivot_table(
-        values="team_short", index="team", columns="gameweek", aggfunc=pd.unique
+    # range of home and away scaled ratings
+    o_ratings = np.concatenate(
+        [o_rating / operator["home_factor"], o_rating / operator["away_factor"]]
     )
-    fixtures = fixtures.add_prefix("GW ")
-    fixtures = fixtures.replace({np.nan: ""})
-
-    # home and away scaling factors
-    home_factor = 1.0 + home_advantage / 2
-    away_factor = 1.0 - home_advantage / 2
-
-    # use short team names in ODM ratings
-    short_name_dict = dict(zip(team_mapping["team_name"], team_mapping["team_short"]))
-    odm_rating = odm_rating.rename(columns={"team": "team_name"})
-    odm_rating["team_name"] = odm_rating["team_name"].map(short_name_dict)
-
-    # home odm ratings
-    odm_home = odm_rating.copy()
-    odm_home["team_name"] = "v" + odm_home["team_name"]
-
-    # away odm ratings
-    odm_away = odm_rating.copy()
-    odm_away["team_name"] = "@" + odm_away["team_name"]
-
-    # calculate odm ratings for input model and scaling factor
-    if model_option == "Full Season":
-        odm_home["o_rating_season"] = odm_home["o_rating_season"] / home_factor
-        odm_home["d_rating_season"] = odm_home["d_rating_season"] * home_factor
-        odm_away["o_rating_season"] = odm_away["o_rating_season"] / away_factor
-        odm_away["d_rating_season"] = odm_away["d_rating_season"] * away_factor
-        odm_rating = pd.concat([odm_home, odm_away], ignore_index=True)
-        o_rating_dict = odm_rating.set_index("team_name")["o_rating_season"].to_dict()
-        min_o_rating = min(o_rating_dict.values())
-        max_o_rating = max(o_rating_dict.values())
-        d_rating_dict = odm_rating.set_index("team_name")["d_rating_season"].to_dict()
-        min_d_rating = min(d_rating_dict.values())
-        max_d_rating = max(d_rating_dict.values())
-    elif model_option == "Past 6 Gameweeks":
-        odm_home["o_rating_psix"] = odm_home["o_rating_psix"] / home_factor
-        odm_home["d_rating_psix"] = odm_home["d_rating_psix"] * home_factor
-        odm_away["o_rating_psix"] = odm_away["o_rating_psix"] / away_factor
-        odm_away["d_rating_psix"] = odm_away["d_rating_psix"] * away_factor
-        odm_rating = pd.concat([odm_home, odm_away], ignore_index=True)
-        o_rating_dict = odm_rating.set_index("team_name")["o_rating_psix"].to_dict()
-        min_o_rating = min(o_rating_dict.values())
-        max_o_rating = max(o_rating_dict.values())
-        d_rating_dict = odm_rating.set_index("team_name")["d_rating_psix"].to_dict()
-        min_d_rating = min(d_rating_dict.values())
-        max_d_rating = max(d_rating_dict.values())
+    min_o_rating = o_ratings.min()
+    max_o_rating = o_ratings.max()
+    d_ratings = np.concatenate(
+        [d_rating * operator["home_factor"], d_rating * operator["away_factor"]]
+    )
+    min_d_rating = d_ratings.min()
+    max_d_rating = d_ratings.max()
 
     # create offence data frames
-    o_fixture_values = fixtures.map(
-        lambda x: (
-            (sum([d_rating_dict[i] for i in x])) / (len(x) - 1)
-            if len(x) > 1
-            else sum([d_rating_dict[i] for i in x])
-        )
+    o_fixture_values = pd.DataFrame(
+        np.where(
+            operator["blank"], min_d_rating / 1.25, operator["o_operator"] @ d_rating
+        ),
+        index=fixtures.index,
+        columns=fixtures.columns,
     )
-    o_fixture_values = o_fixture_values.replace(0, min(d_rating_dict.values()) / 1.25)
-    o_fixtures = fixtures.map(lambda x: ", ".join([i for i in x]))
+    o_fixtures = fixtures.copy()
     # calculate and add offensive fixture rating
     o_FR = pd.DataFrame(
         o_fixture_values.sum(axis=1) / o_fixture_values.sum(axis=1).mean() * 100,
@@ -116,15 +140,14 @@ def generate_fixtures_df(
     ).sort_values("FR", ascending=False)
 
     # create defence data frames
-    d_fixture_values = fixtures.map(
-        lambda x: (
-            (sum([o_rating_dict[i] for i in x])) / (len(x) + 1)
-            if len(x) > 1
-            else sum([o_rating_dict[i] for i in x])
-        )
+    d_fixture_values = pd.DataFrame(
+        np.where(
+            operator["blank"], max_o_rating * 1.25, operator["d_operator"] @ o_rating
+        ),
+        index=fixtures.index,
+        columns=fixtures.columns,
     )
-    d_fixture_values = d_fixture_values.replace(0, max(o_rating_dict.values()) * 1.25)
-    d_fixtures = fixtures.map(lambda x: ", ".join([i for i in x]))
+    d_fixtures = fixtures.copy()
     # calculate and add defensive fixture rating
     d_FR = pd.DataFrame(
         1 / (d_fixture_values.sum(axis=1) / d_fixture_values.sum(axis=1).mean()) * 100,
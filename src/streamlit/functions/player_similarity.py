@@ -0,0 +1,90 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+# per 90 and share stats describing a player's style, see Player Comparison
+SIMILARITY_FEATURES = [
+    "npxG",
+    "xA",
+    "shots",
+    "key_passes",
+    "t_score",
+    "xG_perc",
+    "xGChain",
+    "xGBuildup",
+]
+# players with fewer minutes over the gameweek range are not indexed
+SIMILARITY_MIN_MINUTES = 270
+
+
+@st.cache_data
+def similarity_index(season, gw_start, gw_end):
+    """Standardized stat vectors of players over a gameweek range, with their pairwise distance matrix.
+    Cached, so the index is only rebuilt when the season or gameweek range changes.
+
+    Args:
+        season (str): start year of EPL season
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+
+    Returns:
+        (pandas dataframe, numpy array): player_id, team_id, time and SIMILARITY_FEATURES per player, (player, player) euclidean distances of standardized features
+    """
+    player_data = pd.read_csv("data/" + season + "/player_data.csv")
+    player_data = player_data[player_data["gameweek"].between(gw_start, gw_end)]
+    player_data["npshots"] = player_data["shots"] - player_data["penalty_attempt"]
+    features = player_data.groupby("player_id", as_index=False).agg(
+        team_id=("team_id", "last"),
+        time=("time", "sum"),
+        npxG=("npxG", "sum"),
+        xA=("xA", "sum"),
+        shots=("npshots", "sum"),
+        key_passes=("key_passes", "sum"),
+        xGChain=("xGChain", "sum"),
+        xGBuildup=("xGBuildup", "sum"),
+        npxGI=("npxGI", "sum"),
+        team_xG_on=("team_xG_on", "sum"),
+    )
+    features = features[features["time"] >= SIMILARITY_MIN_MINUTES].reset_index(
+        drop=True
+    )
+
+    # shares over the whole range, per 90 stats
+    features["t_score"] = (features["npxGI"] / features["team_xG_on"] * 100).fillna(0)
+    features["xG_perc"] = (features["npxG"] / features["npxGI"] * 100).fillna(50)
+    for stat in ["npxG", "xA", "shots", "key_passes", "xGChain", "xGBuildup"]:
+        features[stat] = features[stat] / features["time"] * 90
+    features = features.drop(columns=["npxGI", "team_xG_on"])
+
+    # standardize, pairwise distances via one matrix product
+    X = features[SIMILARITY_FEATURES].to_numpy()
+    std = X.std(axis=0)
+    X = (X - X.mean(axis=0)) / np.where(std > 0, std, 1)
+    sq_norm = np.sum(X**2, axis=1)
+    distances = np.sqrt(
+        np.maximum(sq_norm[:, None] + sq_norm[None, :] - 2 * X @ X.T, 0)
+    )
+    return features, distances
+
+
+def similar_players(features, distances, player_id, candidate_ids, n=10):
+    """Players most similar to a player, among candidate players.
+
+    Args:
+        features (pandas dataframe): player features, from similarity_index
+        distances (numpy array): (player, player) distances, from similarity_index
+        player_id (int): Understat player id to compare against
+        candidate_ids (list): Understat player ids that may be returned
+        n (int): number of players to return
+
+    Returns:
+        pandas dataframe: n nearest candidate player features with a distance column, nearest first
+    """
+    player_index = features.index[features["player_id"] == player_id]
+    if len(player_index) == 0:
+        return features.iloc[:0].assign(distance=[])
+    similar = features.assign(distance=distances[player_index[0]])
+    similar = similar[
+        similar["player_id"].isin(candidate_ids) & (similar["player_id"] != player_id)
+    ]
+    return similar.nsmallest(n, "distance")
@@ -0,0 +1,97 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from itertools import combinations
+from functions.generate_fixture_df import generate_fixtures_df
+from functions.team_ratings import ratings_as_of
+
+
+def rotation_scores(values, size=2):
+    """Best of each gameweek fixture values of every combination of teams, for rotating defensive assets.
+
+    Args:
+        values (numpy array): defensive fixture values of each team and gameweek (opponent offensive strength, lower is easier), shape (team, gameweek)
+        size (int): number of teams rotated
+
+    Returns:
+        (numpy array, numpy array, numpy array): team combinations shape (combination, size), easiest team of each combination and gameweek shape (combination, gameweek), fixture value sums of each combination
+    """
+    teams = np.array(list(combinations(range(values.shape[0]), size)))
+    combination_values = values[teams]
+    picks = teams[np.arange(len(teams))[:, None], combination_values.argmin(axis=1)]
+    return teams, picks, combination_values.min(axis=1).sum(axis=1)
+
+
+@st.cache_data
+def rotation_pairs(
+    season,
+    model_option,
+    home_advantage,
+    gameweek,
+    gw_start,
+    gw_end,
+    size=2,
+    overrides=(),
+):
+    """Rank every combination of teams for rotating defensive assets over a gameweek range.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label, see RATING_SOURCES
+        home_advantage (float): Percentage by which home fixtures are stronger than away fixtures. Between [0-1]
+        gameweek (int): FPL gameweek of the team ratings used
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        size (int): number of teams rotated
+        overrides (tuple): team strength overrides, from override_key
+
+    Returns:
+        (pandas dataframe, pandas dataframe): rotation fixtures (picked team and fixture per gameweek, teams, FR, best single team FR and gain), fixture values of the picked fixtures
+    """
+    fixtures = pd.read_csv("data/" + season + "/season_data.csv")
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    odm_data = ratings_as_of(season, model_option, gameweek)
+    _, _, _, _, d_fx, d_fx_v, _, _ = generate_fixtures_df(
+        fixtures,
+        team_mapping,
+        odm_data,
+        gw_start,
+        gw_end,
+        model_option,
+        home_advantage,
+        overrides,
+    )
+    team_names = d_fx.index.sort_values()
+    gw_columns = d_fx.columns.drop("FR")
+    d_fx = d_fx.loc[team_names, gw_columns].to_numpy()
+    d_fx_v = d_fx_v.loc[team_names, gw_columns].to_numpy(dtype="float64")
+    team_shorts = (
+        team_mapping.set_index("team_name")["team_short"].loc[team_names].to_numpy()
+    )
+
+    # fixture ratio of each combination, relative to the mean single team
+    teams, picks, sums = rotation_scores(d_fx_v, size)
+    mean_sum = d_fx_v.sum(axis=1).mean()
+    single_fr = mean_sum / d_fx_v.sum(axis=1) * 100
+    gameweeks = np.arange(len(gw_columns))
+    rotation = pd.DataFrame(
+        np.char.add(
+            np.char.add(team_shorts[picks].astype(str), " "),
+            d_fx[picks, gameweeks].astype(str),
+        ),
+        columns=gw_columns,
+    )
+    rotation.insert(
+        0, "teams", [" / ".join(team_shorts[combination]) for combination in teams]
+    )
+    rotation["FR"] = mean_sum / sums * 100
+    rotation["single_FR"] = single_fr[teams].max(axis=1)
+    rotation["gain"] = rotation["FR"] - rotation["single_FR"]
+    rotation_values = pd.DataFrame(d_fx_v[picks, gameweeks], columns=gw_columns)
+
+    # rank by rotation fixture ratio
+    order = rotation["FR"].sort_values(ascending=False).index
+    return (
+        rotation.loc[order].reset_index(drop=True),
+        rotation_values.loc[order].reset_index(drop=True),
+    )
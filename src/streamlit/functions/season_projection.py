@@ -0,0 +1,65 @@
+import streamlit as st
+import pandas as pd
+
+
+@st.cache_data
+def load_fixture_probabilities(season, gameweek=None):
+    """Read clean sheet and scoring probabilities of each team fixture, from the season simulator.
+    Probabilities are from the ratings of the latest rating gameweek at or before gameweek, so past views do not use later results.
+
+    Args:
+        season (str): start year of EPL season
+        gameweek (int): FPL gameweek of ratings, default the latest rating gameweek
+
+    Returns:
+        pandas dataframe: rating_gameweek, team_id, gameweek, fixture_id, opponent_id, is_home, xg_for, xg_against, p_cs, p_score_2 per team fixture, empty if no ratings at or before gameweek
+    """
+    probabilities = pd.read_csv("data/" + season + "/fixture_probabilities.csv")
+    rating_gws = probabilities["rating_gameweek"]
+    if gameweek is not None:
+        rating_gws = rating_gws[rating_gws <= gameweek]
+    return probabilities[
+        probabilities["rating_gameweek"] == rating_gws.max()
+    ].reset_index(drop=True)
+
+
+@st.cache_data
+def load_season_projection(season):
+    """Read projected league tables, from the season simulator.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        pandas dataframe: team_id, team, gameweek, points, position, p_title, p_top_4, p_relegation
+    """
+    return pd.read_csv("data/" + season + "/season_projection.csv")
+
+
+def team_gameweek_probabilities(probabilities, team_mapping, column, gw_start, gw_end):
+    """Pivot fixture probabilities to a (team, gameweek) table.
+    Double gameweek probabilities are summed (expected count over the gameweek), blank gameweeks are 0.
+
+    Args:
+        probabilities (pandas dataframe): fixture probabilities, from load_fixture_probabilities
+        team_mapping (pandas dataframe): EPL team mapping dataframe
+        column (str): probability column, p_cs or p_score_2
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+
+    Returns:
+        pandas dataframe: percentage per team per "GW n" column, with an expected count Total column, sorted by Total
+    """
+    probabilities = probabilities[probabilities["gameweek"].between(gw_start, gw_end)]
+    table = (
+        probabilities.pivot_table(
+            index="team_id", columns="gameweek", values=column, aggfunc="sum"
+        )
+        .reindex(index=team_mapping["team_id"], columns=range(gw_start, gw_end + 1))
+        .fillna(0)
+        * 100
+    )
+    table.index = pd.Index(team_mapping["team_name"], name="team")
+    table.columns = ["GW " + str(gw) for gw in table.columns]
+    table["Total"] = table.sum(axis=1) / 100
+    return table.sort_values("Total", ascending=False)
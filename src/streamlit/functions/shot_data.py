@@ -0,0 +1,28 @@
+import streamlit as st
+import pandas as pd
+import os
+
+
+@st.cache_data
+def load_shots(season, gw_start, gw_end, columns=None):
+    """Read shot level data over a gameweek range, only reading the gameweek partitions and columns required.
+
+    Args:
+        season (str): start year of EPL season
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+        columns (list): shot data columns to read, None for all
+
+    Returns:
+        pandas dataframe: shot level data, empty if no shots are stored for the range
+    """
+    partitions = [
+        "data/" + season + "/shots/gw_" + str(gw) + ".csv"
+        for gw in range(gw_start, gw_end + 1)
+    ]
+    shots = [
+        pd.read_csv(path, usecols=columns) for path in partitions if os.path.exists(path)
+    ]
+    if len(shots) == 0:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(shots, ignore_index=True)
@@ -0,0 +1,147 @@
+import streamlit as st
+import pandas as pd
+import sqlite3
+from datetime import datetime, timezone
+from functions.chip_planner import chip_players, projection_gameweeks
+from functions.generate_fixture_df import generate_fixtures_df
+from functions.team_ratings import ratings_as_of
+from functions.fact_table import load_fact_table, player_rows
+
+# local squad store, one squad per user (FPL entry id or token) and season
+SQUAD_DB = "data/squads.db"
+
+
+def squad_connection():
+    """Open the squad store, creating the squads table if needed.
+
+    Returns:
+        sqlite3 connection: squad store connection
+    """
+    connection = sqlite3.connect(SQUAD_DB)
+    connection.execute("""CREATE TABLE IF NOT EXISTS squads (
+            entry_id TEXT NOT NULL,
+            season TEXT NOT NULL,
+            player_ids TEXT NOT NULL,
+            updated TEXT NOT NULL,
+            PRIMARY KEY (entry_id, season)
+        )""")
+    return connection
+
+
+def save_squad(entry_id, season, player_ids):
+    """Store the squad of a user, replacing any stored squad of the season.
+
+    Args:
+        entry_id (str): FPL entry id or user token
+        season (str): start year of EPL season
+        player_ids (list): Understat player ids of the squad
+    """
+    with squad_connection() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO squads VALUES (?, ?, ?, ?)",
+            (
+                entry_id,
+                season,
+                ",".join(str(player_id) for player_id in sorted(player_ids)),
+                datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            ),
+        )
+    connection.close()
+
+
+def load_squad(entry_id, season):
+    """Read the stored squad of a user.
+
+    Args:
+        entry_id (str): FPL entry id or user token
+        season (str): start year of EPL season
+
+    Returns:
+        list: Understat player ids of the squad, empty if none stored
+    """
+    with squad_connection() as connection:
+        row = connection.execute(
+            "SELECT player_ids FROM squads WHERE entry_id = ? AND season = ?",
+            (entry_id, season),
+        ).fetchone()
+    connection.close()
+    if row is None or row[0] == "":
+        return []
+    return [int(player_id) for player_id in row[0].split(",")]
+
+
+@st.cache_data
+def squad_view(season, squad, latest_gw, lookahead=6):
+    """Projections, upcoming fixtures and season stats of a squad, computed once per squad and gameweek.
+
+    Args:
+        season (str): start year of EPL season
+        squad (tuple): sorted Understat player ids of the squad
+        latest_gw (int): latest gameweek of data, part of the cache key
+        lookahead (int): number of upcoming gameweeks
+
+    Returns:
+        dict: projections (upcoming projected points), o_fx / o_fx_v / d_fx / d_fx_v (fixture ticker rows of squad teams), o_range / d_range (ticker shading ranges) and stats (season stats) of the squad
+    """
+    players = chip_players(season)
+    team_mapping = pd.read_csv("data/" + season + "/team_mapping.csv")
+    squad_players = players.loc[[p for p in squad if p in players.index]]
+    team_names = team_mapping.set_index("team_id")["team_name"]
+
+    # upcoming gameweeks, final gameweeks after the season
+    gw_start = min(latest_gw + 1, 38 - lookahead + 1)
+    gw_end = min(gw_start + lookahead - 1, 38)
+    gw_columns = [
+        "GW " + str(gw)
+        for gw in range(gw_start, gw_end + 1)
+        if gw in projection_gameweeks(players)
+    ]
+    projections = squad_players[
+        ["web_name_pos", "element_type", "now_cost", "team_id"] + gw_columns
+    ].copy()
+    projections["team"] = projections["team_id"].map(team_names)
+    projections["total"] = projections[gw_columns].sum(axis=1)
+    projections = projections.sort_values(
+        ["element_type", "total"], ascending=[True, False]
+    )
+
+    # fixture ticker of squad teams
+    fixtures = pd.read_csv("data/" + season + "/season_data.csv")
+    o_fx, o_fx_v, min_o, max_o, d_fx, d_fx_v, min_d, max_d = generate_fixtures_df(
+        fixtures,
+        team_mapping,
+        ratings_as_of(season, "Full Season", latest_gw + 1),
+        gw_start,
+        gw_end,
+    )
+    squad_teams = team_names[squad_players["team_id"].unique()].to_list()
+
+    # season stats from the fact table
+    facts, index = load_fact_table(season)
+    rows = player_rows(facts, index, list(squad))
+    aggregations = {
+        "time": ("time", "sum"),
+        "goals": ("goals", "sum"),
+        "assists": ("assists", "sum"),
+        "npxG": ("npxG", "sum"),
+        "xA": ("xA", "sum"),
+        "team_xG_on": ("team_xG_on", "sum"),
+    }
+    if "total_points" in rows:
+        aggregations["total_points"] = ("total_points", "sum")
+    stats = rows.groupby("player_id").agg(**aggregations)
+    stats["npxG_90"] = stats["npxG"] / stats["time"] * 90
+    stats["xA_90"] = stats["xA"] / stats["time"] * 90
+    stats["t_score"] = (stats["npxG"] + stats["xA"]) / stats["team_xG_on"] * 100
+    stats = projections[["web_name_pos", "now_cost", "team"]].join(stats, how="left")
+
+    return {
+        "projections": projections,
+        "o_fx": o_fx[o_fx.index.isin(squad_teams)],
+        "o_fx_v": o_fx_v[o_fx_v.index.isin(squad_teams)],
+        "d_fx": d_fx[d_fx.index.isin(squad_teams)],
+        "d_fx_v": d_fx_v[d_fx_v.index.isin(squad_teams)],
+        "o_range": (min_d, max_d),
+        "d_range": (min_o, max_o),
+        "stats": stats,
+    }
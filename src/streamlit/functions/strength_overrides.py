@@ -0,0 +1,191 @@
+import streamlit as st
+import numpy as np
+from functions.fact_table import load_fact_table
+from functions.xminutes import load_xminutes
+from functions.season_projection import load_fixture_probabilities
+
+# FPL points per goal, assist and clean sheet by element type (2024/25 scoring)
+GOAL_POINTS = {1: 10, 2: 6, 3: 5, 4: 4}
+ASSIST_POINTS = 3
+CLEAN_SHEET_POINTS = {1: 4, 2: 4, 3: 1, 4: 0}
+N_TEAMS = 20
+
+
+def season_overrides(season):
+    """Strength overrides of a season, stored in session state so they are shared by all pages.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        dict: team_id -> (offensive, defensive) rating scale, only teams with an override
+    """
+    if "strength_overrides" not in st.session_state:
+        st.session_state.strength_overrides = {}
+    return st.session_state.strength_overrides.setdefault(season, {})
+
+
+def override_key(overrides):
+    """Hashable form of strength overrides, for cached function arguments.
+
+    Args:
+        overrides (dict): team_id -> (offensive, defensive) rating scale
+
+    Returns:
+        tuple: sorted (team_id, (offensive, defensive)) pairs
+    """
+    return tuple(sorted((overrides or {}).items()))
+
+
+def override_scales(team_ids, overrides=None):
+    """Offensive and defensive rating scale of each team, 1 for teams without an override.
+
+    Args:
+        team_ids (list): team ids, in rating vector order
+        overrides (dict): team_id -> (offensive, defensive) rating scale, or its override_key
+
+    Returns:
+        (numpy array, numpy array): offensive rating scales, defensive rating scales
+    """
+    overrides = dict(overrides or {})
+    scales = np.array(
+        [overrides.get(team_id, (1.0, 1.0)) for team_id in team_ids], dtype="float64"
+    ).reshape(-1, 2)
+    return scales[:, 0], scales[:, 1]
+
+
+def fixture_xg_ratios(team_ids, opponent_ids, overrides):
+    """Scale of the xG and xG conceded of team fixtures under strength overrides.
+    A team's xG scales with its offensive and the opponent's defensive rating, its xG conceded with the opponent's offensive and its own defensive rating.
+
+    Args:
+        team_ids (numpy array): team id of each team fixture
+        opponent_ids (numpy array): opponent team id of each team fixture
+        overrides (dict): team_id -> (offensive, defensive) rating scale
+
+    Returns:
+        (numpy array, numpy array): xG scale, xG conceded scale of each team fixture
+    """
+    o_scale, d_scale = override_scales(range(N_TEAMS), overrides)
+    return (
+        o_scale[team_ids] * d_scale[opponent_ids],
+        o_scale[opponent_ids] * d_scale[team_ids],
+    )
+
+
+def adjusted_probabilities(probabilities, overrides):
+    """Clean sheet and scoring probabilities of team fixtures under strength overrides, from the Poisson goals model of the season simulator.
+
+    Args:
+        probabilities (pandas dataframe): fixture probabilities, from load_fixture_probabilities
+        overrides (dict): team_id -> (offensive, defensive) rating scale
+
+    Returns:
+        pandas dataframe: fixture probabilities with scaled xg_for and xg_against, and their p_cs and p_score_2
+    """
+    xg_ratio, xga_ratio = fixture_xg_ratios(
+        probabilities["team_id"].to_numpy(),
+        probabilities["opponent_id"].to_numpy(),
+        overrides,
+    )
+    probabilities = probabilities.copy()
+    probabilities["xg_for"] = probabilities["xg_for"] * xg_ratio
+    probabilities["xg_against"] = probabilities["xg_against"] * xga_ratio
+    probabilities["p_cs"] = np.exp(-probabilities["xg_against"])
+    probabilities["p_score_2"] = 1 - np.exp(-probabilities["xg_for"]) * (
+        1 + probabilities["xg_for"]
+    )
+    return probabilities
+
+
+@st.cache_data
+def projection_operator(season, players, gameweek=None):
+    """Linear maps from team fixture xG changes to points projection changes, built once per season and player set.
+    Projection changes are first order: attacking points scale with team xG, clean sheet points follow the Poisson clean sheet probability.
+
+    Args:
+        season (str): start year of EPL season
+        players (pandas dataframe): player_id, element_type and team_id of each projected player
+        gameweek (int): FPL gameweek of the ratings behind the projections, default the latest rating gameweek
+
+    Returns:
+        dict: team_id, opponent_id, xg_against and p_cs of each team fixture, team_gw (team fixture incidence of each team gameweek, shape (team * 39, team fixture), indexed by gameweek), attack (expected attacking points per match) and clean_sheet (clean sheet points exposure) of each player
+    """
+    probabilities = load_fixture_probabilities(season, gameweek)
+    team_ids = probabilities["team_id"].to_numpy()
+
+    # team fixtures of each team gameweek
+    team_gw = np.zeros((N_TEAMS * 39, len(probabilities)))
+    team_gw[
+        team_ids * 39 + probabilities["gameweek"].to_numpy(),
+        np.arange(len(probabilities)),
+    ] = 1
+
+    # attacking points per match from season npxG and xA, clean sheet exposure from start probability
+    facts, _ = load_fact_table(season)
+    totals = (
+        facts[facts["player_id"] >= 0]
+        .groupby("player_id")[["time", "npxG", "xA"]]
+        .sum()
+        .reindex(players["player_id"])
+    )
+    xminutes = load_xminutes(season).reindex(players["player_id"])
+    element_types = players["element_type"].to_numpy()
+    goal_points = np.array([GOAL_POINTS.get(et, 0) for et in element_types])
+    clean_sheet_points = np.array(
+        [CLEAN_SHEET_POINTS.get(et, 0) for et in element_types]
+    )
+    attack = (
+        (
+            totals["npxG"].to_numpy() * goal_points
+            + totals["xA"].to_numpy() * ASSIST_POINTS
+        )
+        / totals["time"].to_numpy()
+        * xminutes["xminutes"].to_numpy()
+    )
+    clean_sheet = (
+        clean_sheet_points * (xminutes["p_start"] * xminutes["availability"]).to_numpy()
+    )
+
+    return {
+        "team_id": team_ids,
+        "opponent_id": probabilities["opponent_id"].to_numpy(),
+        "xg_against": probabilities["xg_against"].to_numpy(),
+        "p_cs": probabilities["p_cs"].to_numpy(),
+        "team_gw": team_gw,
+        "attack": np.nan_to_num(attack),
+        "clean_sheet": np.nan_to_num(clean_sheet),
+    }
+
+
+def projection_changes(operator, players, overrides, gameweeks):
+    """Points projection change of each player and gameweek under strength overrides.
+
+    Args:
+        operator (dict): projection operator, from projection_operator
+        players (pandas dataframe): player_id, element_type and team_id of each projected player, as passed to projection_operator
+        overrides (dict): team_id -> (offensive, defensive) rating scale
+        gameweeks (list): gameweeks of the projection columns
+
+    Returns:
+        numpy array: (player, gameweek) projected points changes
+    """
+    xg_ratio, xga_ratio = fixture_xg_ratios(
+        operator["team_id"], operator["opponent_id"], overrides
+    )
+    p_cs = np.exp(-operator["xg_against"] * xga_ratio)
+
+    # changes summed over the fixtures of each team gameweek
+    attack_change = (operator["team_gw"] @ (xg_ratio - 1)).reshape(N_TEAMS, 39)
+    clean_sheet_change = (operator["team_gw"] @ (p_cs - operator["p_cs"])).reshape(
+        N_TEAMS, 39
+    )
+    team_ids = players["team_id"].fillna(-1).to_numpy(dtype="int64")
+    known = team_ids >= 0
+    changes = np.zeros((len(players), len(gameweeks)))
+    changes[known] = (
+        operator["attack"][known, None] * attack_change[team_ids[known]][:, gameweeks]
+        + operator["clean_sheet"][known, None]
+        * clean_sheet_change[team_ids[known]][:, gameweeks]
+    )
+    return changes
@@ -0,0 +1,202 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import os
+
+# rating data sources: label -> (rating model, weighting variant)
+# ratings of each model are stored in data/<season>/<model>_rating.csv
+RATING_SOURCES = {
+    "Full Season": ("odm", "season"),
+    "Past 6 Gameweeks": ("odm", "psix"),
+    "Poisson (Full Season)": ("poisson", "season"),
+    "Poisson (Past 6 Gameweeks)": ("poisson", "psix"),
+    "xG-Elo": ("elo", "season"),
+    "Form (Decay)": ("odm_decay", "decay"),
+}
+
+
+def rating_sources(season):
+    """Rating data sources available for a season.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        list: rating data source labels
+    """
+    return [
+        label
+        for label, (model, variant) in RATING_SOURCES.items()
+        if os.path.exists("data/" + season + "/" + model + "_rating.csv")
+    ]
+
+
+@st.cache_data
+def load_ratings(season, model_option):
+    """Read the rating database of a rating data source.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label
+
+    Returns:
+        pandas dataframe: ratings of each team for each gameweek
+    """
+    model, variant = RATING_SOURCES[model_option]
+    return pd.read_csv("data/" + season + "/" + model + "_rating.csv")
+
+
+@st.cache_data
+def rating_history(season, model_option):
+    """Index the rating database of a rating data source by gameweek and team.
+    Gameweeks missing from the database hold the nearest earlier ratings, or the first stored ratings before them.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label
+
+    Returns:
+        (numpy array, pandas dataframe, list): ratings of shape (gameweek, team, rating column) indexed from gameweek 0, team_id and team of each team, rating columns
+    """
+    ratings = load_ratings(season, model_option)
+    teams = (
+        ratings[["team_id", "team"]]
+        .drop_duplicates(subset="team_id")
+        .sort_values("team_id")
+        .reset_index(drop=True)
+    )
+    rating_columns = [
+        c for c in ratings.columns if c not in ["team_id", "team", "gameweek"]
+    ]
+
+    # scatter rows into the (gameweek, team) grid, then fill gameweeks without ratings
+    history = np.full(
+        (ratings["gameweek"].max() + 1, len(teams), len(rating_columns)), np.nan
+    )
+    history[
+        ratings["gameweek"].to_numpy(),
+        np.searchsorted(teams["team_id"].to_numpy(), ratings["team_id"].to_numpy()),
+    ] = ratings[rating_columns].to_numpy(dtype="float64")
+    stored = np.flatnonzero(~np.isnan(history).all(axis=(1, 2)))
+    nearest = stored[
+        np.maximum(np.searchsorted(stored, np.arange(len(history)), "right") - 1, 0)
+    ]
+    return history[nearest], teams, rating_columns
+
+
+def ratings_as_of(season, model_option, gameweek):
+    """Ratings of every team going into a gameweek, from the indexed rating history.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label
+        gameweek (int): FPL gameweek, ratings from the fixtures before it
+
+    Returns:
+        pandas dataframe: ratings of each team, with the columns of the rating database
+    """
+    history, teams, rating_columns = rating_history(season, model_option)
+    gameweek = min(max(gameweek, 1), len(history) - 1)
+    ratings = teams.copy()
+    ratings["gameweek"] = gameweek
+    ratings[rating_columns] = history[gameweek]
+    return ratings
+
+
+@st.cache_data
+def rating_trends(season, model_option, window=4):
+    """Rating trajectory of every team, with deltas, rolling slopes and rank changes over a window of gameweeks.
+    Offensive and overall ratings of season long models grow with the number of fixtures played, so they are relative to the league mean of each gameweek (x100).
+    The trajectory starts at the first fitted gameweek, leading prior rows (equal ratings for every team) and seed rows (ratings carried unchanged over several gameweeks) are skipped.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label
+        window (int): number of gameweeks of the deltas, slopes and rank changes
+
+    Returns:
+        pandas dataframe: team_id, team, gameweek, o_rating, d_rating, ovr_rating (with _delta and _slope of each), ovr_rank and ovr_rank_change of each team and fitted gameweek
+    """
+    history, teams, rating_columns = rating_history(season, model_option)
+    model, variant = RATING_SOURCES[model_option]
+    o_ratings = history[:, :, rating_columns.index("o_rating_" + variant)]
+    d_ratings = history[:, :, rating_columns.index("d_rating_" + variant)]
+
+    # first fitted gameweek, after leading prior and seed rows of the stored gameweeks
+    stored = np.sort(load_ratings(season, model_option)["gameweek"].unique())
+    first = 0
+    while first < len(stored) - 1 and (
+        np.ptp(o_ratings[stored[first]]) == 0
+        or np.array_equal(o_ratings[stored[first]], o_ratings[stored[first + 1]])
+        or (
+            first > 0
+            and np.array_equal(o_ratings[stored[first]], o_ratings[stored[first - 1]])
+        )
+    ):
+        first += 1
+    first_gw = stored[first]
+
+    # offensive and overall ratings relative to the league mean of each gameweek
+    o_ratings = o_ratings[first_gw:]
+    d_ratings = d_ratings[first_gw:]
+    ovr_ratings = o_ratings / d_ratings
+    metrics = np.stack(
+        [
+            o_ratings / o_ratings.mean(axis=1, keepdims=True) * 100,
+            d_ratings,
+            ovr_ratings / ovr_ratings.mean(axis=1, keepdims=True) * 100,
+        ],
+        axis=2,
+    )
+    n_gws, n_teams, n_metrics = metrics.shape
+
+    # overall rank of each gameweek, 1 is strongest
+    ranks = (-metrics[:, :, 2]).argsort(axis=1).argsort(axis=1) + 1
+
+    # change over the window, least squares slope over the last window gameweeks
+    deltas = np.full(metrics.shape, np.nan)
+    rank_changes = np.full(ranks.shape, np.nan)
+    slopes = np.full(metrics.shape, np.nan)
+    if n_gws > window:
+        deltas[window:] = metrics[window:] - metrics[:-window]
+        rank_changes[window:] = ranks[:-window] - ranks[window:]
+    if n_gws >= window:
+        x = np.arange(window) - (window - 1) / 2
+        slopes[window - 1 :] = np.einsum(
+            "gtmw,w->gtm",
+            np.lib.stride_tricks.sliding_window_view(metrics, window, axis=0),
+            x / (x**2).sum(),
+        )
+
+    # long format, one row per gameweek and team
+    trends = pd.DataFrame(
+        {
+            "team_id": np.tile(teams["team_id"].to_numpy(), n_gws),
+            "team": np.tile(teams["team"].to_numpy(), n_gws),
+            "gameweek": np.repeat(np.arange(first_gw, first_gw + n_gws), n_teams),
+        }
+    )
+    for i, metric in enumerate(["o_rating", "d_rating", "ovr_rating"]):
+        trends[metric] = metrics[:, :, i].ravel()
+        trends[metric + "_delta"] = deltas[:, :, i].ravel()
+        trends[metric + "_slope"] = slopes[:, :, i].ravel()
+    trends["ovr_rank"] = ranks.ravel()
+    trends["ovr_rank_change"] = rank_changes.ravel()
+    return trends
+
+
+@st.cache_data
+def load_rating_bands(season, model_option):
+    """Read the bootstrap percentile bands of a rating data source, if available.
+
+    Args:
+        season (str): start year of EPL season
+        model_option (str): rating data source label
+
+    Returns:
+        pandas dataframe: rating bands of each team for each gameweek, or None if not available
+    """
+    model, variant = RATING_SOURCES[model_option]
+    if model != "odm" or not os.path.exists("data/" + season + "/odm_bootstrap.csv"):
+        return None
+    return pd.read_csv("data/" + season + "/odm_bootstrap.csv")
@@ -0,0 +1,163 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+# team stat cube metrics, in for / against orientation of each team's matches
+# fixture_data columns of the home team, away team columns are the against side
+TEAM_STAT_METRICS = {
+    "matches": None,
+    "goals_for": ("h_goals", "a_goals"),
+    "goals_against": ("a_goals", "h_goals"),
+    "xg_for": ("h_xg", "a_xg"),
+    "xg_against": ("a_xg", "h_xg"),
+    "shots_for": ("h_shot", "a_shot"),
+    "shots_against": ("a_shot", "h_shot"),
+    "sot_for": ("h_shotOnTarget", "a_shotOnTarget"),
+    "sot_against": ("a_shotOnTarget", "h_shotOnTarget"),
+    "deep_for": ("h_deep", "a_deep"),
+    "deep_against": ("a_deep", "h_deep"),
+    "ppda": ("h_ppda", "a_ppda"),
+    "ppda_against": ("a_ppda", "h_ppda"),
+    "points": None,
+    "xpts": None,
+}
+METRIC_INDEX = {metric: i for i, metric in enumerate(TEAM_STAT_METRICS)}
+
+
+@st.cache_data
+def team_stat_cube(season):
+    """Cumulative (team, gameweek, metric) stat cube of a season, from fixture data.
+    Slice g holds each team's totals up to and including gameweek g, slice 0 is zero, so any gameweek range total is one subtraction.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        numpy array: cumulative totals of TEAM_STAT_METRICS, shape (team_id, gameweek + 1, metric)
+    """
+    fixtures = pd.read_csv("data/" + season + "/fixture_data.csv")
+    n_teams = max(fixtures["h_id"].max(), fixtures["a_id"].max()) + 1
+    n_gameweeks = fixtures["gameweek"].max()
+
+    # home and away orientation of each fixture
+    home_pts = np.select(
+        [
+            fixtures["h_goals"] > fixtures["a_goals"],
+            fixtures["h_goals"] == fixtures["a_goals"],
+        ],
+        [3, 1],
+        0,
+    )
+    away_pts = np.select(
+        [
+            fixtures["a_goals"] > fixtures["h_goals"],
+            fixtures["a_goals"] == fixtures["h_goals"],
+        ],
+        [3, 1],
+        0,
+    )
+    sides = []
+    for side, team_col, pts, xpts in [
+        (0, "h_id", home_pts, 3 * fixtures["h_w"] + fixtures["h_d"]),
+        (1, "a_id", away_pts, 3 * fixtures["h_l"] + fixtures["h_d"]),
+    ]:
+        values = np.column_stack(
+            [
+                (
+                    fixtures[columns[side]].to_numpy(dtype="float64")
+                    if columns is not None
+                    else np.zeros(len(fixtures))
+                )
+                for columns in TEAM_STAT_METRICS.values()
+            ]
+        )
+        values[:, METRIC_INDEX["matches"]] = 1
+        values[:, METRIC_INDEX["points"]] = pts
+        values[:, METRIC_INDEX["xpts"]] = xpts
+        sides.append((fixtures[team_col].to_numpy(), values))
+
+    # gameweek totals, then cumulative sums along gameweeks
+    cube = np.zeros((n_teams, n_gameweeks + 1, len(TEAM_STAT_METRICS)))
+    for teams, values in sides:
+        np.add.at(cube, (teams, fixtures["gameweek"].to_numpy()), values)
+    return np.cumsum(cube, axis=1)
+
+
+def range_totals(cube, gw_start, gw_end):
+    """Team totals over a gameweek range.
+
+    Args:
+        cube (numpy array): team stat cube, from team_stat_cube
+        gw_start (int): First gameweek to include
+        gw_end (int): Last gameweek to include
+
+    Returns:
+        numpy array: totals of each team and metric, shape (team_id, metric)
+    """
+    gw_end = min(gw_end, cube.shape[1] - 1)
+    gw_start = min(max(gw_start, 1), gw_end + 1)
+    return cube[:, gw_end] - cube[:, gw_start - 1]
+
+
+def rolling_totals(cube, window):
+    """Team totals over a rolling window of gameweeks, ending at each gameweek.
+
+    Args:
+        cube (numpy array): team stat cube, from team_stat_cube
+        window (int): number of gameweeks in the window
+
+    Returns:
+        numpy array: totals of each team, gameweek and metric, shape (team_id, gameweek, metric), gameweek 1 at index 0
+    """
+    gameweeks = np.arange(1, cube.shape[1])
+    return cube[:, gameweeks] - cube[:, np.maximum(gameweeks - window, 0)]
+
+
+def ewm_totals(cube, halflife):
+    """Exponentially time decayed team totals, at each gameweek.
+
+    Args:
+        cube (numpy array): team stat cube, from team_stat_cube
+        halflife (float): half-life of gameweek weights, in gameweeks
+
+    Returns:
+        numpy array: decayed totals of each team, gameweek and metric, shape (team_id, gameweek, metric), gameweek 1 at index 0
+    """
+    gameweek_totals = np.diff(cube, axis=1)
+    decay = 0.5 ** (1 / halflife)
+    totals = np.zeros_like(gameweek_totals)
+    running = np.zeros_like(gameweek_totals[:, 0])
+    for gw in range(gameweek_totals.shape[1]):
+        running = running * decay + gameweek_totals[:, gw]
+        totals[:, gw] = running
+    return totals
+
+
+def per_match(totals):
+    """Per match averages of team totals, in a dataframe.
+    Matches and points stay as totals, teams without matches are NaN.
+
+    Args:
+        totals (numpy array): team totals, shape (team_id, metric) or (team_id, gameweek, metric)
+
+    Returns:
+        pandas dataframe: team_id (and gameweek), TEAM_STAT_METRICS columns
+    """
+    flat = totals.reshape(-1, totals.shape[-1])
+    matches = flat[:, [METRIC_INDEX["matches"]]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = np.where(matches > 0, flat / matches, np.nan)
+    df = pd.DataFrame(averages, columns=list(TEAM_STAT_METRICS))
+    for metric in ["matches", "points", "xpts"]:
+        df[metric] = flat[:, METRIC_INDEX[metric]]
+
+    # team and gameweek keys
+    if totals.ndim == 3:
+        team_ids, gameweeks = np.meshgrid(
+            np.arange(totals.shape[0]), np.arange(1, totals.shape[1] + 1), indexing="ij"
+        )
+        df.insert(0, "gameweek", gameweeks.ravel())
+        df.insert(0, "team_id", team_ids.ravel())
+    else:
+        df.insert(0, "team_id", np.arange(totals.shape[0]))
+    return df
@@ -0,0 +1,15 @@
+import streamlit as st
+import pandas as pd
+
+
+@st.cache_data
+def load_xminutes(season):
+    """Read expected minutes of each player, from the xMinutes model.
+
+    Args:
+        season (str): start year of EPL season
+
+    Returns:
+        pandas dataframe: p_start, p_sub, start_minutes, sub_minutes, availability, xminutes indexed by player_id
+    """
+    return pd.read_csv("data/" + season + "/xminutes.csv", index_col="player_id")
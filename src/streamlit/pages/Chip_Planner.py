@@ -0,0 +1,183 @@
+import streamlit as st
+import pandas as pd
+from functions.chip_planner import (
+    SQUAD_COUNTS,
+    CLUB_LIMIT,
+    CHIPS,
+    chip_players,
+    projection_gameweeks,
+    greedy_selection,
+    chip_gains,
+    chip_schedules,
+)
+
+# read app vars in
+app_vars = pd.read_csv("data/app_vars.csv")
+seasons = app_vars["season"]
+
+# page config
+st.set_page_config(
+    page_title="Chip Planner • FPLalytics",
+    page_icon=":chart_with_upwards_trend:",
+    layout="wide",
+)
+
+# sidebar
+with st.sidebar:
+    st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
+    season_option = st.selectbox("Season", seasons)
+    latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    st.caption(
+        """Latest gameweek data: :blue["""
+        + str(latest_gw)
+        + """]  
+                [GitHub](https://github.com/njgootee)"""
+    )
+
+# read data in
+players = chip_players(str(season_option)[:4])
+projection_gws = projection_gameweeks(players)
+curr_gw = latest_gw + 1
+if latest_gw == 38:
+    curr_gw = 33
+curr_gw = max(curr_gw, projection_gws[0])
+
+# title and information
+st.title("Chip Planner")
+if latest_gw == 38:
+    st.caption(
+        ":warning: Post-Season View",
+        help="Post-season view plans the final 6 gameweeks.",
+    )
+with st.expander("Information", expanded=False):
+    st.markdown(
+        """Use this tool to plan when to play your Bench Boost, Triple Captain and Free Hit chips.
+
+Pick your 15 man squad, by default your squad from the My Squad page, or else the squad with the most projected points over the given gameweeks within a £100m budget.
+Chip gains are calculated from the Points Projections model for each gameweek:
+* Bench Boost: projected points of the 4 players outside the best XI
+* Triple Captain: projected points of the best captain
+* Free Hit: projected points of the best XI and captain that can be picked within your squad value and money in the bank (keeping enough for the cheapest bench), over those of your squad
+
+Double and blank gameweeks are included in the projections, and the number of squad players with a double or blank gameweek is shown for each gameweek.
+Chip schedules play one chip per gameweek, and are ranked by total projected points gain."""
+    )
+
+# options
+with st.expander("Options", expanded=False):
+    # gameweek range slider
+    if curr_gw < 38:
+        gw_option = st.slider("Gameweek Range", curr_gw, 38, (curr_gw, 38))
+    else:
+        gw_option = [38, 38]
+    # chips left to play
+    chip_option = st.multiselect(
+        "Chips Available",
+        list(CHIPS),
+        default=list(CHIPS),
+        format_func=lambda chip: CHIPS[chip],
+    )
+    bank_option = st.number_input(
+        "In the Bank",
+        min_value=0.0,
+        max_value=100.0,
+        value=0.0,
+        step=0.1,
+        format="%.1f",
+    )
+
+# default squad of My Squad page, or of most projected points
+gw_columns = ["GW " + str(gw) for gw in range(gw_option[0], gw_option[1] + 1)]
+default_squad = players.index[
+    greedy_selection(
+        players[gw_columns].sum(axis=1).to_numpy(),
+        players["element_type"].to_numpy(),
+        players["team_id"].to_numpy(),
+        players["now_cost"].to_numpy(dtype="float64"),
+        100.0,
+        15,
+        SQUAD_COUNTS,
+        SQUAD_COUNTS,
+    )
+].to_list()
+
+# squad select
+squad = st.multiselect(
+    "Squad",
+    players.index.to_list(),
+    default=[p for p in st.session_state.get("my_squad", []) if p in players.index]
+    or default_squad,
+    format_func=lambda player_id: players.loc[player_id, "web_name_pos"],
+    max_selections=15,
+)
+squad_players = players.loc[squad]
+position_counts = squad_players["element_type"].value_counts()
+if len(squad) < 15 or any(
+    position_counts.get(et, 0) != count for et, count in SQUAD_COUNTS.items()
+):
+    st.caption(
+        ":warning: Select a squad of 2 goalkeepers, 5 defenders, 5 midfielders and 3 forwards"
+    )
+    st.stop()
+if squad_players["team_id"].value_counts().max() > CLUB_LIMIT:
+    st.caption(":warning: Select at most 3 players from each team")
+    st.stop()
+st.caption("Squad value: £" + str(round(squad_players["now_cost"].sum(), 1)) + "m")
+
+# chip gains of squad, cached per squad
+gains = chip_gains(
+    str(season_option)[:4],
+    tuple(sorted(squad)),
+    gw_option[0],
+    gw_option[1],
+    bank_option,
+)
+
+col1, col2 = st.columns(2)
+with col1:
+    # chip gains per gameweek
+    st.subheader("Chip Gains")
+    st.dataframe(
+        gains.style.background_gradient(cmap="Blues", subset=list(CHIPS)).format(
+            precision=1
+        ),
+        column_config={
+            "gameweek": st.column_config.NumberColumn("GW"),
+            "xi_points": st.column_config.NumberColumn(
+                "Squad xPts", help="Projected points of the best XI and captain"
+            ),
+            **{chip: label for chip, label in CHIPS.items()},
+            "doubles": st.column_config.NumberColumn(
+                "Doubles", help="Squad players with a double gameweek"
+            ),
+            "blanks": st.column_config.NumberColumn(
+                "Blanks", help="Squad players with a blank gameweek"
+            ),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+with col2:
+    # ranked chip schedules
+    st.subheader("Chip Schedules")
+    if len(chip_option) == 0:
+        st.caption("No chips available")
+    else:
+        schedules = chip_schedules(gains, chip_option)
+        st.dataframe(
+            schedules.style.background_gradient(cmap="Blues", subset=["total"]).format(
+                {chip: "{:+1.1f}" for chip in chip_option} | {"total": "{:+1.1f}"}
+            ),
+            column_config={
+                "total": st.column_config.NumberColumn(
+                    "Total Gain", help="Projected points gain of the schedule"
+                ),
+                **{chip + "_gw": CHIPS[chip] + " GW" for chip in chip_option},
+                **{chip: CHIPS[chip] + " Gain" for chip in chip_option},
+            },
+            column_order=[chip + "_gw" for chip in chip_option]
+            + list(chip_option)
+            + ["total"],
+            hide_index=True,
+            use_container_width=True,
+        )
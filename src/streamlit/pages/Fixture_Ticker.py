@@ -1,6 +1,20 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from functions.generate_fixture_df import generate_fixtures_df
+from functions.fixture_calendar import fixture_calendar_index, fixture_counts
+from functions.team_ratings import rating_sources, ratings_as_of
+from functions.fixture_swing import SWING_WINDOWS, fixture_windows, fixture_swings
+from functions.rotation_pairs import rotation_pairs
+from functions.strength_overrides import (
+    season_overrides,
+    override_key,
+    adjusted_probabilities,
+)
+from functions.season_projection import (
+    load_fixture_probabilities,
+    team_gameweek_probabilities,
+)
 
 # read app vars in
 app_vars = pd.read_csv("data/app_vars.csv")
@@ -18,17 +32,22 @@ with st.sidebar:
     st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
     season_option = st.selectbox("Season", seasons)
     latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    # past gameweek view, with the data available after the selected gameweek
+    as_of_gw = st.selectbox(
+        "As of Gameweek",
+        range(latest_gw, 0, -1),
+        help="View the page as it was after an earlier gameweek",
+    )
     st.caption(
         """Latest gameweek data: :blue["""
         + str(latest_gw)
         + """]  
                 [GitHub](https://github.com/njgootee)"""
     )
+    latest_gw = as_of_gw
 
 # read data in
 fixtures = pd.read_csv("data/" + str(season_option)[:4] + "/season_data.csv")
-odm_data = pd.read_csv("data/" + str(season_option)[:4] + "/odm_rating.csv")
-odm_data = odm_data.tail(20)
 team_mapping = pd.read_csv("data/" + str(season_option)[:4] + "/team_mapping.csv")
 curr_gw = latest_gw + 1
 if latest_gw == 38:
@@ -57,13 +76,22 @@ Fixtures are shaded based on the opposition strength, determined by the Team Rat
 - opponent offensive rating for the defence ticker
 The Fixture Ratio (FR) represents the fixture strength, and is presented as a percentage of the mean fixture strength over the given gameweeks.
 
-Change the gameweek scope, home advantage percentage, and ODM data source in the options menu. The "Past 6 Gameweeks" option can be a better indicator of current fixture difficulty, but is more sensitive to outliers and variance."""
+Change the gameweek scope, home advantage percentage, and ratings data source in the options menu. The "Past 6 Gameweeks" options can be a better indicator of current fixture difficulty, but are more sensitive to outliers and variance.
+The Poisson, xG-Elo and Form (Decay) data sources are alternative team rating models, see the Team Ratings page for details.
+
+The Swings tab finds the largest upcoming fixture swing of each team: the gameweek from which a run of fixtures turns from hard to easy, compared with the run of the same length before it. Swings are searched over all upcoming gameweeks, for the selected asset type and run length.
+
+The Rotation tab ranks every pair (or triple) of teams for rotating cheap goalkeepers or defenders, picking the team with the easier defensive fixture in each gameweek. Its FR is the Fixture Ratio of the picked fixtures, and Gain is the improvement over the best single team of the rotation.
+
+Strength overrides scale the offensive and defensive ratings of chosen teams, for what the xG model does not know (a new manager, key injuries). Overrides apply to every tab, and to the upcoming fixtures of the Player Comparison page and the Points Projections.
+
+The Clean Sheets and Attack tabs show the probability of each team keeping a clean sheet, and of scoring 2 or more goals, in each gameweek. Probabilities are from a Poisson goals model of the "Full Season" team ratings with 33% home advantage, and are summed over double gameweeks. The Total column is the expected number over the given gameweeks."""
     )
 
 # options
 with st.expander("Options", expanded=False):
     # Model select box
-    model_option = st.selectbox("Data Source", ("Full Season", "Past 6 Gameweeks"))
+    model_option = st.selectbox("Data Source", rating_sources(str(season_option)[:4]))
 
     # slider to filter upcoming gameweeks shown
     if curr_gw < 38:
@@ -77,6 +105,89 @@ with st.expander("Options", expanded=False):
     home_advantage = st.slider("Home Advantage (%)", 0, 50, 33)
     home_advantage = home_advantage / 100
 
+# team strength overrides, shared with the Player Comparison and Points Projections pages
+overrides = season_overrides(str(season_option)[:4])
+with st.expander("Strength Overrides", expanded=False):
+    st.caption(
+        "Scale the ratings of a team for what the xG model does not know, such as a new manager or key injuries"
+    )
+    # editor base frame changes only on reset, or when the editor is shown again
+    editor_key = "override_editor_" + str(season_option)[:4]
+    base_key = "override_base_" + str(season_option)[:4]
+    if st.button("Reset Overrides", disabled=len(overrides) == 0):
+        overrides.clear()
+        st.session_state.pop(editor_key, None)
+    if editor_key not in st.session_state:
+        st.session_state[base_key] = dict(overrides)
+    base_overrides = st.session_state[base_key]
+    override_base = pd.DataFrame(
+        {
+            "team_id": team_mapping["team_id"],
+            "team_name": team_mapping["team_name"],
+            "o_scale": [
+                base_overrides.get(team_id, (1.0, 1.0))[0] * 100
+                for team_id in team_mapping["team_id"]
+            ],
+            "d_scale": [
+                base_overrides.get(team_id, (1.0, 1.0))[1] * 100
+                for team_id in team_mapping["team_id"]
+            ],
+        }
+    )
+    st.data_editor(
+        override_base,
+        column_config={
+            "team_name": "Team",
+            "o_scale": st.column_config.NumberColumn(
+                "Offensive Rating (%)",
+                help="Scale of the team's offensive rating, higher is a stronger offence",
+                min_value=50,
+                max_value=200,
+                step=5,
+            ),
+            "d_scale": st.column_config.NumberColumn(
+                "Defensive Rating (%)",
+                help="Scale of the team's defensive rating, higher is a weaker defence",
+                min_value=50,
+                max_value=200,
+                step=5,
+            ),
+        },
+        column_order=("team_name", "o_scale", "d_scale"),
+        disabled=["team_name"],
+        hide_index=True,
+        use_container_width=True,
+        key=editor_key,
+    )
+
+    # base scales with the editor's edits, cleared cells are 100%
+    scales = override_base.set_index("team_id")[["o_scale", "d_scale"]]
+    for row, edits in st.session_state[editor_key]["edited_rows"].items():
+        for column, value in edits.items():
+            scales.iloc[int(row), scales.columns.get_loc(column)] = (
+                100 if value is None else value
+            )
+    overrides.clear()
+    overrides.update(
+        {
+            team_id: (o_scale / 100, d_scale / 100)
+            for team_id, o_scale, d_scale in zip(
+                scales.index, scales["o_scale"], scales["d_scale"]
+            )
+            if o_scale != 100 or d_scale != 100
+        }
+    )
+if len(overrides) > 0:
+    st.caption(
+        ":wrench: Strength overrides applied to "
+        + ", ".join(
+            team_mapping.set_index("team_id").loc[list(overrides), "team_short"]
+        )
+    )
+
+# read ratings of selected data source, going into the gameweek after latest
+odm_data = ratings_as_of(str(season_option)[:4], model_option, latest_gw + 1)
+
 # generate fixtures dataframes
 o_fx, o_fx_v, min_o, max_o, d_fx, d_fx_v, min_d, max_d = generate_fixtures_df(
     fixtures,
@@ -86,10 +197,41 @@ o_fx, o_fx_v, min_o, max_o, d_fx, d_fx_v, min_d, max_d = generate_fixtures_df(
     gw_option[1],
     model_option,
     home_advantage,
+    overrides,
 )
 
+# double and blank gameweeks in range
+team_gw, _ = fixture_calendar_index(fixtures)
+fixture_count = fixture_counts(team_gw, gw_option[0], gw_option[1])
+double_gws = [
+    "GW " + str(gw_option[0] + i)
+    for i in np.flatnonzero((fixture_count > 1).any(axis=0))
+]
+blank_gws = [
+    "GW " + str(gw_option[0] + i)
+    for i in np.flatnonzero((fixture_count == 0).any(axis=0))
+]
+if len(double_gws) > 0:
+    st.caption(":calendar: Double gameweeks: " + ", ".join(double_gws))
+if len(blank_gws) > 0:
+    st.caption(":calendar: Blank gameweeks: " + ", ".join(blank_gws))
+
+# clean sheet and scoring probabilities from the ratings after latest gameweek
+probabilities = adjusted_probabilities(
+    load_fixture_probabilities(str(season_option)[:4], latest_gw + 1), overrides
+)
+if len(probabilities) > 0:
+    cs_table = team_gameweek_probabilities(
+        probabilities, team_mapping, "p_cs", gw_option[0], gw_option[1]
+    )
+    score_table = team_gameweek_probabilities(
+        probabilities, team_mapping, "p_score_2", gw_option[0], gw_option[1]
+    )
+
 # tab setup
-o_tab, d_tab = st.tabs(["Offence", "Defence"])
+o_tab, d_tab, swing_tab, rotation_tab, cs_tab, score_tab = st.tabs(
+    ["Offence", "Defence", "Swings", "Rotation", "Clean Sheets", "Attack"]
+)
 
 # offence fixtures
 with o_tab:
@@ -132,3 +274,147 @@ with d_tab:
         use_container_width=True,
         height=737,
     )
+
+# fixture swings
+with swing_tab:
+    st.caption("Largest upcoming swing in fixture difficulty of each team")
+    col1, col2 = st.columns(2)
+    with col1:
+        swing_side = st.radio("Asset Type", ["Offence", "Defence"], horizontal=True)
+    with col2:
+        swing_window = st.select_slider(
+            "Run Length (Gameweeks)", list(SWING_WINDOWS), value=4
+        )
+    swing_df = fixture_swings(
+        fixture_windows(
+            str(season_option)[:4],
+            model_option,
+            home_advantage,
+            latest_gw + 1,
+            override_key(overrides),
+        ),
+        swing_side[0].lower(),
+        swing_window,
+        gw_option[0],
+    )
+    if len(swing_df) == 0:
+        st.caption("Not enough gameweeks remaining for a swing of this run length")
+    else:
+        st.dataframe(
+            swing_df.style.background_gradient(cmap="Blues", subset=["swing"]).format(
+                {"fr_before": "{:1.0f} %", "fr_after": "{:1.0f} %", "swing": "{:+1.0f}"}
+            ),
+            column_config={
+                "team": "Team",
+                "gw": st.column_config.NumberColumn(
+                    "From GW", help="First gameweek of the run after the swing"
+                ),
+                "fr_before": st.column_config.NumberColumn(
+                    "FR Before", help="Fixture Ratio of the run before the swing"
+                ),
+                "fr_after": st.column_config.NumberColumn(
+                    "FR After", help="Fixture Ratio of the run after the swing"
+                ),
+                "rank_before": st.column_config.NumberColumn(
+                    "Rank Before",
+                    help="Fixture rank of the run before the swing, 1 is easiest",
+                ),
+                "rank_after": st.column_config.NumberColumn(
+                    "Rank After",
+                    help="Fixture rank of the run after the swing, 1 is easiest",
+                ),
+                "swing": st.column_config.NumberColumn(
+                    "Swing", help="FR After - FR Before"
+                ),
+                "fixtures": "Fixtures After",
+            },
+            hide_index=True,
+            use_container_width=True,
+            height=737,
+        )
+
+# defensive rotations
+with rotation_tab:
+    st.caption("Best rotations of teams for your defensive assets")
+    rotation_size = st.radio("Rotation", ["Pairs", "Triples"], horizontal=True)
+    rotation_df, rotation_values = rotation_pairs(
+        str(season_option)[:4],
+        model_option,
+        home_advantage,
+        latest_gw + 1,
+        gw_option[0],
+        gw_option[1],
+        2 if rotation_size == "Pairs" else 3,
+        override_key(overrides),
+    )
+    st.dataframe(
+        rotation_df.head(50)
+        .style.background_gradient(
+            axis=None,
+            cmap="RdYlGn_r",
+            gmap=rotation_values.head(50),
+            subset=rotation_values.columns,
+            vmax=max_o,
+            vmin=min_o,
+        )
+        .background_gradient(cmap="Blues", subset=["FR", "gain"])
+        .format({"FR": "{:1.0f} %", "single_FR": "{:1.0f} %", "gain": "{:+1.0f}"}),
+        column_config={
+            "teams": "Teams",
+            "FR": st.column_config.NumberColumn(
+                "FR", help="Fixture Ratio of the rotation (% of mean fixture strength)"
+            ),
+            "single_FR": st.column_config.NumberColumn(
+                "Best Single FR", help="Fixture Ratio of the best team of the rotation"
+            ),
+            "gain": st.column_config.NumberColumn("Gain", help="FR - Best Single FR"),
+        },
+        hide_index=True,
+        use_container_width=True,
+        height=737,
+    )
+
+# clean sheet probabilities
+with cs_tab:
+    st.caption("Clean sheet probability for your defensive assets")
+    if len(probabilities) == 0:
+        st.caption(":warning: No fixture probabilities before the first rated gameweek")
+    else:
+        st.dataframe(
+            cs_table.style.background_gradient(
+                cmap="RdYlGn", subset=cs_table.columns[:-1], vmin=0, vmax=60
+            )
+            .background_gradient(cmap="Blues", subset=["Total"])
+            .format("{:1.0f} %")
+            .format({"Total": "{:1.1f}"}),
+            column_config={
+                "Total": st.column_config.NumberColumn(
+                    "Total", help="Expected clean sheets over the given gameweeks"
+                ),
+            },
+            use_container_width=True,
+            height=737,
+        )
+
+# scoring probabilities
+with score_tab:
+    st.caption("Probability of scoring 2+ goals for your offensive assets")
+    if len(probabilities) == 0:
+        st.caption(":warning: No fixture probabilities before the first rated gameweek")
+    else:
+        st.dataframe(
+            score_table.style.background_gradient(
+                cmap="RdYlGn", subset=score_table.columns[:-1], vmin=0, vmax=80
+            )
+            .background_gradient(cmap="Blues", subset=["Total"])
+            .format("{:1.0f} %")
+            .format({"Total": "{:1.1f}"}),
+            column_config={
+                "Total": st.column_config.NumberColumn(
+                    "Total",
+                    help="Expected fixtures with 2+ goals over the given gameweeks",
+                ),
+            },
+            use_container_width=True,
+            height=737,
+        )
@@ -0,0 +1,200 @@
+import streamlit as st
+import pandas as pd
+from functions.chip_planner import chip_players
+from functions.squad_store import save_squad, load_squad, squad_view
+
+# session state storage
+if "my_squad" not in st.session_state:
+    st.session_state.my_squad = []
+
+# read app vars in
+app_vars = pd.read_csv("data/app_vars.csv")
+seasons = app_vars["season"]
+
+# page config
+st.set_page_config(
+    page_title="My Squad • FPLalytics",
+    page_icon=":chart_with_upwards_trend:",
+    layout="wide",
+)
+
+# sidebar
+with st.sidebar:
+    st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
+    season_option = st.selectbox("Season", seasons)
+    latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    st.caption(
+        """Latest gameweek data: :blue["""
+        + str(latest_gw)
+        + """]  
+                [GitHub](https://github.com/njgootee)"""
+    )
+
+# read data in
+season = str(season_option)[:4]
+players = chip_players(season)
+
+# title and information
+st.title("My Squad")
+with st.expander("Information", expanded=False):
+    st.markdown(
+        """Use this tool to follow your own squad across the projections, fixture ticker and player stats.
+
+Enter your FPL entry id (or any name) to load your saved squad, pick your players and save the squad for your next visit.
+Your squad is also used as the default squad of the Chip Planner.
+
+Squad views are computed once per gameweek of data:
+- Projections: projected points over the next 6 gameweeks, from the Points Projections model.
+- Fixtures: upcoming fixture difficulty of your squad's teams, from the "Full Season" Team Ratings with 33% home advantage.
+- Stats: season totals and per 90 stats, with T-Score (npxGI as % of team xG prorated by minutes played)."""
+    )
+
+# squad select, seeded with the stored squad of the entry when the entry or season changes
+entry_id = st.text_input("FPL Entry ID", placeholder="Entry id or name").strip()
+squad_source = (entry_id, season)
+if st.session_state.get("squad_source") != squad_source or (
+    "squad_select" not in st.session_state
+):
+    stored_squad = load_squad(entry_id, season) if entry_id != "" else []
+    st.session_state.squad_select = [
+        p for p in (stored_squad or st.session_state.my_squad) if p in players.index
+    ]
+    st.session_state.squad_source = squad_source
+squad = st.multiselect(
+    "Squad",
+    players.index.to_list(),
+    format_func=lambda player_id: players.loc[player_id, "web_name_pos"],
+    max_selections=15,
+    key="squad_select",
+)
+st.session_state.my_squad = squad
+if st.button("Save Squad", disabled=entry_id == "" or len(squad) == 0):
+    save_squad(entry_id, season, squad)
+    st.caption(":white_check_mark: Squad saved")
+if len(squad) == 0:
+    st.caption("Select your squad players to view your squad")
+    st.stop()
+
+# cached squad view
+view = squad_view(season, tuple(sorted(squad)), latest_gw)
+gw_columns = [c for c in view["projections"].columns if c.startswith("GW ")]
+
+# tab setup
+p_tab, o_tab, d_tab, s_tab = st.tabs(
+    ["Projections", "Offence Fixtures", "Defence Fixtures", "Stats"]
+)
+
+# projected points
+with p_tab:
+    st.dataframe(
+        view["projections"]
+        .style.background_gradient(axis=0, subset=gw_columns, cmap="RdYlGn")
+        .background_gradient(axis=0, subset="total", cmap="Blues")
+        .format(precision=1)
+        .format({"now_cost": "£{:.1f}m"}),
+        column_config={
+            "web_name_pos": "Player",
+            "team": "Team",
+            "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
+            "total": st.column_config.NumberColumn(
+                "Total", help="Projected points over the gameweeks"
+            ),
+        },
+        column_order=["web_name_pos", "team", "now_cost"] + gw_columns + ["total"],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+# offence fixtures
+with o_tab:
+    st.dataframe(
+        view["o_fx"]
+        .style.background_gradient(
+            axis=None,
+            cmap="RdYlGn",
+            gmap=view["o_fx_v"],
+            vmin=view["o_range"][0],
+            vmax=view["o_range"][1],
+        )
+        .background_gradient(cmap="Blues", subset=["FR"])
+        .format({"FR": "{:1.0f} %"}),
+        column_config={
+            "FR": st.column_config.NumberColumn(
+                "FR", help="Fixture Ratio (% of mean fixture strength)"
+            ),
+        },
+        use_container_width=True,
+    )
+
+# defence fixtures
+with d_tab:
+    st.dataframe(
+        view["d_fx"]
+        .style.background_gradient(
+            axis=None,
+            cmap="RdYlGn_r",
+            gmap=view["d_fx_v"],
+            vmin=view["d_range"][0],
+            vmax=view["d_range"][1],
+        )
+        .background_gradient(cmap="Blues", subset=["FR"])
+        .format({"FR": "{:1.0f} %"}),
+        column_config={
+            "FR": st.column_config.NumberColumn(
+                "FR", help="Fixture Ratio (% of mean fixture strength)"
+            ),
+        },
+        use_container_width=True,
+    )
+
+# season stats
+with s_tab:
+    stat_columns = [
+        c
+        for c in ["goals", "assists", "npxG", "xA", "npxG_90", "xA_90", "t_score"]
+        if c in view["stats"].columns
+    ]
+    st.dataframe(
+        view["stats"]
+        .style.background_gradient(axis=0, subset=stat_columns, cmap="Blues")
+        .format(precision=2)
+        .format(
+            {
+                "now_cost": "£{:.1f}m",
+                "time": "{:.0f}",
+                "t_score": "{:.0f} %",
+                "total_points": "{:.0f}",
+            }
+        ),
+        column_config={
+            "web_name_pos": "Player",
+            "team": "Team",
+            "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
+            "time": "Minutes",
+            "goals": "Goals",
+            "assists": "Assists",
+            "npxG": st.column_config.NumberColumn(
+                "npxG", help="Non-Penalty Expected Goals"
+            ),
+            "xA": st.column_config.NumberColumn("xA", help="Expected Assists"),
+            "npxG_90": st.column_config.NumberColumn(
+                "npxG/90", help="Non-Penalty Expected Goals per 90 minutes"
+            ),
+            "xA_90": st.column_config.NumberColumn(
+                "xA/90", help="Expected Assists per 90 minutes"
+            ),
+            "t_score": st.column_config.NumberColumn(
+                "T-Score", help="Talisman Score: Player xGI as % of Team xG"
+            ),
+            "total_points": "FPL Points",
+        },
+        column_order=[
+            c
+            for c in ["web_name_pos", "team", "now_cost", "time"]
+            + stat_columns
+            + ["total_points"]
+            if c in view["stats"].columns
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
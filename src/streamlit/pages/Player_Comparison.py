@@ -2,6 +2,11 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from functions.generate_fixture_df import generate_fixtures_df
+from functions.team_ratings import ratings_as_of
+from functions.strength_overrides import season_overrides
+from functions.xminutes import load_xminutes
+from functions.player_similarity import similarity_index, similar_players
+from functions.fact_table import load_fact_table, gameweek_rows, player_rows
 
 # ----------------------------------------------------------------------#
 # Session state storage, callback functions
@@ -11,7 +16,8 @@ from functions.generate_fixture_df import generate_fixtures_df
 if "row_selection" not in st.session_state:
     st.session_state.row_selection = []
 if "player_selection" not in st.session_state:
-    st.session_state.player_selection = []
+    # start from the squad of the My Squad page, if one is loaded
+    st.session_state.player_selection = list(st.session_state.get("my_squad", []))
 
 
 # performance dataframe row select callback function
@@ -46,12 +52,20 @@ def main():
         latest_gw = app_vars[app_vars["season"] == season_option][
             "latest_gameweek"
         ].item()
+        # past gameweek view, with the data available after the selected gameweek
+        as_of_gw = st.selectbox(
+            "As of Gameweek",
+            range(latest_gw, 0, -1),
+            help="View the page as it was after an earlier gameweek",
+        )
         st.caption(
             """Latest gameweek data: :blue["""
             + str(latest_gw)
             + """]  
                     [GitHub](https://github.com/njgootee)"""
         )
+        past_view = as_of_gw < latest_gw
+        latest_gw = as_of_gw
 
     # read data in
     player_data = pd.read_csv("data/" + str(season_option)[:4] + "/player_data.csv")
@@ -60,9 +74,8 @@ def main():
     )
     team_mapping = pd.read_csv("data/" + str(season_option)[:4] + "/team_mapping.csv")
     fixtures = pd.read_csv("data/" + str(season_option)[:4] + "/season_data.csv")
-    odm_data = pd.read_csv("data/" + str(season_option)[:4] + "/odm_rating.csv")
-    odm_data = odm_data.tail(20)
     curr_gw = latest_gw + 1
+    odm_data = ratings_as_of(str(season_option)[:4], "Full Season", curr_gw)
 
     # title and information
     st.title("Player Comparison")
@@ -135,7 +148,11 @@ Utilize the filters in the options section to narrow your search for the perfect
             + " ["
             + player_data[player_data["player_id"] == x]["team_short"].values[-1]
             + "]",
-            default=st.session_state.player_selection,
+            default=[
+                p
+                for p in st.session_state.player_selection
+                if p in player_data["player_id"].unique()
+            ],
         )
         # filter by selected players
         if len(player_filter) > 0:
@@ -175,7 +192,6 @@ Utilize the filters in the options section to narrow your search for the perfect
     player_data["npgoals"] = player_data["goals"] - player_data["penalty_scored"]
     player_data["npGI"] = player_data["npgoals"] + player_data["assists"]
     player_data["npshots"] = player_data["shots"] - player_data["penalty_attempt"]
-    player_data["t_score"] = (player_data["npxGI"] / player_data["team_xG"]) * 100
     player_data["xG_perc"] = (player_data["npxG"] / player_data["npxGI"]) * 100
     # groupby
     perf_df = player_data.groupby(["player_id"], as_index=False).agg(
@@ -183,7 +199,6 @@ Utilize the filters in the options section to narrow your search for the perfect
         npGI=("npGI", "sum"),
         npxGI=("npxGI", "sum"),
         xG_perc=("xG_perc", "mean"),
-        t_score=("t_score", "mean"),
         npgoals=("npgoals", "sum"),
         npxG=("npxG", "sum"),
         shots=("npshots", "sum"),
@@ -200,11 +215,25 @@ Utilize the filters in the options section to narrow your search for the perfect
         yc=("yellow_card", "sum"),
         rc=("red_card", "sum"),
         team_xG=("team_xG", "sum"),
+        team_xG_on=("team_xG_on", "sum"),
     )
+    # talisman score over the gameweek range, from on pitch team xG
+    perf_df["t_score"] = (perf_df["npxGI"] / perf_df["team_xG_on"]) * 100
     # minutes per appearance
     perf_df["mpa"] = perf_df["time"] / perf_df["appearances"]
     # filter by minutes per appearance
     perf_df = perf_df[perf_df["mpa"] >= mpa_filter]
+    # expected minutes and start probability from xMinutes model
+    # only kept for the latest gameweek, availability is from current FPL data
+    if past_view:
+        perf_df["xmins"] = np.nan
+        perf_df["start_p"] = np.nan
+    else:
+        xminutes = load_xminutes(str(season_option)[:4])
+        perf_df["xmins"] = perf_df["player_id"].map(xminutes["xminutes"])
+        perf_df["start_p"] = perf_df["player_id"].map(
+            xminutes["p_start"] * xminutes["availability"]
+        )
     # team ratings
     perf_df = perf_df.merge(
         odm_data[["team", "o_rating_season", "d_rating_season"]], on="team"
@@ -231,9 +260,10 @@ Utilize the filters in the options section to narrow your search for the perfect
         fixtures, team_mapping, odm_data, gw_range[0], gw_range[1]
     )
 
-    # upcoming fixtures
+    # upcoming fixtures, with any strength overrides of the Fixture Ticker
+    overrides = season_overrides(str(season_option)[:4])
     o_fx, o_fx_v, min_o, max_o, d_fx, d_fx_v, min_d, max_d = generate_fixtures_df(
-        fixtures, team_mapping, odm_data, curr_gw, gw_lookahead
+        fixtures, team_mapping, odm_data, curr_gw, gw_lookahead, overrides=overrides
     )
 
     # ----------------------------------------------------------------------#
@@ -323,12 +353,18 @@ Utilize the filters in the options section to narrow your search for the perfect
         "web_name_pos"
     ].to_list()
 
-    # filter to selected players button
+    # filter to selected players button, or to the squad of the My Squad page
     st.button(
         label="Filter To Selected Players",
         on_click=filter_button_func,
         args=([selected_players]),
     )
+    st.button(
+        label="Filter To My Squad",
+        on_click=filter_button_func,
+        args=([list(st.session_state.get("my_squad", []))]),
+        disabled=len(st.session_state.get("my_squad", [])) == 0,
+    )
 
     # filter performance dataframe for use in other data elements
     filtered_perf_df = perf_df[perf_df["web_name_pos"].isin(selected_players_names)]
@@ -349,7 +385,10 @@ Utilize the filters in the options section to narrow your search for the perfect
                 "assists": "Assists",
                 "xA": "xA",
                 "key_passes": "KP",
+                "total_points": "FPL Points",
             }
+            # fpl points from fact table, if fpl data is recorded for the season
+            facts, fact_index = load_fact_table(str(season_option)[:4])
             hist_stat_option = st.selectbox(
                 "Select Stat",
                 options=(
@@ -362,7 +401,8 @@ Utilize the filters in the options section to narrow your search for the perfect
                     "assists",
                     "xA",
                     "key_passes",
-                ),
+                )
+                + (("total_points",) if "total_points" in facts.columns else ()),
                 index=2,
                 format_func=lambda x: stat_dict.get(x),
                 label_visibility="collapsed",
@@ -381,16 +421,24 @@ Utilize the filters in the options section to narrow your search for the perfect
             )
 
             # setup dataframe
-            historical_df = (
-                player_data[player_data["player_id"].isin(selected_players)]
-                .pivot_table(
-                    index="web_name_pos",
-                    columns="gameweek",
-                    values=hist_stat_option,
-                    aggfunc="sum",
+            hist_data = player_data[player_data["player_id"].isin(selected_players)]
+            if hist_stat_option == "total_points":
+                hist_data = gameweek_rows(
+                    player_rows(facts, fact_index, selected_players),
+                    gw_range[0],
+                    gw_range[1],
                 )
-                .reindex(selected_players_names)
-            )
+                hist_data = hist_data.assign(
+                    web_name_pos=hist_data["player_id"].map(
+                        perf_df.set_index("player_id")["web_name_pos"]
+                    )
+                )
+            historical_df = hist_data.pivot_table(
+                index="web_name_pos",
+                columns="gameweek",
+                values=hist_stat_option,
+                aggfunc="sum",
+            ).reindex(selected_players_names)
             historical_df = historical_df.round(2)
             historical_df = historical_df.add_prefix("GW ")
             historical_df2 = historical_df.astype("str") + " " + past_fixtures
@@ -415,6 +463,8 @@ Utilize the filters in the options section to narrow your search for the perfect
     # upcoming fixtures dataframe
     # ----------------------------------------------------------------------#
     with st.expander("Upcoming Fixtures"):
+        if len(overrides) > 0:
+            st.caption(":wrench: Strength overrides of the Fixture Ticker applied")
         # Dataframe
         if len(selected_players) > 0:
             o_tab, d_tab = st.tabs(["Offence", "Defence"])
@@ -514,6 +564,10 @@ Utilize the filters in the options section to narrow your search for the perfect
     # informational stats dataframe
     # ----------------------------------------------------------------------#
     with st.expander("Informational Stats"):
+        if past_view:
+            st.caption(
+                ":warning: xMins and Start % are only available for the latest gameweek"
+            )
         if len(selected_players) > 0:
             st.dataframe(
                 filtered_perf_df.style.background_gradient(
@@ -525,6 +579,8 @@ Utilize the filters in the options section to narrow your search for the perfect
                     {
                         "o_rating_season": "{:1.0f}",
                         "mpa": "{:1.0f}",
+                        "xmins": "{:1.0f}",
+                        "start_p": "{:.0%}",
                         "now_cost": "£{:.1f}m",
                         "penalties_order": "{:.0f}",
                     },
@@ -541,6 +597,12 @@ Utilize the filters in the options section to narrow your search for the perfect
                     "mpa": st.column_config.NumberColumn(
                         "MPA", help="Minutes Per Appearance"
                     ),
+                    "xmins": st.column_config.NumberColumn(
+                        "xMins", help="Expected minutes in the next fixture"
+                    ),
+                    "start_p": st.column_config.NumberColumn(
+                        "Start %", help="Probability of starting the next fixture"
+                    ),
                     "penalties_order": st.column_config.NumberColumn(
                         "Penalty Order", help="Penalty Taker Order"
                     ),
@@ -565,6 +627,8 @@ Utilize the filters in the options section to narrow your search for the perfect
                     "appearances",
                     "minutes",
                     "mpa",
+                    "xmins",
+                    "start_p",
                     "penalties_order",
                     "penalties",
                     "yc",
@@ -580,6 +644,135 @@ Utilize the filters in the options section to narrow your search for the perfect
                 "Select players in Performance Stats dataframe to view informational data and statistics."
             )
 
+    # ----------------------------------------------------------------------#
+    # similar players dataframe
+    # ----------------------------------------------------------------------#
+    with st.expander("Similar Players"):
+        features, distances = similarity_index(
+            str(season_option)[:4], gw_range[0], gw_range[1]
+        )
+        # named players in similarity index
+        sim_mapping = (
+            player_mapping.dropna(subset="player_id")
+            .drop_duplicates(subset="player_id")
+            .astype({"player_id": "int64"})
+            .set_index("player_id")
+        )
+        sim_ids = [
+            player_id
+            for player_id in features["player_id"]
+            if player_id in sim_mapping.index
+        ]
+        if len(sim_ids) > 0:
+            sp_col1, sp_col2, sp_col3 = st.columns(3, gap="large")
+            # player to compare against, defaults to first selected player
+            with sp_col1:
+                sim_player = st.selectbox(
+                    "Player",
+                    sim_ids,
+                    index=(
+                        sim_ids.index(selected_players[0])
+                        if len(selected_players) > 0 and selected_players[0] in sim_ids
+                        else 0
+                    ),
+                    format_func=lambda x: sim_mapping.loc[x, "web_name_pos"],
+                )
+            # similar player price option
+            with sp_col2:
+                sim_price = st.slider(
+                    "Max Price",
+                    min_value=sim_mapping["now_cost"].min(),
+                    max_value=sim_mapping["now_cost"].max(),
+                    value=sim_mapping["now_cost"].max(),
+                    step=0.1,
+                    format="£%.1fm",
+                    key="sim_price",
+                )
+            # similar player position option
+            with sp_col3:
+                sim_same_pos = st.checkbox("Same Position Only", value=True)
+            candidates = sim_mapping[sim_mapping["now_cost"] <= sim_price]
+            if sim_same_pos:
+                candidates = candidates[
+                    candidates["element_type"]
+                    == sim_mapping.loc[sim_player, "element_type"]
+                ]
+            similar_df = similar_players(
+                features, distances, sim_player, candidates.index
+            )
+            similar_df = similar_df.merge(
+                sim_mapping[["web_name_pos", "now_cost"]],
+                left_on="player_id",
+                right_index=True,
+            ).merge(team_mapping[["team_id", "team_short"]], how="left", on="team_id")
+            st.dataframe(
+                similar_df.style.background_gradient(
+                    axis=0, subset=["distance"], cmap="Blues_r"
+                ).format(
+                    {
+                        "t_score": "{:.0f} %",
+                        "xG_perc": "{:.0f} %",
+                        "now_cost": "£{:.1f}m",
+                    },
+                    precision=2,
+                ),
+                column_config={
+                    "web_name_pos": "Player",
+                    "now_cost": st.column_config.NumberColumn(
+                        "Price", help="FPL Price"
+                    ),
+                    "team_short": "Team",
+                    "distance": st.column_config.NumberColumn(
+                        "Distance",
+                        help="Distance between standardized per 90 stats over the gameweek range, lower is more similar",
+                    ),
+                    "npxG": st.column_config.NumberColumn(
+                        "npxG", help="Non-Penalty Expected Goals per 90"
+                    ),
+                    "xA": st.column_config.NumberColumn(
+                        "xA", help="Expected Assists per 90"
+                    ),
+                    "shots": st.column_config.NumberColumn(
+                        "npShots", help="Non-Penalty Shots per 90"
+                    ),
+                    "key_passes": st.column_config.NumberColumn(
+                        "KP", help="Key Passes per 90"
+                    ),
+                    "t_score": st.column_config.NumberColumn(
+                        "T-Score", help="Talisman Score: Player xGI as % of Team xG"
+                    ),
+                    "xG_perc": st.column_config.NumberColumn(
+                        "Goal Threat Bias", help="npxG as % of npxGI"
+                    ),
+                    "xGChain": st.column_config.NumberColumn(
+                        "xGChain", help="xG of possessions involved in per 90"
+                    ),
+                    "xGBuildup": st.column_config.NumberColumn(
+                        "xGBuildup",
+                        help="xG of possessions involved in, excluding shots and key passes, per 90",
+                    ),
+                },
+                column_order=(
+                    "web_name_pos",
+                    "now_cost",
+                    "team_short",
+                    "distance",
+                    "npxG",
+                    "xA",
+                    "shots",
+                    "key_passes",
+                    "t_score",
+                    "xG_perc",
+                    "xGChain",
+                    "xGBuildup",
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            # help caption
+            st.caption("No players with enough minutes in the gameweek range.")
+
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+from functions.efficiency_model import efficiency_estimates
+from functions.shot_data import load_shots
 
 # read app vars in
 app_vars = pd.read_csv("data/app_vars.csv")
@@ -18,12 +20,19 @@ with st.sidebar:
     st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
     season_option = st.selectbox("Season", seasons)
     latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    # past gameweek view, with the data available after the selected gameweek
+    as_of_gw = st.selectbox(
+        "As of Gameweek",
+        range(latest_gw, 0, -1),
+        help="View the page as it was after an earlier gameweek",
+    )
     st.caption(
         """Latest gameweek data: :blue["""
         + str(latest_gw)
         + """]  
                 [GitHub](https://github.com/njgootee)"""
     )
+    latest_gw = as_of_gw
 
 # read data in
 player_data = pd.read_csv("data/" + str(season_option)[:4] + "/player_data.csv")
@@ -39,10 +48,13 @@ Efficiency is defined as the difference between xG and goals, or xA and assists.
 * A high efficiency indicates a player with strong finishing ability, whereas a low efficiency indicates a poor finisher.
 * In terms of assists, efficiency values relate to creating chances for players with strong or poor finishing ability.
 * Keep in mind that (good or bad) luck can influence a players efficiency, but this noise is greatly diminished with larger sample sizes.
+* Shrinkage estimates account for this by pulling players with little npxG or xA towards the conversion rate of their position, with a 90% credible interval.
 
 Use the options section to manipulate the source data.
 * A smaller gameweek range can be a better indicator of form, but is more sensitive to outliers and variance (luck)
 
+The shots tab splits non-penalty xG into open play and set pieces, from shot level data.
+
 The dataframe and scatter plot are also interactive."""
     )
 
@@ -64,6 +76,27 @@ with st.expander("Options", expanded=False):
     chart_df["npxG_difference"] = chart_df["npgoals"] - chart_df["npxG"]
     chart_df["xA_difference"] = chart_df["assists"] - chart_df["xA"]
 
+    # efficiency estimate option
+    estimate_option = st.selectbox(
+        "Efficiency Estimate",
+        ("Shrinkage", "Raw"),
+        help="Shrinkage: empirical Bayes estimate with position priors, Raw: npGoals - npxG and Assists - xA",
+    )
+    # shrinkage estimates and credible intervals
+    chart_df = chart_df.merge(
+        efficiency_estimates(str(season_option)[:4], gw_option[0], gw_option[1]),
+        how="left",
+        on="player_id",
+    )
+    # efficiency labels of the estimate
+    npxG_eff_label = "npGoals - npxG"
+    xA_eff_label = "Assists - xA"
+    if estimate_option == "Shrinkage":
+        chart_df["npxG_difference"] = chart_df["npxG_eff"]
+        chart_df["xA_difference"] = chart_df["xA_eff"]
+        npxG_eff_label = "Shrinkage estimate of npGoals - npxG"
+        xA_eff_label = "Shrinkage estimate of Assists - xA"
+
     # slider to select minimum minutes played
     minutes_option = st.slider(
         "Minimum Minutes Played",
@@ -81,9 +114,13 @@ with st.expander("Options", expanded=False):
         chart_df["npxG_difference"] = (
             chart_df["npxG_difference"] / chart_df["time"] * 90
         )
+        chart_df["npxG_eff_lo"] = chart_df["npxG_eff_lo"] / chart_df["time"] * 90
+        chart_df["npxG_eff_hi"] = chart_df["npxG_eff_hi"] / chart_df["time"] * 90
         chart_df["npxG"] = chart_df["npxG"] / chart_df["time"] * 90
         chart_df["npgoals"] = chart_df["npgoals"] / chart_df["time"] * 90
         chart_df["xA_difference"] = chart_df["xA_difference"] / chart_df["time"] * 90
+        chart_df["xA_eff_lo"] = chart_df["xA_eff_lo"] / chart_df["time"] * 90
+        chart_df["xA_eff_hi"] = chart_df["xA_eff_hi"] / chart_df["time"] * 90
         chart_df["xA"] = chart_df["xA"] / chart_df["time"] * 90
         chart_df["assists"] = chart_df["assists"] / chart_df["time"] * 90
 
@@ -108,7 +145,7 @@ chart_df = chart_df.merge(
 chart_df = chart_df.dropna(subset="web_name_pos")
 
 # tabs
-g_tab, a_tab = st.tabs(["Goals", "Assists"])
+g_tab, a_tab, s_tab = st.tabs(["Goals", "Assists", "Shots"])
 
 # goals tab
 with g_tab:
@@ -131,10 +168,24 @@ with g_tab:
                 ),
                 "npxG_difference": st.column_config.NumberColumn(
                     "Efficiency",
-                    help="npGoals - npxG",
+                    help=npxG_eff_label,
+                ),
+                "npxG_eff_lo": st.column_config.NumberColumn(
+                    "Low", help="Lower bound of 90% credible interval"
+                ),
+                "npxG_eff_hi": st.column_config.NumberColumn(
+                    "High", help="Upper bound of 90% credible interval"
                 ),
             },
-            column_order=("web_name_pos", "npxG_difference", "npgoals", "npxG"),
+            column_order=(
+                ["web_name_pos", "npxG_difference"]
+                + (
+                    ["npxG_eff_lo", "npxG_eff_hi"]
+                    if estimate_option == "Shrinkage"
+                    else []
+                )
+                + ["npgoals", "npxG"]
+            ),
             hide_index=True,
             on_select="rerun",
             use_container_width=True,
@@ -163,7 +214,7 @@ with g_tab:
                 y=alt.Y(
                     "npxG_difference",
                     type="quantitative",
-                    title="Efficiency (npGoals - npxG)",
+                    title="Efficiency (" + npxG_eff_label + ")",
                 ),
                 tooltip=[
                     alt.Tooltip("web_name_pos", title="Player"),
@@ -202,8 +253,20 @@ with g_tab:
             )
         )
 
-        # layer chart
-        st.altair_chart(zero_line + goal_eff_chart + text, use_container_width=True)
+        # credible interval error bars
+        goal_eff_bars = (
+            alt.Chart(
+                chart_df[(chart_df["npxG"] >= chart_df["npxG"].quantile(q=quantile))]
+            )
+            .mark_rule(color="#60b4ff", opacity=0.33)
+            .encode(x="npxG", y="npxG_eff_lo", y2="npxG_eff_hi")
+        )
+
+        # layer chart, with credible intervals of shrinkage estimates
+        goal_eff_layers = zero_line + goal_eff_chart + text
+        if estimate_option == "Shrinkage":
+            goal_eff_layers = zero_line + goal_eff_bars + goal_eff_chart + text
+        st.altair_chart(goal_eff_layers, use_container_width=True)
 
 # assists
 with a_tab:
@@ -224,10 +287,20 @@ with a_tab:
                 ),
                 "xA_difference": st.column_config.NumberColumn(
                     "Efficiency",
-                    help="Assists - xA",
+                    help=xA_eff_label,
+                ),
+                "xA_eff_lo": st.column_config.NumberColumn(
+                    "Low", help="Lower bound of 90% credible interval"
+                ),
+                "xA_eff_hi": st.column_config.NumberColumn(
+                    "High", help="Upper bound of 90% credible interval"
                 ),
             },
-            column_order=("web_name_pos", "xA_difference", "assists", "xA"),
+            column_order=(
+                ["web_name_pos", "xA_difference"]
+                + (["xA_eff_lo", "xA_eff_hi"] if estimate_option == "Shrinkage" else [])
+                + ["assists", "xA"]
+            ),
             hide_index=True,
             on_select="rerun",
             use_container_width=True,
@@ -254,7 +327,7 @@ with a_tab:
                 y=alt.Y(
                     "xA_difference",
                     type="quantitative",
-                    title="Efficiency (Assists - xA)",
+                    title="Efficiency (" + xA_eff_label + ")",
                 ),
                 tooltip=[
                     alt.Tooltip("web_name_pos", title="Player"),
@@ -286,5 +359,93 @@ with a_tab:
             )
         )
 
-        # layer chart
-        st.altair_chart(zero_line + assist_eff_chart + text, use_container_width=True)
+        # credible interval error bars
+        assist_eff_bars = (
+            alt.Chart(chart_df[(chart_df["xA"] >= chart_df["xA"].quantile(q=quantile))])
+            .mark_rule(color="#60b4ff", opacity=0.33)
+            .encode(x="xA", y="xA_eff_lo", y2="xA_eff_hi")
+        )
+
+        # layer chart, with credible intervals of shrinkage estimates
+        assist_eff_layers = zero_line + assist_eff_chart + text
+        if estimate_option == "Shrinkage":
+            assist_eff_layers = zero_line + assist_eff_bars + assist_eff_chart + text
+        st.altair_chart(assist_eff_layers, use_container_width=True)
+
+# shots, non-penalty xG by shot situation
+with s_tab:
+    shots = load_shots(
+        str(season_option)[:4],
+        gw_option[0],
+        gw_option[1],
+        ["player_id", "situation", "result", "xG"],
+    )
+    if len(shots) == 0:
+        st.caption(":warning: No shot level data stored for this gameweek range")
+    else:
+        # open play and set piece (corners, free kicks and other set pieces) shots
+        shots["open_play_xG"] = shots["xG"].where(shots["situation"] == "OpenPlay", 0)
+        shots["set_piece_xG"] = shots["xG"].where(
+            shots["situation"].isin(["FromCorner", "SetPiece", "DirectFreekick"]), 0
+        )
+        shots["npgoals"] = (shots["result"] == "Goal") & (
+            shots["situation"] != "Penalty"
+        )
+        shot_df = (
+            shots[shots["situation"] != "Penalty"]
+            .groupby("player_id", as_index=False)
+            .agg(
+                shots=("xG", "count"),
+                open_play_xG=("open_play_xG", "sum"),
+                set_piece_xG=("set_piece_xG", "sum"),
+                npgoals=("npgoals", "sum"),
+            )
+        )
+        shot_df["set_piece_share"] = (
+            shot_df["set_piece_xG"]
+            / (shot_df["open_play_xG"] + shot_df["set_piece_xG"])
+            * 100
+        )
+        # players passing the minutes filter
+        shot_df = chart_df[["player_id", "web_name_pos", "time"]].merge(
+            shot_df, on="player_id"
+        )
+        if per_90:
+            for column in ["shots", "open_play_xG", "set_piece_xG", "npgoals"]:
+                shot_df[column] = shot_df[column] / shot_df["time"] * 90
+        st.dataframe(
+            shot_df.sort_values(by="open_play_xG", ascending=False)
+            .style.background_gradient(
+                axis=0, subset=["open_play_xG", "set_piece_xG"], cmap="Blues"
+            )
+            .format(precision=2)
+            .format({"set_piece_share": "{:1.0f} %"}),
+            column_config={
+                "web_name_pos": "Player",
+                "shots": st.column_config.NumberColumn(
+                    "Shots", help="Non-penalty shots"
+                ),
+                "open_play_xG": st.column_config.NumberColumn(
+                    "Open Play xG", help="xG of open play shots"
+                ),
+                "set_piece_xG": st.column_config.NumberColumn(
+                    "Set Piece xG",
+                    help="xG of shots from corners, direct free kicks and other set pieces",
+                ),
+                "set_piece_share": st.column_config.NumberColumn(
+                    "Set Piece Share", help="Share of non-penalty xG from set pieces"
+                ),
+                "npgoals": "Non-Penalty Goals",
+            },
+            column_order=[
+                "web_name_pos",
+                "shots",
+                "open_play_xG",
+                "set_piece_xG",
+                "set_piece_share",
+                "npgoals",
+            ],
+            hide_index=True,
+            use_container_width=True,
+            height=490,
+        )
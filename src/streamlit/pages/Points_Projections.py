@@ -1,5 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+from functions.xminutes import load_xminutes
+from functions.strength_overrides import (
+    season_overrides,
+    projection_operator,
+    projection_changes,
+)
 
 # read app vars in
 app_vars = pd.read_csv("data/app_vars.csv")
@@ -50,7 +57,29 @@ projections_df = projections_df.merge(
 projections_df = projections_df.merge(
     team_mapping[["team_id", "team_short"]], how="left", on="team_id"
 )
+# strength overrides of the Fixture Ticker, as first order changes to the projections
+overrides = season_overrides(str(season_option)[:4])
+if len(overrides) > 0:
+    override_columns = [c for c in projections_df.columns if c.startswith("GW ")]
+    override_players = projections_df[["player_id", "element_type", "team_id"]]
+    projections_df[override_columns] = np.maximum(
+        projections_df[override_columns].to_numpy()
+        + projection_changes(
+            projection_operator(
+                str(season_option)[:4], override_players, latest_gw + 1
+            ),
+            override_players,
+            overrides,
+            [int(c[3:]) for c in override_columns],
+        ),
+        0,
+    )
 projections_df = projections_df.drop(columns="team_id")
+# add start probability from xMinutes model
+xminutes = load_xminutes(str(season_option)[:4])
+projections_df["start_p"] = projections_df["player_id"].map(
+    xminutes["p_start"] * xminutes["availability"]
+)
 
 # title and information
 st.title("Points Projections")
@@ -77,6 +106,11 @@ The model considers the following:
 * player historical FPL bonus points
  """
     )
+if len(overrides) > 0:
+    st.caption(
+        ":wrench: Strength overrides of the Fixture Ticker applied",
+        help="Attacking points are scaled with team xG, and clean sheet points with clean sheet probability, of each adjusted fixture",
+    )
 
 # options
 with st.expander("Options", expanded=False):
@@ -110,6 +144,7 @@ gameweek_columns = [
     not in [
         "player_id",
         "minutes",
+        "start_p",
         "web_name_pos",
         "now_cost",
         "element_type",
@@ -152,12 +187,18 @@ with by_pos_tab:
             "team_short": "Team",
             "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
             "minutes": "xMinutes",
+            "start_p": st.column_config.ProgressColumn(
+                "Start %",
+                help="Probability of starting the next fixture, from recent appearances and FPL availability",
+                format="percent",
+                max_value=1,
+            ),
             "Total": st.column_config.NumberColumn(
                 help="Total predicted points over gameweek range."
             ),
         },
         column_order=(
-            ["web_name_pos", "team_short", "now_cost", "minutes"]
+            ["web_name_pos", "team_short", "now_cost", "minutes", "start_p"]
             + gameweek_columns
             + ["Total"]
         ),
@@ -180,12 +221,18 @@ with by_pos_tab:
             "team_short": "Team",
             "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
             "minutes": "xMinutes",
+            "start_p": st.column_config.ProgressColumn(
+                "Start %",
+                help="Probability of starting the next fixture, from recent appearances and FPL availability",
+                format="percent",
+                max_value=1,
+            ),
             "Total": st.column_config.NumberColumn(
                 help="Total predicted points over gameweek range."
             ),
         },
         column_order=(
-            ["web_name_pos", "team_short", "now_cost", "minutes"]
+            ["web_name_pos", "team_short", "now_cost", "minutes", "start_p"]
             + gameweek_columns
             + ["Total"]
         ),
@@ -208,12 +255,18 @@ with by_pos_tab:
             "team_short": "Team",
             "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
             "minutes": "xMinutes",
+            "start_p": st.column_config.ProgressColumn(
+                "Start %",
+                help="Probability of starting the next fixture, from recent appearances and FPL availability",
+                format="percent",
+                max_value=1,
+            ),
             "Total": st.column_config.NumberColumn(
                 help="Total predicted points over gameweek range."
             ),
         },
         column_order=(
-            ["web_name_pos", "team_short", "now_cost", "minutes"]
+            ["web_name_pos", "team_short", "now_cost", "minutes", "start_p"]
             + gameweek_columns
             + ["Total"]
         ),
@@ -236,12 +289,18 @@ with by_pos_tab:
             "team_short": "Team",
             "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
             "minutes": "xMinutes",
+            "start_p": st.column_config.ProgressColumn(
+                "Start %",
+                help="Probability of starting the next fixture, from recent appearances and FPL availability",
+                format="percent",
+                max_value=1,
+            ),
             "Total": st.column_config.NumberColumn(
                 help="Total predicted points over gameweek range."
             ),
         },
         column_order=(
-            ["web_name_pos", "team_short", "now_cost", "minutes"]
+            ["web_name_pos", "team_short", "now_cost", "minutes", "start_p"]
             + gameweek_columns
             + ["Total"]
         ),
@@ -265,12 +324,18 @@ with combine_tab:
             "team_short": "Team",
             "now_cost": st.column_config.NumberColumn("Price", help="FPL Price"),
             "minutes": "xMinutes",
+            "start_p": st.column_config.ProgressColumn(
+                "Start %",
+                help="Probability of starting the next fixture, from recent appearances and FPL availability",
+                format="percent",
+                max_value=1,
+            ),
             "Total": st.column_config.NumberColumn(
                 help="Total predicted points over gameweek range."
             ),
         },
         column_order=(
-            ["web_name_pos", "team_short", "now_cost", "minutes"]
+            ["web_name_pos", "team_short", "now_cost", "minutes", "start_p"]
             + gameweek_columns
             + ["Total"]
         ),
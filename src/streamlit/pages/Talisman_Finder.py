@@ -19,12 +19,19 @@ with st.sidebar:
     st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
     season_option = st.selectbox("Season", seasons)
     latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    # past gameweek view, with the data available after the selected gameweek
+    as_of_gw = st.selectbox(
+        "As of Gameweek",
+        range(latest_gw, 0, -1),
+        help="View the page as it was after an earlier gameweek",
+    )
     st.caption(
         """Latest gameweek data: :blue["""
         + str(latest_gw)
         + """]  
                 [GitHub](https://github.com/njgootee)"""
     )
+    latest_gw = as_of_gw
 
 # read data in
 player_data = pd.read_csv("data/" + str(season_option)[:4] + "/player_data.csv")
@@ -44,7 +51,7 @@ When searching for talismanic players, additional factors should be considered:
 Use the options section to manipulate the source data.
 * A smaller gameweek range can be a better indicator of form, but is more sensitive to outliers and variance (luck)
 
-Note that team xG data for each player is only recorded when the player makes an appearance. This is why values for Team xG will vary for players on the same team.
+Note that team xG for each player is prorated by the minutes the player played. This is why values for Team xG will vary for players on the same team.
 """
     )
 
@@ -67,7 +74,7 @@ with st.expander("Options", expanded=False):
 
     # groupby dataframe
     chart_df = player_data.groupby(["player_id"], as_index=False)[
-        ["npxGI", "team_xG", "npxG", "xA", "time"]
+        ["npxGI", "team_xG_on", "npxG", "xA", "time"]
     ].sum()
 
     # slider for minutes played
@@ -89,13 +96,13 @@ with st.expander("Options", expanded=False):
             "penalties_order",
             "time",
             "npxGI",
-            "team_xG",
+            "team_xG_on",
         ]
     else:
         table_columns = ["web_name_pos", "t_score", "xG_perc", "penalties_order"]
 
 # setup dataframe
-chart_df["t_score"] = (chart_df["npxGI"] / chart_df["team_xG"]) * 100
+chart_df["t_score"] = (chart_df["npxGI"] / chart_df["team_xG_on"]) * 100
 chart_df["xG_perc"] = (chart_df["npxG"] / chart_df["npxGI"]) * 100
 chart_df = chart_df[chart_df["t_score"] > 0].sort_values("t_score", ascending=False)
 
@@ -137,9 +144,9 @@ with col1:
                 "Goal Threat Bias",
                 help="npxG as % of npxGI",
             ),
-            "team_xG": st.column_config.NumberColumn(
+            "team_xG_on": st.column_config.NumberColumn(
                 "Team xG",
-                help="Team total xG (when player makes appearance)",
+                help="Team total xG (prorated by minutes played)",
             ),
             "time": st.column_config.NumberColumn(
                 "Minutes",
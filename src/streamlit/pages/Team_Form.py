@@ -0,0 +1,171 @@
+import streamlit as st
+import pandas as pd
+import altair as alt
+from functions.team_stats import (
+    team_stat_cube,
+    range_totals,
+    rolling_totals,
+    ewm_totals,
+    per_match,
+)
+
+# read app vars in
+app_vars = pd.read_csv("data/app_vars.csv")
+seasons = app_vars["season"]
+
+# page config
+st.set_page_config(
+    page_title="Team Form • FPLalytics",
+    page_icon=":chart_with_upwards_trend:",
+    layout="wide",
+)
+
+# sidebar
+with st.sidebar:
+    st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
+    season_option = st.selectbox("Season", seasons)
+    latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    # past gameweek view, with the data available after the selected gameweek
+    as_of_gw = st.selectbox(
+        "As of Gameweek",
+        range(latest_gw, 0, -1),
+        help="View the page as it was after an earlier gameweek",
+    )
+    st.caption(
+        """Latest gameweek data: :blue["""
+        + str(latest_gw)
+        + """]  
+                [GitHub](https://github.com/njgootee)"""
+    )
+    latest_gw = as_of_gw
+
+# read data in
+team_mapping = pd.read_csv("data/" + str(season_option)[:4] + "/team_mapping.csv")
+cube = team_stat_cube(str(season_option)[:4])
+
+# metric labels
+metric_labels = {
+    "xg_for": "xG For",
+    "xg_against": "xG Against",
+    "goals_for": "Goals For",
+    "goals_against": "Goals Against",
+    "shots_for": "Shots For",
+    "shots_against": "Shots Against",
+    "sot_for": "Shots on Target For",
+    "sot_against": "Shots on Target Against",
+    "deep_for": "Deep Completions For",
+    "deep_against": "Deep Completions Against",
+    "ppda": "PPDA",
+    "ppda_against": "Opponent PPDA",
+}
+
+# title and information
+st.title("Team Form")
+with st.expander("Information", expanded=False):
+    st.markdown(
+        """Use this tool to compare the underlying match stats and playing style of teams over any range of gameweeks.
+
+Stats are per match averages from Understat team match data:
+- xG / Goals / Shots / Shots on Target: for and against.
+- Deep Completions: passes completed within an estimated 20 yards of goal (excluding crosses), an indicator of territorial control.
+- PPDA: opponent passes allowed per defensive action in the opposition half, a lower value indicates more intense pressing. Opponent PPDA is the PPDA of a team's opponents, a higher value indicates a team is pressed less.
+- xPts: expected points from Understat's forecast match outcome probabilities, compared with actual points.
+
+The form chart shows a stat over a rolling window of gameweeks, or an exponentially time decayed average (half-life of 4 gameweeks) for a smoother form signal.
+Select teams in the dataframe to highlight them on the chart."""
+    )
+
+# options
+with st.expander("Options", expanded=False):
+    gw_option = st.slider("Gameweek Range", 1, latest_gw, (1, latest_gw))
+    metric_option = st.selectbox(
+        "Form Stat",
+        list(metric_labels),
+        format_func=lambda metric: metric_labels[metric],
+    )
+    form_option = st.selectbox("Form Average", ["Rolling", "Decay"])
+    window_option = st.slider(
+        "Rolling Window (Gameweeks)",
+        1,
+        10,
+        6,
+        disabled=form_option != "Rolling",
+    )
+
+# per match stats of gameweek range
+form_df = per_match(range_totals(cube, gw_option[0], gw_option[1]))
+form_df = form_df.merge(team_mapping, how="left", on="team_id")
+form_df["xg_diff"] = form_df["xg_for"] - form_df["xg_against"]
+form_df = form_df.sort_values("xg_diff", ascending=False)
+
+# team form dataframe
+team_df = st.dataframe(
+    form_df.style.background_gradient(
+        cmap="RdYlGn",
+        subset=["xg_diff", "xg_for", "shots_for", "sot_for", "deep_for"],
+    )
+    .background_gradient(
+        cmap="RdYlGn_r",
+        subset=["xg_against", "shots_against", "sot_against", "deep_against", "ppda"],
+    )
+    .format(precision=2),
+    column_config={
+        "team_short": "Team",
+        "matches": st.column_config.NumberColumn("Matches", format="%d"),
+        "points": st.column_config.NumberColumn("Points", format="%d"),
+        "xpts": st.column_config.NumberColumn(
+            "xPts", help="Expected points from forecast outcome probabilities"
+        ),
+        "xg_diff": st.column_config.NumberColumn("xG Diff", help="xG For - xG Against"),
+        **{metric: label for metric, label in metric_labels.items()},
+    },
+    column_order=["team_short", "matches", "points", "xpts", "xg_diff"]
+    + list(metric_labels),
+    hide_index=True,
+    on_select="rerun",
+    use_container_width=True,
+    height=737,
+)
+
+# identify selected teams to highlight
+selected_team_id = form_df.iloc[team_df.selection.rows]["team_id"].to_list()
+
+# form of each team by gameweek
+if form_option == "Rolling":
+    trend_df = per_match(rolling_totals(cube, window_option))
+else:
+    trend_df = per_match(ewm_totals(cube, 4))
+trend_df = trend_df[
+    (trend_df["gameweek"] >= gw_option[0]) & (trend_df["gameweek"] <= gw_option[1])
+].merge(team_mapping, how="left", on="team_id")
+
+# form line chart
+form_chart = (
+    alt.Chart(trend_df, height=500)
+    .mark_line(point=True)
+    .encode(
+        x=alt.X("gameweek", type="ordinal", title="Gameweek"),
+        y=alt.Y(metric_option, type="quantitative", title=metric_labels[metric_option]),
+        color=alt.Color(
+            "team_name",
+            legend=None,
+            scale=alt.Scale(
+                domain=team_mapping["team_name"].to_list(),
+                range=team_mapping["team_colour"].to_list(),
+            ),
+        ),
+        opacity=alt.condition(
+            (alt.FieldOneOfPredicate(field="team_id", oneOf=selected_team_id)),
+            if_true=alt.value(1),
+            if_false=alt.value(0.15 if selected_team_id else 0.66),
+        ),
+        tooltip=[
+            alt.Tooltip("team_name", title="Team"),
+            alt.Tooltip("gameweek", title="Gameweek"),
+            alt.Tooltip(
+                metric_option, title=metric_labels[metric_option], format=".2f"
+            ),
+        ],
+    )
+)
+st.altair_chart(form_chart, use_container_width=True)
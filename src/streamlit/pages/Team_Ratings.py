@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+from functions.team_ratings import (
+    RATING_SOURCES,
+    rating_sources,
+    ratings_as_of,
+    rating_trends,
+    load_rating_bands,
+)
+from functions.custom_ratings import CUSTOM_SOURCE, custom_ratings
+from functions.season_projection import load_season_projection
+from functions.team_stats import team_stat_cube, range_totals, per_match
 
 # read app vars in
 app_vars = pd.read_csv("data/app_vars.csv")
@@ -18,24 +28,22 @@ with st.sidebar:
     st.markdown(""":chart_with_upwards_trend: :blue[FPL]*alytics*""")
     season_option = st.selectbox("Season", seasons)
     latest_gw = app_vars[app_vars["season"] == season_option]["latest_gameweek"].item()
+    # past gameweek view, with the data available after the selected gameweek
+    as_of_gw = st.selectbox(
+        "As of Gameweek",
+        range(latest_gw, 0, -1),
+        help="View the page as it was after an earlier gameweek",
+    )
     st.caption(
         """Latest gameweek data: :blue["""
         + str(latest_gw)
         + """]  
                 [GitHub](https://github.com/njgootee)"""
     )
+    latest_gw = as_of_gw
 
 # read data in
-odm_data = pd.read_csv("data/" + str(season_option)[:4] + "/odm_rating.csv")
-odm_data = odm_data.tail(20)
 team_mapping = pd.read_csv("data/" + str(season_option)[:4] + "/team_mapping.csv")
-odm_data = odm_data.merge(team_mapping, how="left", on="team_id")
-
-# calculate overall rankings
-odm_data["ovr_rating_season"] = (
-    odm_data["o_rating_season"] / odm_data["d_rating_season"]
-)
-odm_data["ovr_rating_psix"] = odm_data["o_rating_psix"] / odm_data["d_rating_psix"]
 
 # title and information
 st.title("Team Offensive / Defensive Ratings")
@@ -53,18 +61,82 @@ A greater value in offensive rating indicates a stronger offense, whereas a stro
 With xG as the algorithm input scores, offensive rating is representative of a teams ability to create goal scoring opportunities (in terms of quantity and quality).
 Similarly, defensive rating is representative of a teams ability to limit their oppositions goal scoring opportunities.
 
-Select input data with the options menu. The "Past 6 Gameweeks" option can be a better indicator of current form, but is more sensitive to outliers and variance.  
-The dataframe and scatter plot are also interactive."""
+Alternative rating models are available as data sources:
+- Poisson: an attack-defence model where each team's match xG follows a Poisson distribution, with rate set by the team's attack strength, the opponent's defence strength and home advantage. Offensive rating is expected xG (x100) against an average defence, defensive rating is the multiplier on opponent xG.
+- xG-Elo: attack and defence ratings updated after every gameweek by the difference between observed and expected xG, on the same scale as the Poisson model.
+- Form (Decay): ODM ratings over the full season with exponentially time decayed fixture weights (half-life of 4 gameweeks), a smoother form signal than a hard window.
+- Custom Window: ODM ratings solved live over any gameweek window, with penalty xG downweighted or fixtures with a red card excluded.
+
+Select input data with the options menu. The "Past 6 Gameweeks" options can be a better indicator of current form, but are more sensitive to outliers and variance.  
+For the ODM data sources, 90% confidence intervals of each rating can be shown on the scatter plot. These are estimated from 1000 replicate seasons with each team's match xG resampled, and are wider with fewer fixtures.  
+The Rating History section plots the ratings of each team over the season, with the change and trend (least squares slope per gameweek) over a window of recent gameweeks.
+Offensive and overall ratings in the history are relative to the league average of each gameweek (100 is average), as full season ratings grow with every fixture played.  
+The dataframe and scatter plot are also interactive, teams selected in the dataframe are highlighted in the scatter plot and rating history."""
     )
 
 # options
 with st.expander("Options", expanded=False):
     # Model select box
-    model_option = st.selectbox("Data Source", ("Full Season", "Past 6 Gameweeks"))
-    if model_option == "Full Season":
-        model_type = "season"
-    elif model_option == "Past 6 Gameweeks":
-        model_type = "psix"
+    model_option = st.selectbox(
+        "Data Source", rating_sources(str(season_option)[:4]) + [CUSTOM_SOURCE]
+    )
+    if model_option == CUSTOM_SOURCE:
+        # custom window and xG weighting, ratings solved live
+        model_type = "custom"
+        custom_gws = st.slider(
+            "Custom Gameweek Window",
+            1,
+            latest_gw,
+            (max(latest_gw - 5, 1), latest_gw),
+        )
+        penalty_weight = st.slider("Penalty xG Weight (%)", 0, 100, 100) / 100
+        exclude_red_cards = st.checkbox("Exclude Red Card Fixtures")
+        rating_bands = None
+    else:
+        model_type = RATING_SOURCES[model_option][1]
+        # confidence intervals check box, bootstrap bands only for ODM data sources
+        rating_bands = load_rating_bands(str(season_option)[:4], model_option)
+    show_bands = rating_bands is not None and st.checkbox(
+        "Show Confidence Intervals", value=True
+    )
+
+# read ratings of selected data source, going into the gameweek after latest
+if model_option == CUSTOM_SOURCE:
+    odm_data, converged = custom_ratings(
+        str(season_option)[:4],
+        custom_gws[0],
+        custom_gws[1],
+        penalty_weight,
+        exclude_red_cards,
+    )
+    if not converged:
+        st.caption(
+            ":warning: Ratings did not converge",
+            help="Too few fixtures in the custom window, widen the gameweek window",
+        )
+else:
+    odm_data = ratings_as_of(str(season_option)[:4], model_option, latest_gw + 1)
+odm_data = odm_data.merge(team_mapping, how="left", on="team_id")
+
+# rating bands of latest gameweek, none in early season
+band_cols = [
+    "o_rating_" + model_type + "_lo",
+    "o_rating_" + model_type + "_hi",
+    "d_rating_" + model_type + "_lo",
+    "d_rating_" + model_type + "_hi",
+]
+if show_bands:
+    odm_data = odm_data.merge(
+        rating_bands[["team_id", "gameweek"] + band_cols],
+        how="left",
+        on=["team_id", "gameweek"],
+    )
+    show_bands = odm_data[band_cols].notna().all(axis=None)
+
+# calculate overall rankings
+odm_data["ovr_rating_" + model_type] = (
+    odm_data["o_rating_" + model_type] / odm_data["d_rating_" + model_type]
+)
 
 col1, col2 = st.columns(2)
 with col1:
@@ -117,8 +189,10 @@ selected_team_id = (
 
 with col2:
     # scatter plot range and domain
-    x_domain = [0, odm_data["d_rating_" + model_type].max().round(1) + 0.1]
-    y_range = [0, odm_data["o_rating_" + model_type].max() + 100]
+    x_col = "d_rating_" + model_type + ("_hi" if show_bands else "")
+    y_col = "o_rating_" + model_type + ("_hi" if show_bands else "")
+    x_domain = [0, odm_data[x_col].max().round(1) + 0.1]
+    y_range = [0, odm_data[y_col].max() + 100]
 
     # offense vs defense scatter plot
     scatter_plot = (
@@ -158,6 +232,40 @@ with col2:
         )
     )
 
+    # confidence interval error bars
+    o_band = (
+        alt.Chart(odm_data)
+        .mark_rule(strokeWidth=2)
+        .encode(
+            x="d_rating_" + model_type,
+            y="o_rating_" + model_type + "_lo",
+            y2="o_rating_" + model_type + "_hi",
+            color=alt.Color("team_name", legend=None),
+            opacity=alt.condition(
+                (alt.FieldOneOfPredicate(field="team_id", oneOf=selected_team_id)),
+                if_true=alt.value(0.66),
+                if_false=alt.value(0.33),
+            ),
+            tooltip=alt.value(None),
+        )
+    )
+    d_band = (
+        alt.Chart(odm_data)
+        .mark_rule(strokeWidth=2)
+        .encode(
+            x="d_rating_" + model_type + "_lo",
+            x2="d_rating_" + model_type + "_hi",
+            y="o_rating_" + model_type,
+            color=alt.Color("team_name", legend=None),
+            opacity=alt.condition(
+                (alt.FieldOneOfPredicate(field="team_id", oneOf=selected_team_id)),
+                if_true=alt.value(0.66),
+                if_false=alt.value(0.33),
+            ),
+            tooltip=alt.value(None),
+        )
+    )
+
     # mean offense line
     off_line = (
         alt.Chart(
@@ -295,9 +403,11 @@ with col2:
     )
 
     # layer charts
+    band_charts = [o_band, d_band] if show_bands else []
     overall_chart = alt.layer(
         off_line,
         def_line,
+        *band_charts,
         scatter_plot,
         highlight_text,
         info_text1,
@@ -306,3 +416,253 @@ with col2:
         info_text4,
     ).configure_range(category=alt.RangeScheme(odm_data["team_colour"].to_list()))
     st.altair_chart(overall_chart, use_container_width=True)
+
+# rating trajectories of the selected data source, teams selected in the ratings dataframe are highlighted
+with st.expander("Rating History", expanded=False):
+    col1, col2 = st.columns(2)
+    with col1:
+        trend_option = st.radio(
+            "Rating",
+            ["Overall", "Offensive", "Defensive", "Rank"],
+            horizontal=True,
+        )
+    with col2:
+        trend_window = st.select_slider(
+            "Trend Window (Gameweeks)", list(range(2, 9)), value=4
+        )
+    trend_col = {
+        "Overall": "ovr_rating",
+        "Offensive": "o_rating",
+        "Defensive": "d_rating",
+        "Rank": "ovr_rank",
+    }[trend_option]
+
+    # cached trends, filtered to the gameweeks up to the ratings shown
+    history_option = model_option
+    if model_option == CUSTOM_SOURCE:
+        history_option = "Full Season"
+        st.caption("Custom Window ratings have no history, showing Full Season ratings")
+    trends = rating_trends(str(season_option)[:4], history_option, trend_window)
+    trends = trends[trends["gameweek"] <= odm_data["gameweek"].max()]
+
+    # multi-line chart of team ratings, lower is better for defensive rating and rank
+    trend_chart = (
+        alt.Chart(trends, height=500)
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("gameweek", type="quantitative", title="Gameweek"),
+            y=alt.Y(
+                trend_col,
+                type="quantitative",
+                title=trend_option,
+                scale=alt.Scale(
+                    zero=False, reverse=trend_option in ["Defensive", "Rank"]
+                ),
+            ),
+            color=alt.Color(
+                "team",
+                scale=alt.Scale(
+                    domain=odm_data["team"].to_list(),
+                    range=odm_data["team_colour"].to_list(),
+                ),
+                legend=None,
+            ),
+            opacity=alt.condition(
+                (alt.FieldOneOfPredicate(field="team_id", oneOf=selected_team_id)),
+                if_true=alt.value(1),
+                if_false=alt.value(0.15 if len(selected_team_id) > 0 else 0.66),
+            ),
+            tooltip=[
+                alt.Tooltip("team", title="Team"),
+                alt.Tooltip("gameweek", title="Gameweek"),
+                alt.Tooltip("ovr_rating", title="Overall Rating", format=".1f"),
+                alt.Tooltip("o_rating", title="Offensive Rating", format=".1f"),
+                alt.Tooltip("d_rating", title="Defensive Rating", format=".2f"),
+                alt.Tooltip("ovr_rank", title="Rank"),
+                alt.Tooltip("ovr_rank_change", title="Rank Change", format="+d"),
+                alt.Tooltip(
+                    trend_col.replace("rank", "rating") + "_slope",
+                    title="Trend (per GW)",
+                    format="+.2f" if trend_option == "Defensive" else "+.1f",
+                ),
+            ],
+        )
+    )
+    st.altair_chart(trend_chart, use_container_width=True)
+
+    # trends going into the gameweek of the ratings shown
+    st.caption(
+        "Change over the last "
+        + str(trend_window)
+        + " gameweeks, and trend as the least squares slope per gameweek"
+    )
+    latest_trends = trends[trends["gameweek"] == trends["gameweek"].max()].merge(
+        team_mapping[["team_id", "team_short"]], how="left", on="team_id"
+    )
+    st.dataframe(
+        latest_trends.sort_values("ovr_rank")
+        .style.background_gradient(
+            cmap="RdYlGn",
+            subset=["ovr_rank_change", "ovr_rating_slope", "o_rating_slope"],
+        )
+        .background_gradient(cmap="RdYlGn_r", subset=["d_rating_slope"])
+        .format(
+            {
+                "ovr_rank_change": "{:+.0f}",
+                "ovr_rating_delta": "{:+.1f}",
+                "ovr_rating_slope": "{:+.1f}",
+                "o_rating_delta": "{:+.1f}",
+                "o_rating_slope": "{:+.1f}",
+                "d_rating_delta": "{:+.2f}",
+                "d_rating_slope": "{:+.3f}",
+            },
+            na_rep="",
+        ),
+        column_config={
+            "team_short": "Team",
+            "ovr_rank": "Rank",
+            "ovr_rank_change": st.column_config.NumberColumn(
+                "Rank Change", help="Places gained over the window"
+            ),
+            "ovr_rating_delta": st.column_config.NumberColumn(
+                "Overall Change", help="Change relative to the league average (100)"
+            ),
+            "ovr_rating_slope": st.column_config.NumberColumn(
+                "Overall Trend", help="Least squares slope per gameweek"
+            ),
+            "o_rating_delta": st.column_config.NumberColumn(
+                "Offensive Change", help="Change relative to the league average (100)"
+            ),
+            "o_rating_slope": st.column_config.NumberColumn(
+                "Offensive Trend", help="Least squares slope per gameweek"
+            ),
+            "d_rating_delta": "Defensive Change",
+            "d_rating_slope": st.column_config.NumberColumn(
+                "Defensive Trend",
+                help="Least squares slope per gameweek, negative is improving",
+            ),
+        },
+        column_order=(
+            "team_short",
+            "ovr_rank",
+            "ovr_rank_change",
+            "ovr_rating_delta",
+            "ovr_rating_slope",
+            "o_rating_delta",
+            "o_rating_slope",
+            "d_rating_delta",
+            "d_rating_slope",
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+# underlying match stats over the gameweeks of the selected data source
+with st.expander("Underlying Stats", expanded=False):
+    stats_start, stats_end = 1, latest_gw
+    if model_type == "psix":
+        stats_start = max(latest_gw - 5, 1)
+    if model_option == CUSTOM_SOURCE:
+        stats_start, stats_end = custom_gws
+    st.caption(
+        "Per match team stats of Gameweeks "
+        + str(stats_start)
+        + " to "
+        + str(stats_end)
+        + ", the fixtures behind the selected ratings"
+    )
+    stats_df = per_match(
+        range_totals(team_stat_cube(str(season_option)[:4]), stats_start, stats_end)
+    )
+    stats_df = stats_df.merge(
+        odm_data[["team_id", "team_short", "ovr_rating_" + model_type]],
+        how="inner",
+        on="team_id",
+    )
+    st.dataframe(
+        stats_df.sort_values("ovr_rating_" + model_type, ascending=False),
+        column_config={
+            "team_short": "Team",
+            "xg_for": st.column_config.NumberColumn("xG For", format="%.2f"),
+            "xg_against": st.column_config.NumberColumn("xG Against", format="%.2f"),
+            "sot_for": st.column_config.NumberColumn(
+                "Shots on Target For", format="%.1f"
+            ),
+            "sot_against": st.column_config.NumberColumn(
+                "Shots on Target Against", format="%.1f"
+            ),
+            "deep_for": st.column_config.NumberColumn(
+                "Deep Completions For", format="%.1f"
+            ),
+            "deep_against": st.column_config.NumberColumn(
+                "Deep Completions Against", format="%.1f"
+            ),
+            "ppda": st.column_config.NumberColumn(
+                "PPDA",
+                help="Opponent passes allowed per defensive action, lower indicates more intense pressing",
+                format="%.1f",
+            ),
+            "xpts": st.column_config.NumberColumn(
+                "xPts", help="Expected points from forecast outcome probabilities"
+            ),
+            "points": st.column_config.NumberColumn("Points", format="%d"),
+        },
+        column_order=(
+            "team_short",
+            "xg_for",
+            "xg_against",
+            "sot_for",
+            "sot_against",
+            "deep_for",
+            "deep_against",
+            "ppda",
+            "xpts",
+            "points",
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+# projected league table
+with st.expander("Projected League Table", expanded=False):
+    st.caption(
+        "Final league table from 100,000 simulations of the remaining fixtures, using a Poisson goals model of the Full Season ratings"
+    )
+    projection = load_season_projection(str(season_option)[:4])
+    projection = projection[
+        projection["gameweek"] == min(latest_gw + 1, projection["gameweek"].max())
+    ]
+    projection = projection.merge(
+        team_mapping[["team_id", "team_short"]], how="left", on="team_id"
+    )
+    st.dataframe(
+        projection.sort_values("position"),
+        column_config={
+            "team_short": "Team",
+            "points": st.column_config.NumberColumn(
+                "Points", help="Mean projected points", format="%.1f"
+            ),
+            "position": st.column_config.NumberColumn(
+                "Position", help="Mean projected position", format="%.1f"
+            ),
+            "p_title": st.column_config.ProgressColumn(
+                "Title", format="percent", max_value=1
+            ),
+            "p_top_4": st.column_config.ProgressColumn(
+                "Top 4", format="percent", max_value=1
+            ),
+            "p_relegation": st.column_config.ProgressColumn(
+                "Relegation", format="percent", max_value=1
+            ),
+        },
+        column_order=(
+            "team_short",
+            "points",
+            "position",
+            "p_title",
+            "p_top_4",
+            "p_relegation",
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )